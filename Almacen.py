@@ -0,0 +1,180 @@
+"""
+Módulo Almacen - Interfaz de los motores de almacenamiento del Sistema Solrock Battle Association.
+
+`Entidad` no sabe dónde viven sus filas: todo acceso pasa por un `Almacen`.
+Hay dos motores con la misma interfaz, `AlmacenCSV` (un CSV de solo anexado
+por tabla) y `AlmacenSQLite` (una base SQLite compartida por todas las
+tablas), y se elige uno con `Entidad.motor` o la variable de entorno
+SOLROCK_MOTOR.
+"""
+
+from abc import ABC, abstractmethod
+
+
+class Almacen(ABC):
+    """
+    Interfaz común de los motores de almacenamiento.
+
+    Las filas son listas cuyo primer elemento es el ID (entero positivo). Las
+    lecturas devuelven cada fila convertida por `fabrica`, o como lista de
+    textos si no hay fábrica.
+
+    Los observadores registrados con `suscribir` reciben `al_escribir(id, fila)`
+    tras cada alta o edición (`fila` es None para una baja) y `al_recargar()`
+    cuando el contenido cambió por fuera de este almacén y hay que volver a
+    leerlo.
+
+    Attributes:
+        archivo (str): Ruta con la que se abrió la tabla
+        tabla (str): Nombre de la tabla, con el que se etiquetan sus métricas
+        campos (list): Nombres de las columnas
+        fabrica (callable): Conversión de las filas leídas (None = listas de textos)
+    """
+
+    def __init__(self, archivo: str, campos: list, fabrica=None):
+        """
+        Args:
+            archivo (str): Nombre o ruta de la tabla
+            campos (list): Lista de strings con los nombres de las columnas
+            fabrica (callable): Convierte cada fila leída en el objeto que
+                devuelven las lecturas; None devuelve listas de textos
+        """
+        self.archivo = archivo
+        self.campos = campos
+        self.fabrica = fabrica
+        self._observadores = []
+
+    def suscribir(self, observador) -> None:
+        """Registra un observador de cambios (ver la documentación de la clase)."""
+        self._observadores.append(observador)
+
+    def _avisar_recarga(self) -> None:
+        """Avisa a los observadores que el contenido debe volver a leerse."""
+        for observador in self._observadores:
+            observador.al_recargar()
+
+    # ------------------------------------------------------------ concurrencia
+
+    @abstractmethod
+    def inicializar_archivo(self) -> None:
+        """Crea la tabla vacía si no existe."""
+
+    @abstractmethod
+    def bloquear(self):
+        """
+        Toma la tabla en exclusiva para usarla con `with`: nadie más escribe
+        hasta salir del bloque. Los bloques pueden anidarse.
+        """
+
+    @abstractmethod
+    def leyendo(self):
+        """Devuelve un contexto (`with`) en el que la tabla no cambia mientras se lee."""
+
+    @abstractmethod
+    def grupo(self):
+        """
+        Devuelve un contexto (`with`) que confirma con un único fsync todas las
+        escrituras hechas dentro del bloque, en esta tabla y en las demás
+        tablas del mismo directorio o base.
+        """
+
+    @abstractmethod
+    def transaccion(self, almacenes):
+        """
+        Devuelve un contexto (`with`) cuyas escrituras en `almacenes` (tablas
+        del mismo directorio o base, ya bloqueadas) sobreviven a una caída
+        todas juntas o ninguna.
+        """
+
+    @abstractmethod
+    def refrescar(self) -> None:
+        """Pone la tabla (y a los observadores) al día con lo escrito por otros procesos."""
+
+    # ----------------------------------------------------------------- lectura
+
+    @abstractmethod
+    def siguiente_id(self) -> int:
+        """Devuelve el siguiente ID a asignar; la secuencia nunca retrocede."""
+
+    @abstractmethod
+    def version(self) -> int:
+        """Devuelve un contador que crece con cada cambio de la tabla, propio o ajeno."""
+
+    @abstractmethod
+    def firma(self) -> tuple:
+        """Devuelve una tupla que cambia con cada escritura (identifica el contenido actual)."""
+
+    @abstractmethod
+    def existe(self, id_entidad: int) -> bool:
+        """Indica si hay un registro vigente con ese ID."""
+
+    @abstractmethod
+    def ids(self) -> set:
+        """Devuelve el conjunto de IDs vigentes."""
+
+    @abstractmethod
+    def buscar(self, id_buscar: int) -> tuple:
+        """
+        Busca un registro por ID.
+
+        Returns:
+            tuple: (posición, fila) o (-1, None) si no existe
+        """
+
+    @abstractmethod
+    def leer_varios(self, ids) -> list:
+        """Lee varios registros por ID; los que no existen se omiten."""
+
+    @abstractmethod
+    def leer_todas(self) -> list:
+        """Devuelve todas las filas vigentes."""
+
+    @abstractmethod
+    def leer_pagina(self, cursor: str = None, limite: int = 100, filtro=None) -> tuple:
+        """
+        Lee un bloque de filas vigentes a partir de un cursor opaco.
+
+        Returns:
+            tuple: (filas, cursor siguiente); el cursor es None al llegar al final
+
+        Raises:
+            CursorInvalido: Si el cursor está mal formado o ya no puede continuarse
+        """
+
+    # --------------------------------------------------------------- escritura
+
+    @abstractmethod
+    def escribir(self, fila: list):
+        """Guarda la fila con su ID: alta si no existía, edición si existía."""
+
+    @abstractmethod
+    def escribir_lote(self, filas: list, eliminados=()) -> None:
+        """
+        Guarda en una sola escritura varias filas que ya traen su ID (altas o
+        ediciones) y elimina los IDs de `eliminados` que existan.
+        """
+
+    @abstractmethod
+    def insertar_lote(self, filas: list) -> list:
+        """
+        Asigna IDs consecutivos a filas nuevas (sin ID) y las guarda en una sola escritura.
+
+        Returns:
+            list: IDs asignados, en el mismo orden que `filas`
+        """
+
+    @abstractmethod
+    def reemplazar(self, id_entidad: int, fila: list) -> bool:
+        """Reemplaza un registro existente; devuelve False si no existía."""
+
+    @abstractmethod
+    def eliminar_lote(self, ids) -> list:
+        """Elimina varios registros en una sola escritura y devuelve los que existían."""
+
+    @abstractmethod
+    def eliminar(self, id_entidad: int) -> bool:
+        """Elimina un registro; devuelve False si no existía."""
+
+    @abstractmethod
+    def avanzar_secuencia(self, siguiente: int) -> None:
+        """Garantiza que el siguiente ID a asignar sea al menos `siguiente`."""
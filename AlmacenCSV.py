@@ -0,0 +1,900 @@
+"""
+Módulo AlmacenCSV - Motor de almacenamiento en CSV para el Sistema Solrock Battle Association.
+
+Este módulo implementa un almacenamiento de solo anexado sobre un archivo CSV:
+las altas, ediciones y bajas agregan filas al final del archivo y un índice
+primario resuelve cuál es la versión vigente de cada registro.
+"""
+
+import array
+import csv
+import io
+import os
+import struct
+import threading
+from contextlib import contextmanager
+from Almacen import Almacen
+from Bitacora import Bitacora, sincronizar_directorio
+from CerrojoArchivo import CerrojoArchivo
+from Errores import CursorInvalido
+from Metricas import METRICAS
+
+
+class AlmacenCSV(Almacen):
+    """
+    Almacena los registros de una entidad en un CSV de solo anexado.
+
+    Cada edición agrega una nueva versión de la fila y cada eliminación agrega
+    una lápida (una fila que solo contiene el ID). El índice primario
+    (id -> desplazamiento en bytes) apunta siempre a la versión vigente, se
+    persiste en `<archivo>.idx` y se reconstruye si falta o está desactualizado.
+    Cuando la proporción de filas muertas supera `umbral_compactacion`, el
+    archivo se compacta para que el costo por edición se mantenga constante.
+
+    Cada escritura se registra primero en la `Bitacora` del directorio; una
+    escritura es durable cuando la bitácora se sincroniza, sin hacer fsync del
+    CSV completo. Los archivos que se reescriben (compactación, índice,
+    secuencia) se generan en un temporal y lo reemplazan con `os.replace`.
+
+    Varios procesos pueden compartir el mismo CSV: las lecturas toman el cerrojo
+    compartido de `<archivo>.lock` y las escrituras el exclusivo, solo durante
+    el anexado. Cuando otro proceso anexó filas, el índice en memoria se pone al
+    día leyendo únicamente la cola nueva del archivo.
+
+    `version()` es un contador que solo crece: avanza con cada escritura de este
+    almacén, con cada compactación y cada vez que se detecta (por tamaño, mtime
+    o inodo del CSV) que otro proceso modificó el archivo. Sirve para invalidar
+    resultados calculados a partir de una versión anterior.
+
+    Attributes:
+        archivo (str): Ruta del archivo CSV
+        tabla (str): Nombre del archivo, con el que se etiquetan sus métricas
+        campos (list): Nombres de las columnas del CSV
+        archivo_indice (str): Ruta del archivo donde se persiste el índice primario
+        archivo_secuencia (str): Ruta del archivo con el siguiente ID a asignar
+        cerrojo_archivo (CerrojoArchivo): Cerrojo entre procesos del CSV
+        bitacora (Bitacora): Bitácora de escritura anticipada del directorio
+        umbral_compactacion (float): Proporción de filas muertas que dispara la compactación
+        compactar_en_segundo_plano (bool): Si la compactación automática corre en otro hilo
+        fabrica (callable): Conversión de las filas leídas (None = listas de textos)
+    """
+
+    # Cabecera del índice: firma, tamaño y mtime (ns) del CSV, filas físicas y entradas
+    FORMATO_CABECERA_INDICE = "<4sqqqq"
+    FIRMA_INDICE = b"EIX3"
+    # Cada entrada del índice es un par (id, desplazamiento); LAPIDA marca un borrado
+    FORMATO_ENTRADA_INDICE = "<qq"
+    LAPIDA = -1
+
+    def __init__(self, archivo: str, campos: list, umbral_compactacion: float = 0.5,
+                 compactar_en_segundo_plano: bool = True, fabrica=None):
+        """
+        Inicializa el almacén y carga (o reconstruye) su índice primario.
+
+        Args:
+            archivo (str): Nombre o ruta del archivo CSV
+            campos (list): Lista de strings con los nombres de las columnas
+            umbral_compactacion (float): Proporción de filas muertas a partir de la cual
+                se compacta el archivo
+            compactar_en_segundo_plano (bool): Ejecutar la compactación automática en un hilo
+            fabrica (callable): Convierte cada fila leída (lista de textos) en el objeto
+                que devuelven las lecturas, por ejemplo un `Registro` tipado; None
+                devuelve las listas tal cual
+        """
+        super().__init__(archivo, campos, fabrica)
+        self.tabla = os.path.basename(archivo)
+        self.archivo_indice = archivo + ".idx"
+        self.archivo_secuencia = archivo + ".seq"
+        self.umbral_compactacion = umbral_compactacion
+        self.compactar_en_segundo_plano = compactar_en_segundo_plano
+
+        self.cerrojo_archivo = CerrojoArchivo(archivo + ".lock")
+        self._cerrojo = threading.RLock()
+        self._compactando = False
+        self._indice = {}
+        self._filas_fisicas = 0
+        self._maximo_id = 0
+        self._firma_csv = None
+        self._siguiente_id = 1
+        self._version = 0
+
+        self.inicializar_archivo()
+        self.bitacora = Bitacora.para(archivo)
+        self.bitacora.registrar_almacen(self)
+        with self.cerrojo_archivo.exclusivo(), self._cerrojo:
+            self.bitacora.recuperar(archivo)
+            self.cargar_indice()
+
+    def inicializar_archivo(self) -> None:
+        """Crea el archivo CSV con las cabeceras si no existe."""
+        if not os.path.exists(self.archivo):
+            with open(self.archivo, 'w', newline='', encoding='utf-8') as file:
+                writer = csv.writer(file)
+                writer.writerow(self.campos)
+
+    @contextmanager
+    def bloquear(self):
+        """
+        Toma el almacén en exclusiva (entre procesos y entre hilos) para usarlo con `with`.
+
+        Permite agrupar varias operaciones (por ejemplo, verificar un valor único
+        y guardarlo, o planificar y ejecutar un borrado en cascada) sin que nadie
+        escriba en medio. Al entrar, el índice se pone al día con lo que hayan
+        escrito otros procesos.
+        """
+        with self.cerrojo_archivo.exclusivo(), self._cerrojo:
+            self._asegurar_indice()
+            yield self
+
+    @contextmanager
+    def leyendo(self):
+        """
+        Toma el cerrojo compartido del CSV para usarlo con `with`.
+
+        Mientras dure el bloque nadie puede anexar ni compactar el archivo, así
+        que el índice en memoria se mantiene estable; los lectores no se
+        bloquean entre sí.
+        """
+        with self.cerrojo_archivo.compartido():
+            with self._cerrojo:
+                self._asegurar_indice()
+            yield self
+
+    def refrescar(self) -> None:
+        """Pone el índice (y a los observadores) al día con lo escrito por otros procesos."""
+        with self.leyendo():
+            pass
+
+    def grupo(self):
+        """Agrupa escrituras bajo un único fsync de la bitácora del directorio."""
+        return self.bitacora.grupo()
+
+    def transaccion(self, almacenes):
+        """
+        Marca en la bitácora las escrituras del bloque en `almacenes` como una
+        sola transacción: si el proceso cae antes de terminarla, `recuperar`
+        devuelve cada CSV al tamaño que tenía al empezar.
+        """
+        return self.bitacora.transaccion([almacen.archivo for almacen in almacenes])
+
+    # ------------------------------------------------------------------ lectura
+
+    def siguiente_id(self) -> int:
+        """
+        Devuelve el siguiente ID a asignar sin recorrer el CSV.
+
+        Returns:
+            int: El siguiente ID disponible
+        """
+        with self.leyendo():
+            return self._siguiente_id
+
+    def firma(self) -> tuple:
+        """Devuelve (tamaño, mtime en ns) del CSV ya indexado; cambia con cada escritura."""
+        with self.leyendo():
+            return self._firma_csv[:2]
+
+    def version(self) -> int:
+        """Devuelve la versión actual de la tabla, tras ponerse al día con otros procesos."""
+        with self.leyendo():
+            return self._version
+
+    def existe(self, id_entidad: int) -> bool:
+        """Indica si hay una versión vigente del registro, sin leer el CSV."""
+        with self.leyendo():
+            return id_entidad in self._indice
+
+    def ids(self) -> set:
+        """Devuelve los IDs vigentes (una copia de las claves del índice primario)."""
+        with self.leyendo():
+            return set(self._indice)
+
+    def buscar(self, id_buscar: int) -> tuple:
+        """
+        Busca la versión vigente de un registro mediante el índice primario.
+
+        Args:
+            id_buscar (int): ID del registro a buscar
+
+        Returns:
+            tuple: (posición, fila) o (-1, None) si no existe
+        """
+        with self.leyendo():
+            posicion = self._indice.get(id_buscar)
+            if posicion is None:
+                return -1, None
+
+            with open(self.archivo, 'rb') as file:
+                file.seek(posicion)
+                registro = self._leer_registro(file)
+            METRICAS.sumar(self.tabla, aperturas=1, filas_leidas=1, bytes_leidos=len(registro))
+            row = self._decodificar_fila(registro)
+
+        # Si el índice quedó desfasado respecto al archivo, se reconstruye y se reintenta
+        if not row or not row[0].isdigit() or int(row[0]) != id_buscar:
+            with self.bloquear():
+                self.reconstruir_indice()
+                self._version += 1
+                self._avisar_recarga()
+                posicion = self._indice.get(id_buscar)
+                if posicion is None:
+                    return -1, None
+                with open(self.archivo, 'rb') as file:
+                    file.seek(posicion)
+                    row = self._decodificar_fila(self._leer_registro(file))
+        return posicion, self._fabricar(row)
+
+    def leer_varios(self, ids) -> list:
+        """
+        Lee la versión vigente de varios registros abriendo el archivo una sola vez.
+
+        Args:
+            ids (iterable): IDs a leer; los que no existen se omiten
+
+        Returns:
+            list: Filas encontradas, en el orden en que están en el archivo
+        """
+        with self.leyendo():
+            posiciones = sorted(self._indice[id_entidad] for id_entidad in ids
+                                if id_entidad in self._indice)
+            rows = []
+            leidos = 0
+            with open(self.archivo, 'rb') as file:
+                for posicion in posiciones:
+                    file.seek(posicion)
+                    registro = self._leer_registro(file)
+                    leidos += len(registro)
+                    rows.append(self._fabricar(self._decodificar_fila(registro)))
+            METRICAS.sumar(self.tabla, aperturas=1, filas_leidas=len(rows), bytes_leidos=leidos)
+            return rows
+
+    def leer_todas(self) -> list:
+        """
+        Obtiene la versión vigente de todos los registros, en orden físico.
+
+        Returns:
+            list: Lista de filas vivas (sin versiones anteriores ni lápidas)
+        """
+        with self.leyendo():
+            rows = []
+            escaneadas = 0
+            with open(self.archivo, 'rb') as file:
+                self._leer_registro(file)  # Saltar la cabecera
+                while True:
+                    posicion = file.tell()
+                    registro = self._leer_registro(file)
+                    if not registro:
+                        break
+                    escaneadas += 1
+                    id_registro = self._id_de_registro(registro)
+                    if id_registro is not None and self._indice.get(id_registro) == posicion:
+                        rows.append(self._fabricar(self._decodificar_fila(registro)))
+                METRICAS.sumar(self.tabla, aperturas=1, filas_leidas=escaneadas, bytes_leidos=file.tell())
+            return rows
+
+    def leer_pagina(self, cursor: str = None, limite: int = 100, filtro=None) -> tuple:
+        """
+        Lee un bloque de filas vigentes en orden físico, a partir de un cursor.
+
+        Solo se mantiene el cerrojo compartido mientras se lee el bloque, así que
+        un consumidor lento no frena a los escritores. El cursor es un texto opaco
+        (inodo, desplazamiento y último ID leído); sigue siendo válido aunque se
+        anexen filas o se compacte el archivo, porque la compactación conserva el
+        orden relativo de las filas vivas.
+
+        Args:
+            cursor (str): Cursor devuelto por la página anterior (None = desde el principio)
+            limite (int): Número máximo de filas a devolver
+            filtro (callable): Función fila -> bool; solo se devuelven las filas que la cumplen
+
+        Returns:
+            tuple: (filas, cursor siguiente); el cursor es None al llegar al final
+
+        Raises:
+            CursorInvalido: Si el cursor está mal formado o su fila ya no existe
+                después de una compactación
+        """
+        with self.leyendo():
+            inodo = self._firma_csv[2]
+            ultimo = 0
+            with open(self.archivo, 'rb') as file:
+                if cursor is None:
+                    self._leer_registro(file)  # Saltar la cabecera
+                else:
+                    posicion, ultimo = self._resolver_cursor(cursor, inodo)
+                    if posicion is None:
+                        self._leer_registro(file)
+                    else:
+                        file.seek(posicion)
+
+                rows = []
+                inicio = file.tell()
+                escaneadas = 0
+                siguiente = None
+                while len(rows) < limite:
+                    posicion = file.tell()
+                    registro = self._leer_registro(file)
+                    if not registro:
+                        break
+                    escaneadas += 1
+                    id_registro = self._id_de_registro(registro)
+                    if id_registro is None or self._indice.get(id_registro) != posicion:
+                        continue
+                    row = self._fabricar(self._decodificar_fila(registro))
+                    ultimo = id_registro
+                    if filtro is None or filtro(row):
+                        rows.append(row)
+                else:
+                    siguiente = f"{inodo}:{file.tell()}:{ultimo}"
+                METRICAS.sumar(self.tabla, aperturas=1, filas_leidas=escaneadas, bytes_leidos=file.tell() - inicio)
+                return rows, siguiente
+
+    def _resolver_cursor(self, cursor: str, inodo: int) -> tuple:
+        """
+        Convierte un cursor en (desplazamiento donde seguir, último ID leído).
+
+        El desplazamiento es None si hay que empezar desde la primera fila.
+        """
+        try:
+            inodo_cursor, posicion, ultimo = (int(parte) for parte in cursor.split(":"))
+        except (AttributeError, ValueError):
+            raise CursorInvalido(f"Cursor mal formado: {cursor!r}.")
+
+        if inodo_cursor == inodo:
+            return posicion, ultimo
+        # El archivo se compactó: se continúa justo después de la última fila leída
+        if not ultimo:
+            return None, ultimo
+        if ultimo not in self._indice:
+            raise CursorInvalido("El archivo se compactó y la última fila leída ya no existe; "
+                                 "vuelva a empezar el listado.")
+        with open(self.archivo, 'rb') as file:
+            file.seek(self._indice[ultimo])
+            self._leer_registro(file)
+            return file.tell(), ultimo
+
+    # ---------------------------------------------------------------- escritura
+
+    def escribir(self, fila: list) -> int:
+        """
+        Anexa una versión de la fila; sirve tanto para altas como para ediciones.
+
+        Args:
+            fila (list): Valores de la fila; el primer elemento es el ID
+
+        Returns:
+            int: Desplazamiento en bytes donde quedó escrita la fila
+        """
+        with self.bitacora.grupo(), self.bloquear():
+            return self._anexar([(int(fila[0]), fila)])[0]
+
+    def escribir_lote(self, filas: list, eliminados=()) -> None:
+        """
+        Anexa en una sola escritura varias filas que ya traen su ID (altas o
+        ediciones) y las lápidas de `eliminados`.
+
+        Args:
+            filas (list): Filas cuyo primer elemento es el ID
+            eliminados (iterable): IDs a eliminar; los que no existen se ignoran
+        """
+        with self.bitacora.grupo(), self.bloquear():
+            registros = [(int(fila[0]), fila) for fila in filas]
+            registros += [(id_entidad, None) for id_entidad in dict.fromkeys(eliminados)
+                          if id_entidad in self._indice]
+            if registros:
+                self._anexar(registros)
+
+    def insertar_lote(self, filas: list) -> list:
+        """
+        Asigna IDs consecutivos a un lote de filas nuevas y las anexa en una sola
+        escritura, con un solo registro (y un solo fsync) en la bitácora.
+
+        Args:
+            filas (list): Filas sin ID, con los valores de `campos[1:]`
+
+        Returns:
+            list: IDs asignados, en el mismo orden que `filas`
+        """
+        with self.bitacora.grupo(), self.bloquear():
+            primero = self._siguiente_id
+            registros = [(primero + i, [primero + i, *fila]) for i, fila in enumerate(filas)]
+            self._anexar(registros)
+            return [id_entidad for id_entidad, _ in registros]
+
+    def reemplazar(self, id_entidad: int, fila: list) -> bool:
+        """
+        Anexa una nueva versión de un registro existente.
+
+        Args:
+            id_entidad (int): ID del registro a reemplazar
+            fila (list): Nuevos valores de la fila, incluyendo el ID
+
+        Returns:
+            bool: True si el registro existía, False en otro caso
+        """
+        with self.bitacora.grupo(), self.bloquear():
+            if id_entidad not in self._indice:
+                return False
+            self._anexar([(id_entidad, fila)])
+            return True
+
+    def eliminar_lote(self, ids) -> list:
+        """
+        Anexa en una sola escritura las lápidas de varios registros.
+
+        Args:
+            ids (iterable): IDs a eliminar; los que no existen se ignoran
+
+        Returns:
+            list: IDs que existían y fueron eliminados
+        """
+        with self.bitacora.grupo(), self.bloquear():
+            eliminados = [id_entidad for id_entidad in dict.fromkeys(ids) if id_entidad in self._indice]
+            if eliminados:
+                self._anexar([(id_entidad, None) for id_entidad in eliminados])
+            return eliminados
+
+    def eliminar(self, id_entidad: int) -> bool:
+        """
+        Anexa una lápida para el registro indicado.
+
+        Args:
+            id_entidad (int): ID del registro a eliminar
+
+        Returns:
+            bool: True si el registro existía, False en otro caso
+        """
+        with self.bitacora.grupo(), self.bloquear():
+            if id_entidad not in self._indice:
+                return False
+            self._anexar([(id_entidad, None)])
+            return True
+
+    def _anexar(self, registros: list) -> list:
+        """
+        Escribe en una sola operación una lista de (id, fila o None para una
+        lápida), actualiza el índice, la secuencia y las estadísticas, y avisa a
+        los observadores.
+
+        El llamador debe tener el almacén bloqueado (`bloquear`) dentro de un
+        `Bitacora.grupo()`: el bloque se registra en la bitácora antes de anexarse
+        al CSV y el fsync de la bitácora se hace al salir del grupo, ya sin el
+        cerrojo exclusivo.
+
+        Returns:
+            list: Desplazamiento de cada registro escrito
+        """
+        with self._cerrojo:
+            self._asegurar_indice()
+            firma_previa = self._firma_csv
+            bloque = bytearray()
+            entradas = []
+            with self.bitacora.escritura(), open(self.archivo, 'ab') as file:
+                inicio = file.tell()
+                for id_entidad, fila in registros:
+                    if fila is None:
+                        entradas.append((id_entidad, self.LAPIDA))
+                        bloque += self._codificar_fila([id_entidad])
+                    else:
+                        entradas.append((id_entidad, inicio + len(bloque)))
+                        bloque += self._codificar_fila(fila)
+                self.bitacora.registrar(os.path.basename(self.archivo), inicio, bytes(bloque))
+                file.write(bloque)
+            METRICAS.sumar(self.tabla, aperturas=1, bytes_escritos=len(bloque))
+
+            for id_entidad, posicion in entradas:
+                if posicion == self.LAPIDA:
+                    self._indice.pop(id_entidad, None)
+                else:
+                    self._indice[id_entidad] = posicion
+                self._maximo_id = max(self._maximo_id, id_entidad)
+            self._filas_fisicas += len(entradas)
+            self._version += 1
+            self._anexar_entradas_indice(entradas, firma_previa)
+
+            if self._maximo_id >= self._siguiente_id:
+                self._siguiente_id = self._maximo_id + 1
+                self._guardar_secuencia()
+
+            for observador in self._observadores:
+                for id_entidad, fila in registros:
+                    observador.al_escribir(id_entidad, fila)
+
+            self._programar_compactacion()
+            return [posicion for _, posicion in entradas]
+
+    # -------------------------------------------------------------- compactación
+
+    def filas_muertas(self) -> int:
+        """Número de filas físicas que ya no son la versión vigente de ningún registro."""
+        with self._cerrojo:
+            return self._filas_fisicas - len(self._indice)
+
+    def _programar_compactacion(self) -> None:
+        """Lanza la compactación si la proporción de filas muertas supera el umbral."""
+        # Dentro de una transacción no se compacta: deshacerla tras una caída
+        # necesita el CSV tal como estaba al empezar
+        if self._compactando or not self._filas_fisicas or self.bitacora.en_transaccion():
+            return
+        if self.filas_muertas() / self._filas_fisicas <= self.umbral_compactacion:
+            return
+
+        if self.compactar_en_segundo_plano:
+            self._compactando = True
+            # No es daemon: al salir se espera a que termine en vez de dejar el temporal a medias
+            threading.Thread(target=self.compactar).start()
+        else:
+            self.compactar()
+
+    def compactar(self) -> None:
+        """
+        Reescribe el CSV dejando solo la versión vigente de cada registro.
+
+        La copia de las filas vivas se hace sin bloquear a los escritores; al final
+        se toma el cerrojo exclusivo, se copian las filas anexadas mientras tanto y
+        el archivo nuevo reemplaza al anterior con `os.replace`. Si otro proceso
+        compactó el archivo en el intervalo, esta compactación se descarta.
+        """
+        with self.leyendo():
+            self._compactando = True
+            vivos = sorted(self._indice.items(), key=lambda entrada: entrada[1])
+            tamano, _, inodo = self._firma_csv
+
+        temporal = f"{self.archivo}.{os.getpid()}.compactando"
+        try:
+            nuevo_indice = {}
+            with open(self.archivo, 'rb') as origen, open(temporal, 'wb') as destino:
+                if os.fstat(origen.fileno()).st_ino != inodo:
+                    return
+                destino.write(self._leer_registro(origen))  # Cabecera
+                for id_entidad, posicion in vivos:
+                    origen.seek(posicion)
+                    nuevo_indice[id_entidad] = destino.tell()
+                    destino.write(self._leer_registro(origen))
+                METRICAS.sumar(self.tabla, aperturas=2, filas_leidas=len(vivos),
+                               bytes_leidos=destino.tell(), bytes_escritos=destino.tell())
+
+            with self.bloquear():
+                if self._firma_csv[2] != inodo:
+                    return  # Otro proceso ya lo compactó
+
+                # Copiar lo que se anexó mientras se compactaba
+                filas = len(nuevo_indice)
+                with open(self.archivo, 'rb') as origen, open(temporal, 'ab') as destino:
+                    origen.seek(tamano)
+                    while True:
+                        registro = self._leer_registro(origen)
+                        if not registro:
+                            break
+                        id_registro = self._id_de_registro(registro)
+                        if id_registro is None:
+                            continue
+                        if self._es_lapida(registro):
+                            nuevo_indice.pop(id_registro, None)
+                        else:
+                            nuevo_indice[id_registro] = destino.tell()
+                        destino.write(registro)
+                        filas += 1
+                    destino.flush()
+                    os.fsync(destino.fileno())
+
+                # El archivo viejo queda durable antes de que la barrera invalide
+                # sus registros en la bitácora; después se reemplaza. La secuencia
+                # se sincroniza antes porque el archivo nuevo ya no tiene las
+                # lápidas de los IDs eliminados, incluido quizás el mayor.
+                self._guardar_secuencia(durable=True)
+                self.sincronizar()
+                with self.bitacora.escritura():
+                    lsn = self.bitacora.registrar(os.path.basename(self.archivo), Bitacora.BARRERA, b"")
+                self.bitacora.sincronizar(lsn)
+                os.replace(temporal, self.archivo)
+                sincronizar_directorio(self.archivo)
+                self._indice = nuevo_indice
+                self._filas_fisicas = filas
+                self._version += 1
+                self._firma_csv = self._firma_archivo()
+                self._guardar_indice()
+        finally:
+            self._compactando = False
+            if os.path.exists(temporal):
+                os.remove(temporal)
+
+    # ------------------------------------------------------------------- índice
+
+    def cargar_indice(self) -> None:
+        """
+        Carga el índice primario desde `archivo_indice`.
+
+        Si el archivo de índice no existe, está dañado o describe una versión
+        distinta del CSV (tamaño o fecha de modificación diferentes), el índice
+        se reconstruye recorriendo el CSV una sola vez.
+        """
+        with self._cerrojo:
+            firma = self._firma_archivo()
+            try:
+                with open(self.archivo_indice, 'rb') as file:
+                    datos = file.read()
+
+                tam_cabecera = struct.calcsize(self.FORMATO_CABECERA_INDICE)
+                marca, tamano, mtime, filas, entradas = struct.unpack_from(self.FORMATO_CABECERA_INDICE, datos)
+                tam_entrada = struct.calcsize(self.FORMATO_ENTRADA_INDICE)
+                # Las entradas sobrantes son de una escritura cuya cabecera no llegó a actualizarse
+                cuerpo = datos[tam_cabecera:tam_cabecera + entradas * tam_entrada]
+                if (marca != self.FIRMA_INDICE or (tamano, mtime) != firma[:2]
+                        or len(cuerpo) != entradas * tam_entrada):
+                    raise ValueError("Índice desactualizado")
+
+                valores = array.array('q')
+                valores.frombytes(cuerpo)
+                indice = {}
+                maximo = 0
+                for i in range(0, len(valores), 2):
+                    if valores[i + 1] == self.LAPIDA:
+                        indice.pop(valores[i], None)
+                    else:
+                        indice[valores[i]] = valores[i + 1]
+                    maximo = max(maximo, valores[i])
+                self._indice = indice
+                self._filas_fisicas = filas
+                self._maximo_id = maximo
+                self._firma_csv = firma
+            except (FileNotFoundError, ValueError, struct.error):
+                self.reconstruir_indice()
+            self.cargar_secuencia()
+
+    def reconstruir_indice(self) -> None:
+        """
+        Reconstruye el índice primario recorriendo el CSV y lo guarda en disco.
+
+        Las versiones posteriores de un ID reemplazan a las anteriores y las
+        lápidas lo eliminan del índice.
+        """
+        with self._cerrojo:
+            self._asegurar_salto_final()
+            indice = {}
+            filas = 0
+            maximo = 0
+            with open(self.archivo, 'rb') as file:
+                self._leer_registro(file)  # Saltar la cabecera
+                while True:
+                    posicion = file.tell()
+                    registro = self._leer_registro(file)
+                    if not registro:
+                        break
+                    id_registro = self._id_de_registro(registro)
+                    if id_registro is None:
+                        continue
+                    if self._es_lapida(registro):
+                        indice.pop(id_registro, None)
+                    else:
+                        indice[id_registro] = posicion
+                    filas += 1
+                    maximo = max(maximo, id_registro)
+                METRICAS.sumar(self.tabla, aperturas=1, filas_leidas=filas, bytes_leidos=file.tell())
+
+            self._indice = indice
+            self._filas_fisicas = filas
+            self._maximo_id = maximo
+            self._firma_csv = self._firma_archivo()
+            self._guardar_indice()
+
+    def _asegurar_salto_final(self) -> None:
+        """Agrega un salto de línea si el CSV (editado a mano) no termina en uno."""
+        with open(self.archivo, 'r+b') as file:
+            tamano = file.seek(0, os.SEEK_END)
+            if tamano:
+                file.seek(tamano - 1)
+                if file.read(1) != b"\n":
+                    file.write(b"\r\n")
+
+    def _asegurar_indice(self) -> None:
+        """
+        Actualiza el índice si el CSV cambió desde la última vez que se indexó.
+
+        Si el mismo archivo solo creció y su índice en disco ya describe el nuevo
+        tamaño (es decir, otro almacén anexó filas), se leen únicamente las filas
+        nuevas y se avisa de cada una a los observadores. Cualquier otro cambio
+        (compactación, edición a mano) recarga el índice completo.
+        """
+        firma = self._firma_archivo()
+        if firma == self._firma_csv:
+            return
+        self._version += 1
+        if (self._firma_csv and firma[2] == self._firma_csv[2]
+                and firma[0] > self._firma_csv[0] and self._leer_cabecera_indice()[:2] == firma[:2]):
+            self._leer_anexados()
+        else:
+            self.cargar_indice()
+            self._avisar_recarga()
+
+    def _leer_anexados(self) -> None:
+        """Incorpora al índice en memoria las filas anexadas por otro proceso."""
+        cambios = []
+        with open(self.archivo, 'rb') as file:
+            file.seek(self._firma_csv[0])
+            while True:
+                posicion = file.tell()
+                registro = self._leer_registro(file)
+                if not registro:
+                    break
+                id_registro = self._id_de_registro(registro)
+                if id_registro is None:
+                    continue
+                if self._es_lapida(registro):
+                    self._indice.pop(id_registro, None)
+                    cambios.append((id_registro, None))
+                else:
+                    self._indice[id_registro] = posicion
+                    cambios.append((id_registro, self._fabricar(self._decodificar_fila(registro))))
+                self._filas_fisicas += 1
+                self._maximo_id = max(self._maximo_id, id_registro)
+            METRICAS.sumar(self.tabla, aperturas=1, filas_leidas=len(cambios),
+                           bytes_leidos=file.tell() - self._firma_csv[0])
+
+        self._firma_csv = self._firma_archivo()
+        self.cargar_secuencia()
+        for observador in self._observadores:
+            for id_entidad, fila in cambios:
+                observador.al_escribir(id_entidad, fila)
+
+    def _leer_cabecera_indice(self) -> tuple:
+        """
+        Devuelve (tamaño, mtime, filas, entradas) según la cabecera de `archivo_indice`,
+        o una tupla de None si falta o no tiene el formato actual.
+        """
+        try:
+            with open(self.archivo_indice, 'rb') as file:
+                marca, *cabecera = struct.unpack(self.FORMATO_CABECERA_INDICE,
+                                                 file.read(struct.calcsize(self.FORMATO_CABECERA_INDICE)))
+        except (FileNotFoundError, struct.error):
+            return (None,) * 4
+        return tuple(cabecera) if marca == self.FIRMA_INDICE else (None,) * 4
+
+    def _guardar_indice(self) -> None:
+        """Escribe el índice completo en un temporal que reemplaza a `archivo_indice`."""
+        valores = array.array('q')
+        for id_entidad, posicion in self._indice.items():
+            valores.append(id_entidad)
+            valores.append(posicion)
+
+        temporal = f"{self.archivo_indice}.{os.getpid()}.tmp"
+        with open(temporal, 'wb') as file:
+            file.write(struct.pack(self.FORMATO_CABECERA_INDICE, self.FIRMA_INDICE,
+                                   *self._firma_csv[:2], self._filas_fisicas, len(self._indice)))
+            valores.tofile(file)
+        os.replace(temporal, self.archivo_indice)
+
+    def _anexar_entradas_indice(self, entradas: list, firma_previa: tuple) -> None:
+        """
+        Agrega entradas (id, posición) al final del archivo de índice y actualiza
+        la cabecera, sin reescribir el índice completo.
+
+        Solo se anexa si la cabecera en disco describe el CSV tal como estaba antes
+        de esta escritura (`firma_previa`); si no, el índice se reescribe entero.
+        """
+        self._firma_csv = self._firma_archivo()
+        tamano, mtime, _, entradas_previas = self._leer_cabecera_indice()
+        if (tamano, mtime) != firma_previa[:2]:
+            self._guardar_indice()
+            return
+
+        with open(self.archivo_indice, 'r+b') as file:
+            file.seek(struct.calcsize(self.FORMATO_CABECERA_INDICE)
+                      + entradas_previas * struct.calcsize(self.FORMATO_ENTRADA_INDICE))
+            file.write(b"".join(struct.pack(self.FORMATO_ENTRADA_INDICE, *entrada)
+                                for entrada in entradas))
+            file.seek(0)
+            file.write(struct.pack(self.FORMATO_CABECERA_INDICE, self.FIRMA_INDICE,
+                                   *self._firma_csv[:2], self._filas_fisicas,
+                                   entradas_previas + len(entradas)))
+
+    def sincronizar(self) -> None:
+        """Hace fsync del CSV (lo usan la compactación y los puntos de control de la bitácora)."""
+        with open(self.archivo, 'ab') as file:
+            os.fsync(file.fileno())
+
+    def _firma_archivo(self) -> tuple:
+        """Devuelve (tamaño, mtime en ns, inodo) del CSV para detectar cambios externos."""
+        estado = os.stat(self.archivo)
+        return estado.st_size, estado.st_mtime_ns, estado.st_ino
+
+    # ---------------------------------------------------------------- secuencia
+
+    def cargar_secuencia(self) -> None:
+        """
+        Carga el siguiente ID a asignar desde `archivo_secuencia`.
+
+        Si el archivo falta o está dañado, la secuencia se reconstruye a partir
+        del mayor ID presente en el CSV (incluidas las lápidas). Nunca retrocede
+        por debajo de un ID ya usado, aunque el CSV haya recibido filas desde
+        otro proceso.
+        """
+        try:
+            with open(self.archivo_secuencia, 'r', encoding='utf-8') as file:
+                siguiente = int(file.read().strip())
+        except (FileNotFoundError, ValueError):
+            siguiente = 0
+
+        self._siguiente_id = max(siguiente, self._maximo_id + 1, self._siguiente_id)
+        if self._siguiente_id != siguiente:
+            self._guardar_secuencia(durable=True)
+
+    def avanzar_secuencia(self, siguiente: int) -> None:
+        """Adelanta la secuencia hasta `siguiente` si está por detrás; nunca la retrocede."""
+        with self.bloquear():
+            if siguiente > self._siguiente_id:
+                self._siguiente_id = siguiente
+                self._guardar_secuencia(durable=True)
+
+    def _guardar_secuencia(self, durable: bool = False) -> None:
+        """
+        Persiste el siguiente ID a asignar reemplazando `archivo_secuencia` de forma atómica.
+
+        Tras un alta no hace falta fsync: mientras el CSV conserve la fila (o la
+        lápida) del mayor ID, que la bitácora hace durable, `cargar_secuencia`
+        reconstruye la secuencia aunque el archivo se pierda. Con `durable=True`
+        (antes de que la compactación descarte lápidas, o al adelantar la
+        secuencia más allá de los IDs del CSV) se sincronizan el archivo y su
+        directorio.
+        """
+        temporal = f"{self.archivo_secuencia}.{os.getpid()}.tmp"
+        with open(temporal, 'w', encoding='utf-8') as file:
+            file.write(str(self._siguiente_id))
+            if durable:
+                file.flush()
+                os.fsync(file.fileno())
+        os.replace(temporal, self.archivo_secuencia)
+        if durable:
+            sincronizar_directorio(self.archivo_secuencia)
+
+    # ------------------------------------------------------------- formato CSV
+
+    @staticmethod
+    def _leer_registro(file) -> bytes:
+        """
+        Lee un registro CSV completo desde la posición actual de `file` (modo binario).
+
+        Un registro puede ocupar varias líneas si contiene campos entre comillas
+        con saltos de línea, por eso se sigue leyendo mientras las comillas estén
+        desbalanceadas.
+        """
+        registro = file.readline()
+        while registro.count(b'"') % 2 == 1:
+            linea = file.readline()
+            if not linea:
+                break
+            registro += linea
+        return registro
+
+    @classmethod
+    def _id_de_registro(cls, registro: bytes):
+        """Extrae el ID (primer campo) de un registro, o None si no tiene uno válido."""
+        id_texto = registro.split(b",", 1)[0].strip()
+        if id_texto.isdigit():
+            return int(id_texto)
+        row = cls._decodificar_fila(registro)
+        if row and row[0].isdigit():
+            return int(row[0])
+        return None
+
+    @staticmethod
+    def _es_lapida(registro: bytes) -> bool:
+        """Indica si el registro es una lápida (una fila que solo contiene el ID)."""
+        return registro.strip().isdigit()
+
+    def _fabricar(self, row: list):
+        """Aplica `fabrica` a una fila decodificada."""
+        return row if self.fabrica is None else self.fabrica(row)
+
+    @staticmethod
+    def _decodificar_fila(registro: bytes) -> list:
+        """Convierte los bytes de un registro CSV en la lista de sus campos."""
+        texto = registro.decode('utf-8')
+        return next(csv.reader(texto.splitlines(True)), [])
+
+    @staticmethod
+    def _codificar_fila(fila: list) -> bytes:
+        """Convierte una fila en los bytes CSV que la representan."""
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(fila)
+        return buffer.getvalue().encode('utf-8')
@@ -0,0 +1,491 @@
+"""
+Módulo AlmacenSQLite - Motor de almacenamiento SQLite para el Sistema Solrock Battle Association.
+
+Guarda cada entidad como una tabla de una base SQLite (`sqlite3` de la
+biblioteca estándar) en modo WAL. A diferencia del CSV, el costo de leer o
+editar un registro no depende de cuánto haya crecido la tabla: la clave
+primaria y las columnas de clave foránea tienen índices B-tree en la propia
+base y no hay que reconstruir nada en memoria al arrancar.
+"""
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from Almacen import Almacen
+from Errores import CursorInvalido
+from Metricas import METRICAS
+
+# Nombre de la base cuando no se indica otra: vive junto a los CSV de la tabla
+BASE_PREDETERMINADA = "solrock.db"
+
+
+class BaseSQLite:
+    """
+    Conexiones y transacciones de un archivo SQLite, compartidas por todas sus tablas.
+
+    Cada hilo usa su propia conexión (en modo autocommit: las transacciones se
+    abren explícitamente). Las transacciones se anidan: el bloque más externo
+    abre la transacción con BEGIN y los internos usan SAVEPOINT, así que un
+    error deshace solo su propio bloque y un bloque externo (`grupo`) confirma
+    todo con un único COMMIT y un único fsync.
+
+    Attributes:
+        ruta (str): Ruta del archivo de la base
+    """
+
+    _bases = {}
+    _cerrojo_bases = threading.Lock()
+
+    # Milisegundos que una conexión espera a que otro proceso libere la base
+    ESPERA_MS = 30000
+
+    @classmethod
+    def para(cls, ruta: str) -> "BaseSQLite":
+        """Devuelve la instancia compartida de la base ubicada en `ruta`."""
+        clave = os.path.realpath(ruta)
+        with cls._cerrojo_bases:
+            base = cls._bases.get(clave)
+            if base is None:
+                base = cls._bases[clave] = cls(ruta)
+            return base
+
+    def __init__(self, ruta: str):
+        """
+        Abre (o crea) la base, activa el modo WAL y crea la tabla de control.
+
+        Args:
+            ruta (str): Ruta del archivo SQLite
+        """
+        self.ruta = ruta
+        self._local = threading.local()
+        self._almacenes = []
+        conexion = self.conexion()
+        conexion.execute("PRAGMA journal_mode=WAL")
+        conexion.execute("CREATE TABLE IF NOT EXISTS _tablas ("
+                         "tabla TEXT PRIMARY KEY, siguiente_id INTEGER NOT NULL, "
+                         "version INTEGER NOT NULL)")
+
+    def conexion(self) -> sqlite3.Connection:
+        """Devuelve la conexión del hilo actual, abriéndola la primera vez."""
+        conexion = getattr(self._local, "conexion", None)
+        if conexion is None:
+            conexion = sqlite3.connect(self.ruta, timeout=self.ESPERA_MS / 1000,
+                                       isolation_level=None, check_same_thread=False,
+                                       cached_statements=256)
+            conexion.execute(f"PRAGMA busy_timeout={self.ESPERA_MS}")
+            conexion.execute("PRAGMA synchronous=FULL")
+            self._local.conexion = conexion
+            self._local.profundidad = 0
+            self._local.exclusiva = False
+            self._local.escribio = False
+        return conexion
+
+    def registrar_almacen(self, almacen) -> None:
+        """Registra un almacén para avisarle cuando se deshace una escritura."""
+        self._almacenes.append(almacen)
+
+    def marcar_escritura(self) -> None:
+        """Anota que la transacción en curso del hilo modificó datos."""
+        self._local.escribio = True
+
+    @contextmanager
+    def transaccion(self, exclusiva: bool):
+        """
+        Abre una transacción (o un SAVEPOINT si ya hay una) para usarla con `with`.
+
+        Args:
+            exclusiva (bool): True toma el permiso de escritura al empezar
+                (BEGIN IMMEDIATE); False abre una lectura con una vista estable
+
+        Raises:
+            RuntimeError: Si se pide escribir dentro de una transacción de solo lectura
+        """
+        conexion = self.conexion()
+        local = self._local
+        if local.profundidad == 0:
+            conexion.execute("BEGIN IMMEDIATE" if exclusiva else "BEGIN")
+            local.exclusiva = exclusiva
+            local.escribio = False
+        elif exclusiva and not local.exclusiva:
+            raise RuntimeError("No se puede escribir dentro de una transacción de solo lectura.")
+
+        punto = f"nivel_{local.profundidad}" if local.profundidad else None
+        if punto:
+            conexion.execute(f"SAVEPOINT {punto}")
+        local.profundidad += 1
+        try:
+            yield conexion
+        except BaseException:
+            local.profundidad -= 1
+            self._deshacer(conexion, punto)
+            raise
+        local.profundidad -= 1
+        if punto:
+            conexion.execute(f"RELEASE {punto}")
+            return
+        try:
+            conexion.execute("COMMIT")
+        except BaseException:
+            self._deshacer(conexion, None)
+            raise
+
+    def _deshacer(self, conexion: sqlite3.Connection, punto: str) -> None:
+        """Deshace la transacción (o el SAVEPOINT) y avisa si se perdieron escrituras."""
+        if punto:
+            conexion.execute(f"ROLLBACK TO {punto}")
+            conexion.execute(f"RELEASE {punto}")
+        elif conexion.in_transaction:
+            conexion.execute("ROLLBACK")
+        if self._local.escribio:
+            # Los observadores ya vieron escrituras que no llegaron a la base
+            for almacen in self._almacenes:
+                almacen.descartar_version()
+
+
+class AlmacenSQLite(Almacen):
+    """
+    Almacena los registros de una entidad en una tabla SQLite.
+
+    La primera columna es un INTEGER PRIMARY KEY (el rowid de SQLite), así que
+    buscar, editar o eliminar por ID es una búsqueda en un B-tree; las columnas
+    de `indices` (las claves foráneas y los campos únicos) llevan además un
+    índice propio. Las demás columnas se guardan como texto, igual que en el
+    CSV. Las sentencias se construyen una sola vez y `sqlite3` las mantiene
+    preparadas en su caché de sentencias.
+
+    La tabla `_tablas` guarda, por tabla, el siguiente ID a asignar y un
+    contador de versión que avanza en la misma transacción que cada escritura;
+    así `version()` detecta también lo escrito por otros procesos.
+
+    Attributes:
+        base (BaseSQLite): Base que contiene la tabla
+        tabla (str): Nombre de la tabla (el del CSV sin extensión)
+    """
+
+    # IDs por consulta en `leer_varios` (SQLite limita los parámetros por sentencia)
+    IDS_POR_CONSULTA = 500
+
+    def __init__(self, archivo: str, campos: list, fabrica=None, indices=(), base: str = None):
+        """
+        Inicializa el almacén y crea la tabla y sus índices si no existen.
+
+        Args:
+            archivo (str): Nombre o ruta del CSV equivalente; su nombre sin
+                extensión es el de la tabla y su directorio el de la base
+            campos (list): Lista de strings con los nombres de las columnas
+            fabrica (callable): Convierte cada fila leída en el objeto que
+                devuelven las lecturas; None devuelve listas de textos
+            indices (iterable): Columnas (además del ID) que llevan índice
+            base (str): Ruta de la base (por defecto `solrock.db` junto al CSV)
+        """
+        super().__init__(archivo, campos, fabrica)
+        self.tabla = os.path.splitext(os.path.basename(archivo))[0]
+        self.indices = tuple(indices)
+        self.base = BaseSQLite.para(base or os.path.join(os.path.dirname(archivo), BASE_PREDETERMINADA))
+        self._cerrojo = threading.RLock()
+        self._version_vista = None
+
+        tabla = _nombre(self.tabla)
+        columnas = ", ".join(_nombre(campo) for campo in campos)
+        marcas = ", ".join("?" * len(campos))
+        clave = _nombre(campos[0])
+        self._sql = {
+            "buscar": f"SELECT {columnas} FROM {tabla} WHERE {clave} = ?",
+            "existe": f"SELECT 1 FROM {tabla} WHERE {clave} = ?",
+            "ids": f"SELECT {clave} FROM {tabla}",
+            "todas": f"SELECT {columnas} FROM {tabla} ORDER BY {clave}",
+            "pagina": f"SELECT {columnas} FROM {tabla} WHERE {clave} > ? ORDER BY {clave} LIMIT ?",
+            "varios": f"SELECT {columnas} FROM {tabla} WHERE {clave} IN ({{}}) ORDER BY {clave}",
+            "insertar": f"INSERT INTO {tabla} ({columnas}) VALUES ({marcas})",
+            "guardar": f"INSERT OR REPLACE INTO {tabla} ({columnas}) VALUES ({marcas})",
+            "reemplazar": f"UPDATE {tabla} SET "
+                          + ", ".join(f"{_nombre(campo)} = ?" for campo in campos[1:])
+                          + f" WHERE {clave} = ?",
+            "eliminar": f"DELETE FROM {tabla} WHERE {clave} = ?",
+            "estado": "SELECT siguiente_id, version FROM _tablas WHERE tabla = ?",
+            "avanzar": "UPDATE _tablas SET siguiente_id = max(siguiente_id, ?), "
+                       "version = version + 1 WHERE tabla = ?",
+        }
+
+        self.inicializar_archivo()
+        self.base.registrar_almacen(self)
+
+    def inicializar_archivo(self) -> None:
+        """Crea la tabla, sus índices y su fila de control si no existen."""
+        tabla = _nombre(self.tabla)
+        columnas = [f"{_nombre(self.campos[0])} INTEGER PRIMARY KEY"]
+        columnas += [f"{_nombre(campo)} TEXT" for campo in self.campos[1:]]
+        with self.base.transaccion(exclusiva=True) as conexion:
+            conexion.execute(f"CREATE TABLE IF NOT EXISTS {tabla} ({', '.join(columnas)})")
+            for campo in self.indices:
+                conexion.execute(f"CREATE INDEX IF NOT EXISTS {_nombre(f'{self.tabla}_{campo}')} "
+                                 f"ON {tabla} ({_nombre(campo)})")
+            conexion.execute("INSERT OR IGNORE INTO _tablas VALUES (?, 1, 0)", (self.tabla,))
+
+    @contextmanager
+    def bloquear(self):
+        """
+        Abre una transacción de escritura (o un SAVEPOINT dentro de otra) para
+        usarla con `with`. Si el bloque termina con una excepción, sus
+        escrituras se deshacen.
+        """
+        with self.base.transaccion(exclusiva=True) as conexion:
+            self._asegurar_al_dia(conexion)
+            yield self
+
+    @contextmanager
+    def leyendo(self):
+        """Abre una transacción de lectura: el bloque ve una instantánea estable de la base."""
+        with self.base.transaccion(exclusiva=False) as conexion:
+            self._asegurar_al_dia(conexion)
+            yield self
+
+    def grupo(self):
+        """Agrupa escrituras (en cualquier tabla de la base) en una transacción con un solo COMMIT."""
+        return self.base.transaccion(exclusiva=True)
+
+    def transaccion(self, almacenes):
+        """Las tablas comparten la base: basta una transacción (o un SAVEPOINT) de escritura."""
+        return self.base.transaccion(exclusiva=True)
+
+    def refrescar(self) -> None:
+        """Avisa a los observadores si otro proceso (u otra conexión) cambió la tabla."""
+        self._asegurar_al_dia(self.base.conexion())
+
+    def descartar_version(self) -> None:
+        """Olvida la versión vista: la próxima operación recarga a los observadores."""
+        with self._cerrojo:
+            self._version_vista = None
+
+    def _estado(self, conexion: sqlite3.Connection) -> tuple:
+        """Devuelve (siguiente ID, versión) de la tabla según la base."""
+        return conexion.execute(self._sql["estado"], (self.tabla,)).fetchone()
+
+    def _asegurar_al_dia(self, conexion: sqlite3.Connection) -> int:
+        """Compara la versión de la base con la vista; si difiere, recarga a los observadores."""
+        version = self._estado(conexion)[1]
+        with self._cerrojo:
+            if version != self._version_vista:
+                self._version_vista = version
+                self._avisar_recarga()
+        return version
+
+    # ----------------------------------------------------------------- lectura
+
+    def siguiente_id(self) -> int:
+        """Devuelve el siguiente ID a asignar."""
+        return self._estado(self.base.conexion())[0]
+
+    def version(self) -> int:
+        """Devuelve la versión persistida de la tabla (cambia con cada escritura de cualquier proceso)."""
+        return self._asegurar_al_dia(self.base.conexion())
+
+    def firma(self) -> tuple:
+        """Devuelve (versión, 0); cambia con cada escritura."""
+        return self.version(), 0
+
+    def existe(self, id_entidad: int) -> bool:
+        """Indica si hay un registro con ese ID (una búsqueda por clave primaria)."""
+        return self.base.conexion().execute(self._sql["existe"], (id_entidad,)).fetchone() is not None
+
+    def ids(self) -> set:
+        """Devuelve los IDs vigentes, leídos del índice de la clave primaria."""
+        ids = {row[0] for row in self.base.conexion().execute(self._sql["ids"])}
+        METRICAS.sumar(self.tabla, filas_leidas=len(ids))
+        return ids
+
+    def buscar(self, id_buscar: int) -> tuple:
+        """
+        Busca un registro por su clave primaria.
+
+        Args:
+            id_buscar (int): ID del registro a buscar
+
+        Returns:
+            tuple: (ID, fila) o (-1, None) si no existe
+        """
+        row = self.base.conexion().execute(self._sql["buscar"], (id_buscar,)).fetchone()
+        if row is None:
+            return -1, None
+        METRICAS.sumar(self.tabla, filas_leidas=1)
+        return id_buscar, self._fabricar(row)
+
+    def leer_varios(self, ids) -> list:
+        """
+        Lee varios registros con consultas `IN` de hasta `IDS_POR_CONSULTA` IDs.
+
+        Returns:
+            list: Filas encontradas, ordenadas por ID
+        """
+        ids = sorted(set(ids))
+        rows = []
+        with self.leyendo():
+            conexion = self.base.conexion()
+            for inicio in range(0, len(ids), self.IDS_POR_CONSULTA):
+                bloque = ids[inicio:inicio + self.IDS_POR_CONSULTA]
+                sql = self._sql["varios"].format(", ".join("?" * len(bloque)))
+                rows.extend(self._fabricar(row) for row in conexion.execute(sql, bloque))
+        METRICAS.sumar(self.tabla, filas_leidas=len(rows))
+        return rows
+
+    def leer_todas(self) -> list:
+        """Devuelve todas las filas, ordenadas por ID."""
+        rows = [self._fabricar(row) for row in self.base.conexion().execute(self._sql["todas"])]
+        METRICAS.sumar(self.tabla, filas_leidas=len(rows))
+        return rows
+
+    def leer_pagina(self, cursor: str = None, limite: int = 100, filtro=None) -> tuple:
+        """
+        Lee un bloque de filas en orden de ID, a partir de un cursor.
+
+        El cursor es el último ID recorrido, así que sigue siendo válido aunque
+        se agreguen o eliminen filas entre una página y la siguiente.
+
+        Args:
+            cursor (str): Cursor devuelto por la página anterior (None = desde el principio)
+            limite (int): Número máximo de filas a devolver
+            filtro (callable): Función fila -> bool; solo se devuelven las filas que la cumplen
+
+        Returns:
+            tuple: (filas, cursor siguiente); el cursor es None al llegar al final
+
+        Raises:
+            CursorInvalido: Si el cursor está mal formado
+        """
+        try:
+            ultimo = 0 if cursor is None else int(cursor)
+        except (TypeError, ValueError):
+            raise CursorInvalido(f"Cursor mal formado: {cursor!r}.")
+
+        rows = []
+        escaneadas = 0
+        with self.leyendo():
+            conexion = self.base.conexion()
+            while len(rows) < limite:
+                bloque = conexion.execute(self._sql["pagina"], (ultimo, limite)).fetchall()
+                for row in bloque:
+                    escaneadas += 1
+                    ultimo = row[0]
+                    fila = self._fabricar(row)
+                    if filtro is None or filtro(fila):
+                        rows.append(fila)
+                        if len(rows) == limite:
+                            break
+                if len(bloque) < limite and len(rows) < limite:
+                    METRICAS.sumar(self.tabla, filas_leidas=escaneadas)
+                    return rows, None
+        METRICAS.sumar(self.tabla, filas_leidas=escaneadas)
+        return rows, str(ultimo)
+
+    def _fabricar(self, row: tuple):
+        """Convierte una fila de SQLite en una lista de textos (o aplica `fabrica`)."""
+        fila = [str(valor) for valor in row]
+        return fila if self.fabrica is None else self.fabrica(fila)
+
+    # --------------------------------------------------------------- escritura
+
+    def escribir(self, fila: list) -> int:
+        """
+        Guarda la fila con su ID; sirve tanto para altas como para ediciones.
+
+        Returns:
+            int: ID de la fila escrita
+        """
+        self.escribir_lote([fila])
+        return int(fila[0])
+
+    def escribir_lote(self, filas: list, eliminados=()) -> None:
+        """Guarda en una sola transacción varias filas que ya traen su ID y elimina los de `eliminados`."""
+        registros = [(int(fila[0]), list(fila)) for fila in filas]
+        with self.bloquear():
+            conexion = self.base.conexion()
+            conexion.executemany(self._sql["guardar"], (_valores(fila) for _, fila in registros))
+            registros += [(id_entidad, None) for id_entidad in dict.fromkeys(eliminados)
+                          if conexion.execute(self._sql["eliminar"], (id_entidad,)).rowcount]
+            if registros:
+                self._registrar(conexion, registros, max((int(fila[0]) for fila in filas), default=0) + 1)
+
+    def insertar_lote(self, filas: list) -> list:
+        """
+        Asigna IDs consecutivos a un lote de filas nuevas y las inserta en una sola transacción.
+
+        Args:
+            filas (list): Filas sin ID, con los valores de `campos[1:]`
+
+        Returns:
+            list: IDs asignados, en el mismo orden que `filas`
+        """
+        with self.bloquear():
+            conexion = self.base.conexion()
+            primero = self._estado(conexion)[0]
+            registros = [(primero + i, [primero + i, *fila]) for i, fila in enumerate(filas)]
+            if registros:
+                conexion.executemany(self._sql["insertar"], (_valores(fila) for _, fila in registros))
+                self._registrar(conexion, registros, primero + len(registros))
+            return [id_entidad for id_entidad, _ in registros]
+
+    def reemplazar(self, id_entidad: int, fila: list) -> bool:
+        """
+        Reemplaza los valores de un registro existente.
+
+        Returns:
+            bool: True si el registro existía, False en otro caso
+        """
+        with self.bloquear():
+            conexion = self.base.conexion()
+            valores = _valores(fila)
+            cursor = conexion.execute(self._sql["reemplazar"], (*valores[1:], id_entidad))
+            if not cursor.rowcount:
+                return False
+            self._registrar(conexion, [(id_entidad, list(fila))], 0)
+            return True
+
+    def eliminar_lote(self, ids) -> list:
+        """
+        Elimina varios registros en una sola transacción.
+
+        Returns:
+            list: IDs que existían y fueron eliminados
+        """
+        with self.bloquear():
+            conexion = self.base.conexion()
+            eliminados = [id_entidad for id_entidad in dict.fromkeys(ids)
+                          if conexion.execute(self._sql["eliminar"], (id_entidad,)).rowcount]
+            if eliminados:
+                self._registrar(conexion, [(id_entidad, None) for id_entidad in eliminados], 0)
+            return eliminados
+
+    def eliminar(self, id_entidad: int) -> bool:
+        """Elimina un registro; devuelve True si existía."""
+        return bool(self.eliminar_lote([id_entidad]))
+
+    def avanzar_secuencia(self, siguiente: int) -> None:
+        """Adelanta la secuencia hasta `siguiente` si está por detrás; nunca la retrocede."""
+        with self.bloquear():
+            self._registrar(self.base.conexion(), [], siguiente)
+
+    def _registrar(self, conexion: sqlite3.Connection, registros: list, siguiente: int) -> None:
+        """
+        Avanza la versión (y la secuencia hasta `siguiente`) en la transacción
+        en curso y avisa a los observadores de cada (id, fila o None).
+        """
+        conexion.execute(self._sql["avanzar"], (siguiente, self.tabla))
+        self.base.marcar_escritura()
+        with self._cerrojo:
+            if self._version_vista is not None:
+                self._version_vista += 1
+            for observador in self._observadores:
+                for id_entidad, fila in registros:
+                    observador.al_escribir(id_entidad, fila)
+
+
+def _nombre(identificador: str) -> str:
+    """Cita un nombre de tabla, columna o índice para usarlo en SQL."""
+    return '"' + identificador.replace('"', '""') + '"'
+
+
+def _valores(fila) -> list:
+    """Convierte una fila en los parámetros de SQLite: el ID como entero y el resto como texto."""
+    id_entidad, *resto = fila
+    return [int(id_entidad), *(str(valor) for valor in resto)]
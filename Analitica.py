@@ -0,0 +1,271 @@
+"""
+Módulo Analitica - Consultas agregadas vectorizadas para el Sistema Solrock Battle Association.
+
+Carga las columnas de `pokemones.csv` y `participantes.csv` en arreglos de
+NumPy y responde preguntas como "nivel promedio por tipo", "histograma de
+niveles por entrenador", "participantes por ciudad" o "los 10 entrenadores con
+mayor nivel sumado" sin recorrer filas en Python.
+
+Las columnas numéricas se toman sin copiar de la instantánea columnar de cada
+tabla (`Entidad.cargar_instantanea`); las de texto se codifican una sola vez
+como diccionario (código entero por valor) para agrupar con `bincount`.
+
+Requiere NumPy (`pip install numpy`); el resto del sistema no depende de él.
+"""
+
+import numpy as np
+from InstantaneaColumnar import ColumnaTexto
+
+# Agregaciones admitidas por `agrupar`
+AGREGACIONES = ("conteo", "suma", "promedio", "minimo", "maximo")
+# Textos más largos que esto se codifican en Python (el arreglo de ancho fijo crecería demasiado)
+ANCHO_MAXIMO_VECTORIZADO = 64
+
+
+def enteros(columna) -> np.ndarray:
+    """
+    Convierte una columna de la instantánea en un arreglo int64.
+
+    Las columnas numéricas (memoryview) se envuelven sin copiar; si la columna
+    quedó como texto porque el CSV tiene valores editados a mano, se convierte
+    y un valor no numérico produce ValueError.
+    """
+    if isinstance(columna, memoryview):
+        return np.frombuffer(columna, dtype=np.int64)
+    return np.array([int(valor) for valor in columna], dtype=np.int64)
+
+
+def codificar(columna) -> tuple:
+    """
+    Codifica una columna de texto como diccionario.
+
+    Para una `ColumnaTexto` de valores cortos no se decodifica fila por fila:
+    los bytes de cada valor se copian a un arreglo de ancho fijo directamente
+    desde el `mmap` y se agrupan con `np.unique`.
+
+    Args:
+        columna (iterable): Valores de texto
+
+    Returns:
+        tuple: (códigos int32 por fila, arreglo con el valor de cada código)
+    """
+    if isinstance(columna, ColumnaTexto) and len(columna.datos):
+        desplazamientos = np.frombuffer(columna.desplazamientos, dtype=np.int64)
+        largos = np.diff(desplazamientos)
+        ancho = int(largos.max())
+        if ancho <= ANCHO_MAXIMO_VECTORIZADO:
+            datos = np.frombuffer(columna.datos, dtype=np.uint8)
+            columnas = np.arange(ancho)
+            posiciones = np.minimum(desplazamientos[:-1, None] + columnas, len(datos) - 1)
+            fijos = np.where(columnas < largos[:, None], datos[posiciones], 0).astype(np.uint8)
+            categorias, codigos = np.unique(fijos.view(f"S{ancho}").ravel(), return_inverse=True)
+            return (codigos.astype(np.int32),
+                    np.array([categoria.decode('utf-8') for categoria in categorias], dtype=object))
+
+    valores = {}
+    codigos = np.fromiter((valores.setdefault(valor, len(valores)) for valor in columna),
+                          dtype=np.int32, count=len(columna))
+    return codigos, np.array(list(valores), dtype=object)
+
+
+def agrupar(codigos: np.ndarray, valores: np.ndarray = None, agregacion: str = "conteo",
+            grupos: int = None) -> np.ndarray:
+    """
+    Agrega `valores` por grupo de forma vectorizada.
+
+    Args:
+        codigos (np.ndarray): Grupo de cada fila (enteros en [0, grupos))
+        valores (np.ndarray): Valor de cada fila (no hace falta para "conteo")
+        agregacion (str): Una de AGREGACIONES
+        grupos (int): Número de grupos (por defecto, el mayor código + 1)
+
+    Returns:
+        np.ndarray: Resultado por grupo; los grupos vacíos quedan en 0 (conteo y
+            suma) o NaN (promedio, mínimo y máximo)
+
+    Raises:
+        ValueError: Si la agregación no existe
+    """
+    if agregacion not in AGREGACIONES:
+        raise ValueError(f"Agregación desconocida: {agregacion}. Opciones: {', '.join(AGREGACIONES)}.")
+    if grupos is None:
+        grupos = int(codigos.max()) + 1 if len(codigos) else 0
+
+    conteo = np.bincount(codigos, minlength=grupos)
+    if agregacion == "conteo":
+        return conteo
+    if agregacion == "suma":
+        return np.bincount(codigos, weights=valores, minlength=grupos)
+    if agregacion == "promedio":
+        suma = np.bincount(codigos, weights=valores, minlength=grupos)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return suma / conteo
+
+    # Mínimo y máximo: ordenar por grupo y reducir cada tramo con reduceat
+    resultado = np.full(grupos, np.nan)
+    if not len(codigos):
+        return resultado
+    orden = np.argsort(codigos, kind="stable")
+    ordenados = codigos[orden]
+    inicios = np.flatnonzero(np.r_[True, ordenados[1:] != ordenados[:-1]])
+    funcion = np.minimum if agregacion == "minimo" else np.maximum
+    resultado[ordenados[inicios]] = funcion.reduceat(valores[orden], inicios)
+    return resultado
+
+
+def top_k(claves: np.ndarray, valores: np.ndarray, k: int = 10) -> list:
+    """
+    Devuelve los `k` pares (clave, valor) con mayor valor, de mayor a menor.
+
+    Usa `argpartition`, así que cuesta O(n) más el ordenamiento de los k elegidos.
+    """
+    k = min(k, len(valores))
+    if k <= 0:
+        return []
+    elegidos = np.argpartition(-valores, k - 1)[:k]
+    elegidos = elegidos[np.argsort(-valores[elegidos], kind="stable")]
+    return list(zip(claves[elegidos].tolist(), valores[elegidos].tolist()))
+
+
+class Analitica:
+    """
+    Consultas agregadas sobre pokémones y participantes.
+
+    Las columnas se cargan al crear el objeto; para ver cambios posteriores en
+    los CSV hay que llamar a `recargar`.
+
+    Attributes:
+        participante_manager (ParticipanteManager): Origen de los participantes
+        pokemon_manager (PokemonManager): Origen de los pokémones
+    """
+
+    def __init__(self, participante_manager, pokemon_manager):
+        """
+        Carga las columnas de ambas tablas.
+
+        Args:
+            participante_manager (ParticipanteManager): Gestor de participantes
+            pokemon_manager (PokemonManager): Gestor de pokémones
+        """
+        self.participante_manager = participante_manager
+        self.pokemon_manager = pokemon_manager
+        self._tablas = []
+        self.recargar()
+
+    def recargar(self) -> None:
+        """Vuelve a cargar las columnas desde las instantáneas (regenerándolas si hace falta)."""
+        self.cerrar()
+        participantes = self.participante_manager.cargar_instantanea()
+        pokemones = self.pokemon_manager.cargar_instantanea()
+        self._tablas = [participantes, pokemones]
+
+        self.id_participante = enteros(participantes.columna("id_participante"))
+        self._ids_ordenados = bool(np.all(self.id_participante[:-1] <= self.id_participante[1:]))
+        self.ciudad, self.ciudades = codificar(participantes.columna("ciudad"))
+        self._nombres = participantes.columna("nombre")
+
+        self.id_entrenador = enteros(pokemones.columna("id_entrenador"))
+        self.nivel = enteros(pokemones.columna("nivel"))
+        self.tipo, self.tipos = codificar(pokemones.columna("tipo"))
+
+    def cerrar(self) -> None:
+        """Libera las instantáneas abiertas."""
+        for tabla in self._tablas:
+            tabla.cerrar()
+        self._tablas = []
+
+    # --------------------------------------------------------------- consultas
+
+    def nivel_promedio_por_tipo(self) -> dict:
+        """
+        Nivel promedio de los pokémones de cada tipo.
+
+        Returns:
+            dict: tipo -> nivel promedio
+        """
+        promedios = agrupar(self.tipo, self.nivel, "promedio", len(self.tipos))
+        return dict(zip(self.tipos.tolist(), promedios.tolist()))
+
+    def participantes_por_ciudad(self) -> dict:
+        """
+        Número de participantes de cada ciudad, de la más a la menos poblada.
+
+        Returns:
+            dict: ciudad -> número de participantes
+        """
+        conteo = agrupar(self.ciudad, agregacion="conteo", grupos=len(self.ciudades))
+        orden = np.argsort(-conteo, kind="stable")
+        return dict(zip(self.ciudades[orden].tolist(), conteo[orden].tolist()))
+
+    def histograma_niveles(self, bordes=(1, 11, 21, 31, 41, 51, 61, 71, 81, 91, 101),
+                           id_entrenador: int = None) -> tuple:
+        """
+        Histograma de niveles por entrenador.
+
+        Los conteos de todos los entrenadores se calculan en una sola pasada
+        combinando (entrenador, intervalo) en un índice y usando `bincount`.
+
+        Args:
+            bordes (sequence): Límites de los intervalos de nivel [b0, b1), [b1, b2)...
+            id_entrenador (int): Si se indica, solo se devuelve la fila de ese entrenador
+
+        Returns:
+            tuple: (IDs de entrenador, bordes, matriz de conteos entrenadores x intervalos);
+                con `id_entrenador`, (bordes, conteos de ese entrenador)
+        """
+        bordes = np.asarray(bordes)
+        intervalos = len(bordes) - 1
+        intervalo = np.searchsorted(bordes, self.nivel, side="right") - 1
+        dentro = (intervalo >= 0) & (intervalo < intervalos)
+
+        if id_entrenador is not None:
+            propios = dentro & (self.id_entrenador == id_entrenador)
+            return bordes, np.bincount(intervalo[propios], minlength=intervalos)
+
+        entrenadores, codigo = np.unique(self.id_entrenador[dentro], return_inverse=True)
+        conteos = np.bincount(codigo * intervalos + intervalo[dentro],
+                              minlength=len(entrenadores) * intervalos)
+        return entrenadores, bordes, conteos.reshape(len(entrenadores), intervalos)
+
+    def top_entrenadores(self, k: int = 10) -> list:
+        """
+        Los `k` entrenadores con mayor nivel sumado en su equipo.
+
+        Returns:
+            list: Tuplas (id_entrenador, nombre, nivel total), de mayor a menor
+        """
+        entrenadores, codigo = np.unique(self.id_entrenador, return_inverse=True)
+        totales = np.bincount(codigo, weights=self.nivel, minlength=len(entrenadores)).astype(np.int64)
+        return [(id_entrenador, self._nombre_participante(id_entrenador), total)
+                for id_entrenador, total in top_k(entrenadores, totales, k)]
+
+    def agrupar_pokemones(self, por: str = "tipo", agregacion: str = "promedio") -> dict:
+        """
+        Agregación genérica del nivel de los pokémones.
+
+        Args:
+            por (str): "tipo" o "id_entrenador"
+            agregacion (str): Una de AGREGACIONES
+
+        Returns:
+            dict: grupo -> resultado
+        """
+        if por == "tipo":
+            claves, codigos = self.tipos, self.tipo
+        elif por == "id_entrenador":
+            claves, codigos = np.unique(self.id_entrenador, return_inverse=True)
+        else:
+            raise ValueError(f"No se puede agrupar por {por}.")
+        resultado = agrupar(codigos, self.nivel, agregacion, len(claves))
+        return dict(zip(claves.tolist(), resultado.tolist()))
+
+    def _nombre_participante(self, id_participante: int):
+        """Nombre del participante con ese ID (búsqueda binaria si los IDs están ordenados)."""
+        if self._ids_ordenados:
+            posicion = int(np.searchsorted(self.id_participante, id_participante))
+        else:
+            coincidencias = np.flatnonzero(self.id_participante == id_participante)
+            posicion = int(coincidencias[0]) if len(coincidencias) else len(self.id_participante)
+        if posicion < len(self.id_participante) and self.id_participante[posicion] == id_participante:
+            return self._nombres[posicion]
+        return None
@@ -0,0 +1,481 @@
+"""
+Módulo Batallas - Simulador de combates por lotes para el Sistema Solrock Battle Association.
+
+Carga los equipos de los entrenadores (`id_entrenador` de `pokemones.csv`) y
+resuelve combates individuales 6 contra 6 a partir del tipo, el nivel y el
+movimiento principal de cada pokémon:
+
+- Cada pokémon tiene estadísticas derivadas de su nivel (misma base para
+  todos, `BASE_ESTADISTICAS`): PS, ataque, defensa y velocidad crecen con él.
+- Su único ataque es el movimiento principal, cuyo tipo y potencia salen de
+  `MOVIMIENTOS` (un movimiento desconocido es del tipo del pokémon, con
+  `POTENCIA_PREDETERMINADA`); si coincide con el tipo del pokémon, hace 1.5x.
+- El daño usa la fórmula clásica con la matriz de efectividad de tipos
+  `EFECTIVIDAD` y un factor aleatorio entre 0.85 y 1; ataca primero el más
+  rápido (a igual velocidad, al azar). Al debilitarse un pokémon entra el
+  siguiente del equipo; gana quien debilita a todo el equipo rival.
+- Si ninguno de los dos pokémones en combate puede dañar al otro o se llega a
+  `TURNOS_MAXIMOS`, gana el equipo con mayor fracción de PS restantes (o
+  empatan). Un equipo vacío pierde sin combatir.
+
+Los combates no se simulan de a uno: `simular` avanza miles a la vez, con el
+daño de cada emparejamiento posible precalculado en arreglos de NumPy y cada
+turno resuelto con operaciones vectorizadas sobre los combates que siguen en
+curso. Los lotes pueden repartirse en un pool de procesos. Con la misma
+semilla, el resultado no depende del número de procesos.
+
+Sobre `simular` se arman temporadas de todos contra todos (`temporada`) y
+llaves de eliminación directa (`llave`).
+
+Requiere NumPy (`pip install numpy`); el resto del sistema no depende de él.
+
+Uso:
+    python Batallas.py temporada [--entrenadores 1,2,3 | --cantidad N] [--vueltas 1]
+                                 [--procesos P] [--semilla S]
+    python Batallas.py llave [--entrenadores ... | --cantidad N] [--procesos P] [--semilla S]
+"""
+
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from Indices import normalizar_texto
+from ParticipanteManager import ParticipanteManager
+from PokemonManager import PokemonManager
+from UnidadDeTrabajo import MAXIMO_EQUIPO
+
+TIPOS = ("Normal", "Fuego", "Agua", "Planta", "Electrico", "Hielo", "Lucha", "Veneno", "Tierra",
+         "Volador", "Psiquico", "Bicho", "Roca", "Fantasma", "Dragon", "Siniestro", "Acero", "Hada")
+# Código de los tipos que no están en TIPOS: no es eficaz ni débil frente a nada
+NEUTRO = len(TIPOS)
+
+# Multiplicadores distintos de 1, por tipo del ataque y tipo del defensor
+_TABLA_TIPOS = {
+    "Normal": {"Roca": .5, "Acero": .5, "Fantasma": 0},
+    "Fuego": {"Fuego": .5, "Agua": .5, "Planta": 2, "Hielo": 2, "Bicho": 2, "Roca": .5, "Dragon": .5,
+              "Acero": 2},
+    "Agua": {"Fuego": 2, "Agua": .5, "Planta": .5, "Tierra": 2, "Roca": 2, "Dragon": .5},
+    "Planta": {"Fuego": .5, "Agua": 2, "Planta": .5, "Veneno": .5, "Tierra": 2, "Volador": .5, "Bicho": .5,
+               "Roca": 2, "Dragon": .5, "Acero": .5},
+    "Electrico": {"Agua": 2, "Planta": .5, "Electrico": .5, "Tierra": 0, "Volador": 2, "Dragon": .5},
+    "Hielo": {"Fuego": .5, "Agua": .5, "Planta": 2, "Hielo": .5, "Tierra": 2, "Volador": 2, "Dragon": 2,
+              "Acero": .5},
+    "Lucha": {"Normal": 2, "Hielo": 2, "Veneno": .5, "Volador": .5, "Psiquico": .5, "Bicho": .5, "Roca": 2,
+              "Fantasma": 0, "Siniestro": 2, "Acero": 2, "Hada": .5},
+    "Veneno": {"Planta": 2, "Veneno": .5, "Tierra": .5, "Roca": .5, "Fantasma": .5, "Acero": 0, "Hada": 2},
+    "Tierra": {"Fuego": 2, "Planta": .5, "Electrico": 2, "Veneno": 2, "Volador": 0, "Bicho": .5, "Roca": 2,
+               "Acero": 2},
+    "Volador": {"Planta": 2, "Electrico": .5, "Lucha": 2, "Bicho": 2, "Roca": .5, "Acero": .5},
+    "Psiquico": {"Lucha": 2, "Veneno": 2, "Psiquico": .5, "Siniestro": 0, "Acero": .5},
+    "Bicho": {"Fuego": .5, "Planta": 2, "Lucha": .5, "Veneno": .5, "Volador": .5, "Psiquico": 2,
+              "Fantasma": .5, "Siniestro": 2, "Acero": .5, "Hada": .5},
+    "Roca": {"Fuego": 2, "Hielo": 2, "Lucha": .5, "Tierra": .5, "Volador": 2, "Bicho": 2, "Acero": .5},
+    "Fantasma": {"Normal": 0, "Psiquico": 2, "Fantasma": 2, "Siniestro": .5},
+    "Dragon": {"Dragon": 2, "Acero": .5, "Hada": 0},
+    "Siniestro": {"Lucha": .5, "Psiquico": 2, "Fantasma": 2, "Siniestro": .5, "Hada": .5},
+    "Acero": {"Fuego": .5, "Agua": .5, "Electrico": .5, "Hielo": 2, "Roca": 2, "Acero": .5, "Hada": 2},
+    "Hada": {"Fuego": .5, "Lucha": 2, "Veneno": .5, "Dragon": 2, "Siniestro": 2, "Acero": .5},
+}
+
+# EFECTIVIDAD[tipo del ataque, tipo del defensor], con una fila y una columna más para NEUTRO
+EFECTIVIDAD = np.ones((NEUTRO + 1, NEUTRO + 1), dtype=np.float32)
+for _atacante, _multiplicadores in _TABLA_TIPOS.items():
+    for _defensor, _multiplicador in _multiplicadores.items():
+        EFECTIVIDAD[TIPOS.index(_atacante), TIPOS.index(_defensor)] = _multiplicador
+
+# Movimiento (normalizado) -> (tipo, potencia); potencia 0 = no hace daño
+MOVIMIENTOS = {
+    "placaje": ("Normal", 40), "ataque rapido": ("Normal", 40), "golpe cuerpo": ("Normal", 85),
+    "hiperrayo": ("Normal", 150), "ascuas": ("Fuego", 40), "lanzallamas": ("Fuego", 90),
+    "llamarada": ("Fuego", 110), "pistola agua": ("Agua", 40), "surf": ("Agua", 90),
+    "hidrobomba": ("Agua", 110), "latigo cepa": ("Planta", 45), "hoja afilada": ("Planta", 55),
+    "rayo solar": ("Planta", 120), "impactrueno": ("Electrico", 40), "rayo": ("Electrico", 90),
+    "trueno": ("Electrico", 110), "rayo hielo": ("Hielo", 90), "ventisca": ("Hielo", 110),
+    "golpe karate": ("Lucha", 50), "a bocajarro": ("Lucha", 120), "picotazo veneno": ("Veneno", 15),
+    "bomba lodo": ("Veneno", 90), "excavar": ("Tierra", 80), "terremoto": ("Tierra", 100),
+    "tornado": ("Volador", 40), "ataque ala": ("Volador", 60), "pico taladro": ("Volador", 80),
+    "confusion": ("Psiquico", 50), "psiquico": ("Psiquico", 90), "teletransporte": ("Psiquico", 0),
+    "picadura": ("Bicho", 60), "tijera x": ("Bicho", 80), "lanzarrocas": ("Roca", 50),
+    "avalancha": ("Roca", 75), "roca afilada": ("Roca", 100), "lenguetazo": ("Fantasma", 30),
+    "bola sombra": ("Fantasma", 80), "garra dragon": ("Dragon", 80), "pulso dragon": ("Dragon", 85),
+    "mordisco": ("Siniestro", 60), "triturar": ("Siniestro", 80), "foco resplandor": ("Acero", 80),
+    "cola ferrea": ("Acero", 100), "beso drenaje": ("Hada", 50), "brillo magico": ("Hada", 80),
+    "fuerza lunar": ("Hada", 95),
+}
+POTENCIA_PREDETERMINADA = 60
+# Estadística base común; las estadísticas solo dependen del nivel
+BASE_ESTADISTICAS = 80
+TURNOS_MAXIMOS = 500
+# Resultados de `simular`
+GANA_LOCAL, GANA_VISITANTE, EMPATE = 0, 1, -1
+
+_CODIGOS_TIPO = {normalizar_texto(tipo): codigo for codigo, tipo in enumerate(TIPOS)}
+
+
+def codigo_tipo(tipo: str) -> int:
+    """Código de un tipo en `TIPOS` (sin distinguir mayúsculas ni acentos), o NEUTRO si no existe."""
+    return _CODIGOS_TIPO.get(normalizar_texto(tipo), NEUTRO)
+
+
+def movimiento(nombre: str, tipo_pokemon: str) -> tuple:
+    """
+    Tipo y potencia del movimiento principal de un pokémon.
+
+    Returns:
+        tuple: (código de tipo, potencia); un movimiento desconocido es del tipo
+            del pokémon con `POTENCIA_PREDETERMINADA`
+    """
+    tipo, potencia = MOVIMIENTOS.get(normalizar_texto(nombre), (tipo_pokemon, POTENCIA_PREDETERMINADA))
+    return codigo_tipo(tipo), potencia
+
+
+class Equipos:
+    """
+    Equipos de varios entrenadores codificados en arreglos de forma
+    (equipos, MAXIMO_EQUIPO), en orden de salida al combate. Las posiciones
+    vacías de un equipo con menos pokémones tienen nivel 0.
+
+    Attributes:
+        ids_entrenador (np.ndarray): ID del entrenador de cada equipo
+        tamano (np.ndarray): Pokémones de cada equipo
+        nivel (np.ndarray): Nivel de cada pokémon
+        tipo (np.ndarray): Código de tipo de cada pokémon
+        tipo_movimiento (np.ndarray): Código de tipo de su movimiento principal
+        potencia (np.ndarray): Potencia de su movimiento principal
+    """
+
+    def __init__(self, ids_entrenador, tamano, nivel, tipo, tipo_movimiento, potencia):
+        self.ids_entrenador = np.asarray(ids_entrenador, dtype=np.int64)
+        self.tamano = np.asarray(tamano, dtype=np.int8)
+        self.nivel = np.asarray(nivel, dtype=np.int16)
+        self.tipo = np.asarray(tipo, dtype=np.int8)
+        self.tipo_movimiento = np.asarray(tipo_movimiento, dtype=np.int8)
+        self.potencia = np.asarray(potencia, dtype=np.int16)
+
+    @classmethod
+    def desde_registros(cls, equipos: dict) -> "Equipos":
+        """
+        Codifica equipos a partir de sus pokémones.
+
+        Si un entrenador tiene más de MAXIMO_EQUIPO pokémones, combaten los de
+        mayor nivel. El equipo sale en orden de nivel descendente (a igual
+        nivel, por ID).
+
+        Args:
+            equipos (dict): ID de entrenador -> lista de registros `Pokemon` (o
+                filas con los campos de `pokemones.csv`)
+
+        Returns:
+            Equipos: Un equipo por entrada, en el orden del diccionario
+        """
+        total = len(equipos)
+        tamano = np.zeros(total, dtype=np.int8)
+        columnas = [np.zeros((total, MAXIMO_EQUIPO), dtype=tipo)
+                    for tipo in (np.int16, np.int8, np.int8, np.int16)]
+        nivel, tipo, tipo_movimiento, potencia = columnas
+        for fila, pokemones in enumerate(equipos.values()):
+            elegidos = sorted(pokemones, key=lambda pokemon: (-int(pokemon[4]), int(pokemon[0])))[:MAXIMO_EQUIPO]
+            tamano[fila] = len(elegidos)
+            for posicion, pokemon in enumerate(elegidos):
+                nivel[fila, posicion] = int(pokemon[4])
+                tipo[fila, posicion] = codigo_tipo(pokemon[3])
+                tipo_movimiento[fila, posicion], potencia[fila, posicion] = movimiento(pokemon[5], pokemon[3])
+        return cls(list(equipos), tamano, nivel, tipo, tipo_movimiento, potencia)
+
+    def __len__(self) -> int:
+        return len(self.ids_entrenador)
+
+    def subconjunto(self, posiciones) -> "Equipos":
+        """Devuelve los equipos en `posiciones` (índices, rebanada o máscara)."""
+        return Equipos(self.ids_entrenador[posiciones], *self.seleccionar(posiciones))
+
+    def seleccionar(self, posiciones) -> tuple:
+        """Columnas de los equipos en `posiciones`, en el orden que espera `_simular_lote`."""
+        return (self.tamano[posiciones], self.nivel[posiciones], self.tipo[posiciones],
+                self.tipo_movimiento[posiciones], self.potencia[posiciones])
+
+
+def cargar_equipos(pokemon_manager, ids_entrenador=None) -> Equipos:
+    """
+    Carga los equipos de los entrenadores desde el manager de pokémones.
+
+    Args:
+        pokemon_manager (PokemonManager): Manager de pokémones
+        ids_entrenador (iterable): Entrenadores a cargar, en ese orden (un
+            entrenador sin pokémones queda con el equipo vacío); None carga a
+            todos los que tienen al menos un pokémon, en orden de ID
+
+    Returns:
+        Equipos: Equipos codificados
+    """
+    if ids_entrenador is not None:
+        return Equipos.desde_registros({int(id_entrenador): pokemon_manager.buscar_por("id_entrenador", id_entrenador)
+                                        for id_entrenador in ids_entrenador})
+    equipos = {}
+    for pokemon in pokemon_manager.iterar(tamano_bloque=5000):
+        equipos.setdefault(int(pokemon[1]), []).append(pokemon)
+    return Equipos.desde_registros(dict(sorted(equipos.items())))
+
+
+def _estadistica(nivel: np.ndarray) -> np.ndarray:
+    """Ataque, defensa y velocidad para un nivel."""
+    return (2 * BASE_ESTADISTICAS * nivel.astype(np.int32)) // 100 + 5
+
+
+def _danos_base(nivel_atacante, tipo_movimiento, potencia, tipo_atacante, nivel_defensor, tipo_defensor):
+    """
+    Daño base (antes del factor aleatorio) de cada pokémon de un equipo contra
+    cada pokémon del equipo rival.
+
+    Returns:
+        np.ndarray: Arreglo (combates, MAXIMO_EQUIPO, MAXIMO_EQUIPO) indexado
+            por [combate, atacante, defensor]
+    """
+    ataque = _estadistica(nivel_atacante).astype(np.float32)
+    defensa = _estadistica(nivel_defensor).astype(np.float32)
+    poder = (2 * nivel_atacante.astype(np.float32) / 5 + 2) * potencia * ataque
+    dano = (poder[:, :, None] / defensa[:, None, :]) / 50 + 2
+    mismo_tipo = np.where((tipo_movimiento == tipo_atacante) & (tipo_atacante != NEUTRO), 1.5, 1.0)
+    dano *= mismo_tipo[:, :, None].astype(np.float32)
+    dano *= EFECTIVIDAD[tipo_movimiento[:, :, None], tipo_defensor[:, None, :]]
+    dano[np.broadcast_to(potencia[:, :, None] == 0, dano.shape)] = 0
+    return dano
+
+
+def _simular_lote(local: tuple, visitante: tuple, semilla) -> tuple:
+    """
+    Simula un lote de combates, todos a la vez.
+
+    Args:
+        local (tuple): Columnas de los equipos locales (`Equipos.seleccionar`)
+        visitante (tuple): Columnas de los equipos visitantes
+        semilla: Semilla (o `np.random.SeedSequence`) del lote
+
+    Returns:
+        tuple: (resultado, turnos), arreglos de un elemento por combate
+    """
+    azar = np.random.default_rng(semilla)
+    tamano_a, nivel_a, tipo_a, movimiento_a, potencia_a = local
+    tamano_b, nivel_b, tipo_b, movimiento_b, potencia_b = visitante
+    combates = len(tamano_a)
+    danos_ab = _danos_base(nivel_a, movimiento_a, potencia_a, tipo_a, nivel_b, tipo_b)
+    danos_ba = _danos_base(nivel_b, movimiento_b, potencia_b, tipo_b, nivel_a, tipo_a)
+    ps_maximos_a = (2 * BASE_ESTADISTICAS * nivel_a.astype(np.int32)) // 100 + nivel_a + 10
+    ps_maximos_b = (2 * BASE_ESTADISTICAS * nivel_b.astype(np.int32)) // 100 + nivel_b + 10
+    ps_maximos_a[nivel_a == 0] = 0
+    ps_maximos_b[nivel_b == 0] = 0
+    ps_a, ps_b = ps_maximos_a.copy(), ps_maximos_b.copy()
+    velocidad_a, velocidad_b = _estadistica(nivel_a), _estadistica(nivel_b)
+
+    activo_a = np.zeros(combates, dtype=np.int64)
+    activo_b = np.zeros(combates, dtype=np.int64)
+    turnos = np.zeros(combates, dtype=np.int32)
+    resultado = np.full(combates, EMPATE, dtype=np.int8)
+    por_ps = np.zeros(combates, dtype=bool)
+
+    # Índices de los combates que siguen en curso; cada turno se resuelve para todos ellos
+    vivos = np.flatnonzero((tamano_a > 0) & (tamano_b > 0))
+    for turno in range(1, TURNOS_MAXIMOS + 1):
+        if not len(vivos):
+            break
+        a, b = activo_a[vivos], activo_b[vivos]
+        base_ab, base_ba = danos_ab[vivos, a, b], danos_ba[vivos, b, a]
+        estancados = (base_ab == 0) & (base_ba == 0)
+        aleatorio = azar.uniform(0.85, 1.0, (2, len(vivos))).astype(np.float32)
+        dano_ab = np.where(base_ab > 0, np.maximum(np.floor(base_ab * aleatorio[0]), 1), 0).astype(np.int32)
+        dano_ba = np.where(base_ba > 0, np.maximum(np.floor(base_ba * aleatorio[1]), 1), 0).astype(np.int32)
+        rapido_a, rapido_b = velocidad_a[vivos, a], velocidad_b[vivos, b]
+        primero_a = (rapido_a > rapido_b) | ((rapido_a == rapido_b) & (azar.random(len(vivos)) < 0.5))
+
+        # El segundo en atacar solo ataca si el primero no lo debilitó
+        antes_a, antes_b = ps_a[vivos, a], ps_b[vivos, b]
+        nuevos_b = np.where(primero_a | (antes_a - dano_ba > 0), antes_b - dano_ab, antes_b)
+        nuevos_a = np.where(~primero_a | (nuevos_b > 0), antes_a - dano_ba, antes_a)
+        ps_a[vivos, a], ps_b[vivos, b] = nuevos_a, nuevos_b
+        activo_a[vivos] += nuevos_a <= 0
+        activo_b[vivos] += nuevos_b <= 0
+        turnos[vivos] = turno
+
+        sin_a, sin_b = activo_a[vivos] >= tamano_a[vivos], activo_b[vivos] >= tamano_b[vivos]
+        resultado[vivos[sin_b]] = GANA_LOCAL
+        resultado[vivos[sin_a]] = GANA_VISITANTE
+        por_ps[vivos[estancados & ~sin_a & ~sin_b]] = True
+        vivos = vivos[~(sin_a | sin_b | estancados)]
+    por_ps[vivos] = True
+
+    # Sin ganador en combate: decide la fracción de PS restantes de cada equipo
+    fraccion_a = np.maximum(ps_a, 0).sum(axis=1) / np.maximum(ps_maximos_a.sum(axis=1), 1)
+    fraccion_b = np.maximum(ps_b, 0).sum(axis=1) / np.maximum(ps_maximos_b.sum(axis=1), 1)
+    resultado[por_ps] = np.select([fraccion_a[por_ps] > fraccion_b[por_ps], fraccion_a[por_ps] < fraccion_b[por_ps]],
+                                  [GANA_LOCAL, GANA_VISITANTE], EMPATE)
+    # Un equipo vacío pierde sin combatir (y dos vacíos empatan)
+    resultado[(tamano_a == 0) & (tamano_b > 0)] = GANA_VISITANTE
+    resultado[(tamano_a > 0) & (tamano_b == 0)] = GANA_LOCAL
+    return resultado, turnos
+
+
+def _simular_bloque(argumentos: tuple) -> tuple:
+    """Adaptador de `_simular_lote` para `ProcessPoolExecutor.map`."""
+    return _simular_lote(*argumentos)
+
+
+def simular(equipos: Equipos, pares, semilla: int = None, procesos: int = 1,
+            tamano_lote: int = 16384) -> tuple:
+    """
+    Simula en lote los combates entre los pares de equipos indicados.
+
+    Los combates se resuelven en lotes de `tamano_lote`, cada uno con una
+    semilla derivada de `semilla`; con `procesos` > 1 los lotes se reparten en
+    un pool de procesos. Para una misma semilla y tamaño de lote, el resultado
+    es el mismo con cualquier número de procesos.
+
+    Args:
+        equipos (Equipos): Equipos que combaten
+        pares: Arreglo (combates, 2) de posiciones en `equipos`: (local, visitante)
+        semilla (int): Semilla del generador aleatorio (None = no reproducible)
+        procesos (int): Procesos del pool (1 = en este proceso)
+        tamano_lote (int): Combates simulados a la vez
+
+    Returns:
+        tuple: (resultado, turnos): por combate, GANA_LOCAL, GANA_VISITANTE o
+            EMPATE, y los turnos que duró
+
+    Raises:
+        ValueError: Si `pares` no puede verse como (combates, 2) o `tamano_lote` < 1
+    """
+    pares = np.asarray(pares, dtype=np.int64).reshape(-1, 2)
+    if tamano_lote < 1:
+        raise ValueError("El tamaño de lote debe ser al menos 1.")
+    inicios = range(0, len(pares), tamano_lote)
+    semillas = np.random.SeedSequence(semilla).spawn(len(inicios))
+    lotes = [(equipos.seleccionar(pares[inicio:inicio + tamano_lote, 0]),
+              equipos.seleccionar(pares[inicio:inicio + tamano_lote, 1]), semilla_lote)
+             for inicio, semilla_lote in zip(inicios, semillas)]
+
+    if procesos > 1 and len(lotes) > 1:
+        with ProcessPoolExecutor(min(procesos, len(lotes))) as pool:
+            resultados = list(pool.map(_simular_bloque, lotes))
+    else:
+        resultados = [_simular_lote(*lote) for lote in lotes]
+    if not resultados:
+        return np.empty(0, dtype=np.int8), np.empty(0, dtype=np.int32)
+    return (np.concatenate([resultado for resultado, _ in resultados]),
+            np.concatenate([turnos for _, turnos in resultados]))
+
+
+def temporada(equipos: Equipos, vueltas: int = 1, semilla: int = None, procesos: int = 1) -> list:
+    """
+    Simula una temporada de todos contra todos y devuelve la tabla de posiciones.
+
+    Cada par de equipos combate `vueltas` veces, alternando el local. Una
+    victoria vale 3 puntos y un empate 1.
+
+    Args:
+        equipos (Equipos): Equipos participantes
+        vueltas (int): Veces que se enfrenta cada par (al menos 1)
+        semilla (int): Semilla de la simulación
+        procesos (int): Procesos del pool (ver `simular`)
+
+    Returns:
+        list: Diccionarios con id_entrenador, jugados, victorias, empates,
+            derrotas y puntos, ordenados por puntos, victorias y ID
+    """
+    total = len(equipos)
+    locales, visitantes = np.triu_indices(total, k=1)
+    ida = np.column_stack([locales, visitantes])
+    pares = np.concatenate([ida if vuelta % 2 == 0 else ida[:, ::-1] for vuelta in range(vueltas)])
+    resultado, _ = simular(equipos, pares, semilla, procesos)
+
+    victorias = (np.bincount(pares[resultado == GANA_LOCAL, 0], minlength=total)
+                 + np.bincount(pares[resultado == GANA_VISITANTE, 1], minlength=total))
+    empates = np.bincount(pares[resultado == EMPATE].ravel(), minlength=total)
+    jugados = np.full(total, (total - 1) * vueltas)
+    puntos = 3 * victorias + empates
+    orden = np.lexsort((equipos.ids_entrenador, -victorias, -puntos))
+    return [{"id_entrenador": int(equipos.ids_entrenador[i]), "jugados": int(jugados[i]),
+             "victorias": int(victorias[i]), "empates": int(empates[i]),
+             "derrotas": int(jugados[i] - victorias[i] - empates[i]), "puntos": int(puntos[i])}
+            for i in orden]
+
+
+def llave(equipos: Equipos, semilla: int = None, procesos: int = 1) -> dict:
+    """
+    Simula una llave de eliminación directa, una ronda por lote.
+
+    Los equipos se siembran en el orden de `equipos`: si su número no es una
+    potencia de 2, los primeros pasan la primera ronda sin combatir, y el
+    resto se enfrenta el primero contra el último. En cada ronda siguiente
+    combaten los ganadores en orden, de a pares. Un empate lo gana el equipo
+    con mayor nivel total (y, si persiste, el de menor ID de entrenador).
+
+    Returns:
+        dict: "rondas" (lista de rondas, cada una con ternas (id local,
+            id visitante, id ganador)) y "campeon" (ID, o None sin equipos)
+    """
+    if not len(equipos):
+        return {"rondas": [], "campeon": None}
+    # Orden de desempate: mayor nivel total y, después, menor ID de entrenador
+    preferencia = list(zip(equipos.nivel.sum(axis=1).tolist(), (-equipos.ids_entrenador).tolist()))
+    plazas = 1 << (len(equipos) - 1).bit_length()
+    exentos = plazas - len(equipos)
+    combatientes = list(range(exentos, len(equipos)))
+    mitad = len(combatientes) // 2
+    pares = [(combatientes[i], combatientes[-1 - i]) for i in range(mitad)]
+    pasan = list(range(exentos))
+
+    rondas = []
+    semillas = np.random.SeedSequence(semilla).spawn(max(plazas.bit_length() - 1, 1))
+    for semilla_ronda in semillas:
+        if not pares:
+            break
+        resultado, _ = simular(equipos, pares, semilla_ronda.generate_state(1)[0], procesos)
+        ganadores = []
+        for (local, visitante), gana in zip(pares, resultado):
+            if gana == EMPATE:
+                gana = GANA_LOCAL if preferencia[local] > preferencia[visitante] else GANA_VISITANTE
+            ganadores.append(local if gana == GANA_LOCAL else visitante)
+        rondas.append([(int(equipos.ids_entrenador[local]), int(equipos.ids_entrenador[visitante]),
+                        int(equipos.ids_entrenador[ganador])) for (local, visitante), ganador in zip(pares, ganadores)])
+        siguientes = pasan + ganadores
+        pasan = []
+        pares = [(siguientes[i], siguientes[i + 1]) for i in range(0, len(siguientes) - 1, 2)]
+        if len(siguientes) == 1:
+            return {"rondas": rondas, "campeon": int(equipos.ids_entrenador[siguientes[0]])}
+    return {"rondas": rondas, "campeon": int(equipos.ids_entrenador[(pasan or [0])[0]])}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("modo", choices=("temporada", "llave"))
+    parser.add_argument("--entrenadores", help="IDs de entrenador separados por comas")
+    parser.add_argument("--cantidad", type=int, help="los primeros N entrenadores con pokémones")
+    parser.add_argument("--vueltas", type=int, default=1, help="vueltas de la temporada")
+    parser.add_argument("--procesos", type=int, default=1, help="procesos del pool (0 = uno por CPU)")
+    parser.add_argument("--semilla", type=int)
+    parser.add_argument("--directorio", default=".", help="directorio de los datos")
+    args = parser.parse_args()
+
+    os.chdir(args.directorio)
+    pokemon_manager = PokemonManager(ParticipanteManager())
+    ids = [int(valor) for valor in args.entrenadores.split(",")] if args.entrenadores else None
+    equipos = cargar_equipos(pokemon_manager, ids)
+    if args.cantidad is not None:
+        equipos = equipos.subconjunto(slice(args.cantidad))
+    procesos = args.procesos or os.cpu_count()
+
+    if args.modo == "temporada":
+        print(f"{'#':>4} {'Entrenador':>10} {'PJ':>5} {'G':>5} {'E':>5} {'P':>5} {'Pts':>6}")
+        for posicion, fila in enumerate(temporada(equipos, args.vueltas, args.semilla, procesos), start=1):
+            print(f"{posicion:>4} {fila['id_entrenador']:>10} {fila['jugados']:>5} {fila['victorias']:>5}"
+                  f" {fila['empates']:>5} {fila['derrotas']:>5} {fila['puntos']:>6}")
+    else:
+        resultado = llave(equipos, args.semilla, procesos)
+        for numero, ronda in enumerate(resultado["rondas"], start=1):
+            print(f"Ronda {numero}:")
+            for local, visitante, ganador in ronda:
+                print(f"  {local} vs {visitante} -> {ganador}")
+        print(f"Campeón: {resultado['campeon']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,379 @@
+"""
+Módulo Bitacora - Registro de escritura anticipada (WAL) del Sistema Solrock Battle Association.
+
+Todas las escrituras de los almacenes CSV de un mismo directorio pasan primero
+por una bitácora compartida (`bitacora.wal`). Hacer fsync de la bitácora, que
+es pequeña y secuencial, basta para que un cambio sea durable; los CSV se
+sincronizan solo en los puntos de control. Varias mutaciones pueden confirmarse
+con un único fsync (confirmación en grupo).
+
+La bitácora puede compartirse entre procesos: los escritores la usan con un
+cerrojo compartido y el punto de control, que la vacía, con uno exclusivo.
+"""
+
+import atexit
+import os
+import struct
+import threading
+import warnings
+import zlib
+from contextlib import contextmanager
+from CerrojoArchivo import CerrojoArchivo
+
+
+def sincronizar_directorio(ruta: str) -> None:
+    """
+    Hace fsync del directorio que contiene `ruta` para que un `os.replace` sea durable.
+
+    En sistemas donde no se puede abrir un directorio (Windows) no hace nada.
+    """
+    try:
+        descriptor = os.open(os.path.dirname(os.path.abspath(ruta)), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(descriptor)
+    except OSError:
+        pass
+    finally:
+        os.close(descriptor)
+
+
+class Bitacora:
+    """
+    Bitácora de escritura anticipada compartida por los almacenes de un directorio.
+
+    Cada registro guarda el nombre de la tabla (archivo CSV), el desplazamiento
+    donde se anexaron los datos y los bytes anexados, protegido con un CRC32.
+    Tras una caída, `recuperar` compara cada registro con el CSV, reescribe lo
+    que falte y descarta las filas a medio escribir que nunca se confirmaron.
+    Un registro con desplazamiento -1 es una barrera: indica que la tabla fue
+    compactada (o recuperada) y que sus registros anteriores ya no aplican.
+
+    Las escrituras en varias tablas que deben sobrevivir juntas a una caída se
+    encierran entre un registro de inicio (-2), con el tamaño de cada CSV al
+    empezar, y uno de fin (-3); ambos llevan el nombre de tabla vacío. Si
+    `recuperar` encuentra el inicio sin su fin, devuelve la tabla a ese tamaño.
+
+    Attributes:
+        ruta (str): Ruta del archivo de la bitácora
+        limite_bytes (int): Tamaño a partir del cual se hace un punto de control
+    """
+
+    # Cabecera de cada registro: longitud de datos, CRC32, desplazamiento y longitud del nombre
+    CABECERA = struct.Struct("<IIqH")
+    BARRERA = -1
+    INICIO = -2
+    FIN = -3
+    NOMBRE_ARCHIVO = "bitacora.wal"
+
+    _instancias = {}
+    _cerrojo_instancias = threading.Lock()
+
+    @classmethod
+    def para(cls, archivo: str) -> "Bitacora":
+        """
+        Devuelve la bitácora del directorio donde está `archivo` (una por directorio y proceso).
+
+        Args:
+            archivo (str): Ruta de un archivo CSV del directorio
+
+        Returns:
+            Bitacora: Instancia compartida
+        """
+        ruta = os.path.join(os.path.dirname(os.path.abspath(archivo)), cls.NOMBRE_ARCHIVO)
+        with cls._cerrojo_instancias:
+            if ruta not in cls._instancias:
+                cls._instancias[ruta] = cls(ruta)
+            return cls._instancias[ruta]
+
+    def __init__(self, ruta: str, limite_bytes: int = 8 * 1024 * 1024):
+        """
+        Abre (o crea) la bitácora.
+
+        Args:
+            ruta (str): Ruta del archivo de la bitácora
+            limite_bytes (int): Tamaño a partir del cual se hace un punto de control
+        """
+        self.ruta = ruta
+        self.limite_bytes = limite_bytes
+        self._archivo = open(ruta, 'ab', buffering=0)
+        self._cerrojo = threading.RLock()
+        self._cerrojo_archivo = CerrojoArchivo(ruta + ".lock")
+        self._cerrojo_sincronizacion = threading.Lock()
+        self._local = threading.local()
+        self._lsn_escrito = 0
+        self._lsn_sincronizado = 0
+        self._transacciones = 0
+        self._almacenes = {}
+        atexit.register(self.punto_de_control)
+
+    def registrar_almacen(self, almacen) -> None:
+        """Incluye un almacén en los puntos de control de esta bitácora."""
+        with self._cerrojo:
+            self._almacenes[os.path.basename(almacen.archivo)] = almacen
+
+    # ---------------------------------------------------------------- escritura
+
+    def escritura(self):
+        """
+        Cerrojo compartido que debe cubrir `registrar` y la escritura del CSV.
+
+        Impide que un punto de control (de este u otro proceso) vacíe la bitácora
+        entre el registro y la escritura que describe.
+        """
+        return self._cerrojo_archivo.compartido()
+
+    def registrar(self, tabla: str, posicion: int, datos: bytes) -> int:
+        """
+        Anexa un registro a la bitácora (sin fsync).
+
+        El registro llega al sistema operativo antes de que el llamador escriba el
+        CSV, así que una interrupción del proceso nunca pierde datos; para que
+        sobreviva a una caída del sistema hay que llamar a `sincronizar`. El
+        llamador debe estar dentro de `escritura()`.
+
+        Args:
+            tabla (str): Nombre del archivo CSV (sin directorio)
+            posicion (int): Desplazamiento donde se anexan los datos, o BARRERA
+            datos (bytes): Bytes anexados al CSV
+
+        Returns:
+            int: Número de secuencia del registro (LSN)
+        """
+        nombre = tabla.encode('utf-8')
+        crc = zlib.crc32(struct.pack("<q", posicion) + nombre + datos)
+        with self._cerrojo:
+            self._archivo.write(self.CABECERA.pack(len(datos), crc, posicion, len(nombre)) + nombre + datos)
+            self._lsn_escrito += 1
+            return self._lsn_escrito
+
+    def sincronizar(self, lsn: int = None) -> None:
+        """
+        Hace durable la bitácora hasta `lsn` (o hasta el último registro).
+
+        Si otro hilo ya sincronizó ese registro mientras se esperaba, no se repite
+        el fsync: así varios escritores concurrentes comparten una sola sincronización.
+        """
+        with self._cerrojo_sincronizacion:
+            with self._cerrojo:
+                if self._lsn_sincronizado >= (self._lsn_escrito if lsn is None else lsn):
+                    return
+                objetivo = self._lsn_escrito
+            os.fsync(self._archivo.fileno())
+            self._lsn_sincronizado = max(self._lsn_sincronizado, objetivo)
+
+        if os.fstat(self._archivo.fileno()).st_size > self.limite_bytes:
+            self.punto_de_control()
+
+    def en_grupo(self) -> bool:
+        """Indica si el hilo actual está dentro de un bloque `grupo()`."""
+        return getattr(self._local, "profundidad", 0) > 0
+
+    @contextmanager
+    def grupo(self):
+        """
+        Agrupa varias mutaciones del hilo actual en una sola confirmación.
+
+        Dentro del bloque las escrituras no hacen fsync; al salir del bloque más
+        externo se hace un único fsync de la bitácora.
+        """
+        self._local.profundidad = getattr(self._local, "profundidad", 0) + 1
+        try:
+            yield self
+        finally:
+            self._local.profundidad -= 1
+            if self._local.profundidad == 0:
+                self.sincronizar()
+
+    def en_transaccion(self) -> bool:
+        """Indica si el hilo actual está dentro de un bloque `transaccion()`."""
+        return getattr(self._local, "transacciones", 0) > 0
+
+    @contextmanager
+    def transaccion(self, archivos):
+        """
+        Hace que las escrituras del bloque en `archivos` sobrevivan a una caída
+        todas juntas o ninguna.
+
+        El llamador debe tener bloqueadas las tablas durante todo el bloque, así
+        que lo que se anexe a ellas desde el registro de inicio es de esta
+        transacción. El cerrojo compartido de la bitácora se mantiene hasta el
+        registro de fin para que ningún punto de control la vacíe en medio. El
+        fin se registra aunque el bloque termine con una excepción: el
+        llamador ya devolvió las tablas a un estado válido.
+
+        Args:
+            archivos (list): Rutas de los CSV que se escriben en el bloque
+        """
+        with self.escritura():
+            with self._cerrojo:
+                self._transacciones += 1
+                identificador = f"{os.getpid()}.{self._transacciones}"
+            tamanos = "".join(f"\n{os.path.basename(archivo)}\t{os.path.getsize(archivo)}"
+                              for archivo in archivos)
+            self.registrar("", self.INICIO, (identificador + tamanos).encode('utf-8'))
+            self._local.transacciones = getattr(self._local, "transacciones", 0) + 1
+            try:
+                yield self
+            finally:
+                self._local.transacciones -= 1
+                self.registrar("", self.FIN, identificador.encode('utf-8'))
+
+    def punto_de_control(self) -> bool:
+        """
+        Sincroniza los CSV que aparecen en la bitácora y la vacía.
+
+        Necesita el cerrojo exclusivo de la bitácora para que ninguna escritura
+        (de ningún proceso) quede a medias; si está ocupado, se desiste y se
+        reintenta en la siguiente sincronización.
+
+        Returns:
+            bool: True si se completó el punto de control
+        """
+        if not self._cerrojo_archivo.adquirir(exclusivo=True, bloquear=False):
+            return False
+        try:
+            with self._cerrojo:
+                directorio = os.path.dirname(self.ruta)
+                tablas = {nombre for nombre, _, _ in self.leer() if nombre}
+                for tabla in sorted(tablas | set(self._almacenes)):
+                    if tabla in self._almacenes:
+                        self._almacenes[tabla].sincronizar()
+                    elif os.path.exists(os.path.join(directorio, tabla)):
+                        # Tabla que este proceso nunca abrió (por ejemplo, tras una caída)
+                        self.recuperar(os.path.join(directorio, tabla))
+                self._archivo.truncate(0)
+                os.fsync(self._archivo.fileno())
+                self._lsn_sincronizado = self._lsn_escrito
+            return True
+        except (OSError, ValueError):
+            return False
+        finally:
+            self._cerrojo_archivo.liberar()
+
+    # ---------------------------------------------------------------- recuperación
+
+    def leer(self):
+        """
+        Genera los registros válidos de la bitácora como (tabla, posición, datos).
+
+        La lectura se detiene en el primer registro incompleto o con CRC inválido,
+        que corresponde a una escritura interrumpida.
+        """
+        with open(self.ruta, 'rb') as file:
+            contenido = file.read()
+
+        inicio = 0
+        while inicio + self.CABECERA.size <= len(contenido):
+            longitud, crc, posicion, largo_nombre = self.CABECERA.unpack_from(contenido, inicio)
+            cuerpo = inicio + self.CABECERA.size
+            fin = cuerpo + largo_nombre + longitud
+            if fin > len(contenido):
+                return
+            nombre = contenido[cuerpo:cuerpo + largo_nombre]
+            datos = contenido[cuerpo + largo_nombre:fin]
+            if zlib.crc32(struct.pack("<q", posicion) + nombre + datos) != crc:
+                return
+            yield nombre.decode('utf-8'), posicion, datos
+            inicio = fin
+
+    def recuperar(self, archivo: str) -> bool:
+        """
+        Lleva el CSV al último estado confirmado según la bitácora.
+
+        Reescribe los registros que falten o difieran. Si la tabla quedó en
+        medio de una transacción (inicio sin fin), se descarta lo escrito desde
+        que empezó: el CSV vuelve al tamaño anotado en el inicio y una barrera
+        evita que la transacción se deshaga de nuevo sobre escrituras
+        posteriores. Si no, después del último registro solo se trunca una
+        fila incompleta (sin fin de línea), que quedó a medio escribir; las
+        filas completas que la bitácora no cubre (por ejemplo, agregadas al CSV
+        por fuera del sistema) se conservan con un aviso `RuntimeWarning`. El
+        llamador debe tener el cerrojo exclusivo de la tabla.
+
+        Args:
+            archivo (str): Ruta del CSV a recuperar
+
+        Returns:
+            bool: True si el CSV tuvo que modificarse
+        """
+        tabla = os.path.basename(archivo)
+        registros = []
+        # Transacción sin terminar que incluye la tabla: (identificador, tamaño
+        # del CSV al empezar, registros de la tabla anteriores a ella)
+        abierta = None
+        with self.escritura(), self._cerrojo:
+            for nombre, posicion, datos in self.leer():
+                if posicion == self.INICIO:
+                    identificador, *tamanos = datos.decode('utf-8').split("\n")
+                    tamanos = dict(linea.split("\t") for linea in tamanos)
+                    if tabla in tamanos:
+                        abierta = (identificador, int(tamanos[tabla]), len(registros))
+                elif posicion == self.FIN:
+                    if abierta and abierta[0] == datos.decode('utf-8'):
+                        abierta = None
+                elif nombre != tabla:
+                    continue
+                elif posicion == self.BARRERA:
+                    registros = []
+                    abierta = None
+                else:
+                    registros.append((posicion, datos))
+
+        corte = None
+        if abierta is not None:
+            corte = abierta[1]
+            registros = registros[:abierta[2]]
+        elif not registros:
+            return False
+
+        modificado = False
+        with open(archivo, 'r+b') as file:
+            for posicion, datos in registros:
+                file.seek(posicion)
+                if file.read(len(datos)) != datos:
+                    file.seek(posicion)
+                    file.truncate()
+                    file.write(datos)
+                    modificado = True
+            if corte is None:
+                modificado = self._recortar_final(file, tabla, registros) or modificado
+            elif file.seek(0, os.SEEK_END) > corte:
+                warnings.warn(f"{tabla}: se descartan {file.tell() - corte} bytes de una transacción "
+                              f"que no terminó.", RuntimeWarning)
+                file.truncate(corte)
+                modificado = True
+            # Tras descartar una transacción, el CSV debe ser durable antes de
+            # la barrera que lo da por recuperado
+            if modificado or corte is not None:
+                file.flush()
+                os.fsync(file.fileno())
+
+        if corte is not None:
+            with self.escritura(), self._cerrojo:
+                self.registrar(tabla, self.BARRERA, b"")
+        return modificado
+
+    @staticmethod
+    def _recortar_final(file, tabla: str, registros: list) -> bool:
+        """
+        Revisa lo que sigue al último registro: conserva las filas completas y
+        trunca una fila incompleta.
+
+        Returns:
+            bool: True si se truncó el CSV
+        """
+        fin = registros[-1][0] + len(registros[-1][1])
+        file.seek(fin)
+        sobrante = file.read()
+        completo = sobrante.rfind(b"\n") + 1
+        if completo:
+            warnings.warn(f"{tabla}: se conservan {completo} bytes de filas posteriores al último "
+                          f"registro de la bitácora (escritas por fuera de ella).", RuntimeWarning)
+        if completo == len(sobrante):
+            return False
+        warnings.warn(f"{tabla}: se descartan {len(sobrante) - completo} bytes de una fila "
+                      f"incompleta al final del archivo.", RuntimeWarning)
+        file.truncate(fin + completo)
+        return True
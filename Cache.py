@@ -0,0 +1,109 @@
+"""
+Módulo Cache - Caché LRU de consultas para el Sistema Solrock Battle Association.
+
+Guarda resultados de lecturas (un registro por ID, una búsqueda por campo, una
+página de un listado) junto con la versión de la tabla con la que se
+calcularon. Un resultado solo se devuelve si la tabla sigue en esa versión y
+no venció su tiempo de vida, así que nunca se sirve un dato desactualizado
+aunque otro proceso haya escrito en el CSV.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class CacheLRU:
+    """
+    Caché de tamaño fijo que desaloja el elemento usado hace más tiempo.
+
+    Es segura entre hilos. Lleva contadores de aciertos, fallos, desalojos (por
+    falta de espacio) y descartes (por versión vieja o tiempo de vida vencido).
+
+    Attributes:
+        capacidad (int): Número máximo de resultados guardados (0 desactiva la caché)
+        ttl (float): Segundos que vive un resultado (None = sin vencimiento)
+    """
+
+    def __init__(self, capacidad: int = 1024, ttl: float = None):
+        """
+        Args:
+            capacidad (int): Número máximo de resultados guardados (0 desactiva la caché)
+            ttl (float): Segundos que vive un resultado (None = sin vencimiento)
+        """
+        self.capacidad = capacidad
+        self.ttl = ttl
+        self._entradas = OrderedDict()
+        self._cerrojo = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+        self.descartes = 0
+
+    def obtener(self, clave, version: int) -> tuple:
+        """
+        Busca un resultado calculado con la versión indicada de la tabla.
+
+        Args:
+            clave: Identificador hashable de la consulta
+            version (int): Versión actual de la tabla
+
+        Returns:
+            tuple: (True, resultado) si hay un resultado vigente, (False, None) si no
+        """
+        with self._cerrojo:
+            entrada = self._entradas.get(clave)
+            if entrada is not None:
+                version_guardada, vence, resultado = entrada
+                if version_guardada == version and (vence is None or time.monotonic() < vence):
+                    self._entradas.move_to_end(clave)
+                    self.aciertos += 1
+                    return True, resultado
+                del self._entradas[clave]
+                self.descartes += 1
+            self.fallos += 1
+            return False, None
+
+    def guardar(self, clave, version: int, resultado) -> None:
+        """
+        Guarda un resultado calculado con la versión indicada de la tabla.
+
+        Args:
+            clave: Identificador hashable de la consulta
+            version (int): Versión de la tabla leída antes de calcular el resultado
+            resultado: Valor a guardar
+        """
+        if self.capacidad <= 0:
+            return
+        vence = None if self.ttl is None else time.monotonic() + self.ttl
+        with self._cerrojo:
+            self._entradas[clave] = (version, vence, resultado)
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.capacidad:
+                self._entradas.popitem(last=False)
+                self.desalojos += 1
+
+    def vaciar(self) -> None:
+        """Descarta todos los resultados guardados (los contadores se conservan)."""
+        with self._cerrojo:
+            self._entradas.clear()
+
+    def estadisticas(self) -> dict:
+        """
+        Devuelve los contadores de la caché.
+
+        Returns:
+            dict: aciertos, fallos, desalojos, descartes, tamaño, capacidad y
+                proporción de aciertos
+        """
+        with self._cerrojo:
+            consultas = self.aciertos + self.fallos
+            return {
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "desalojos": self.desalojos,
+                "descartes": self.descartes,
+                "tamano": len(self._entradas),
+                "capacidad": self.capacidad,
+                "tasa_aciertos": self.aciertos / consultas if consultas else 0.0,
+            }
@@ -0,0 +1,119 @@
+"""
+Módulo CerrojoArchivo - Cerrojos compartidos/exclusivos entre procesos para el Sistema Solrock Battle Association.
+
+Varias consolas (`main.py`) pueden trabajar sobre el mismo directorio de CSV.
+Este módulo coordina su acceso con `fcntl.flock` sobre un archivo `.lock`
+auxiliar: los lectores toman el cerrojo compartido y no se bloquean entre sí;
+los escritores toman el exclusivo solo mientras anexan.
+"""
+
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: no hay flock, se usa un cerrojo dentro del proceso
+    fcntl = None
+
+
+class CerrojoArchivo:
+    """
+    Cerrojo de lectores/escritores respaldado por `flock` sobre un archivo.
+
+    Cada hilo usa su propio descriptor, así que el cerrojo también coordina a
+    los hilos de un mismo proceso. Es reentrante por hilo: pedir el cerrojo
+    compartido mientras se tiene el exclusivo no hace nada, pero no se puede
+    pasar de compartido a exclusivo (`flock` no lo hace de forma atómica).
+
+    En sistemas sin `fcntl` ambos modos se reducen a un cerrojo exclusivo del
+    proceso.
+
+    Attributes:
+        ruta (str): Ruta del archivo de cerrojo
+    """
+
+    def __init__(self, ruta: str):
+        """
+        Prepara el cerrojo; el archivo se crea la primera vez que se usa.
+
+        Args:
+            ruta (str): Ruta del archivo de cerrojo
+        """
+        self.ruta = ruta
+        self._local = threading.local()
+        self._cerrojo_proceso = threading.RLock()
+
+    def _estado(self):
+        """Devuelve el estado del hilo actual (descriptor, modo y profundidad)."""
+        estado = self._local
+        if not hasattr(estado, "profundidad"):
+            estado.archivo = None
+            estado.exclusivo = False
+            estado.profundidad = 0
+        return estado
+
+    def adquirir(self, exclusivo: bool = False, bloquear: bool = True) -> bool:
+        """
+        Toma el cerrojo en modo compartido o exclusivo.
+
+        Args:
+            exclusivo (bool): True para el modo exclusivo (escritura)
+            bloquear (bool): Si es False, no espera cuando el cerrojo está ocupado
+
+        Returns:
+            bool: True si se obtuvo el cerrojo
+
+        Raises:
+            RuntimeError: Si el hilo tiene el cerrojo compartido y pide el exclusivo
+        """
+        estado = self._estado()
+        if estado.profundidad:
+            if exclusivo and not estado.exclusivo:
+                raise RuntimeError(f"No se puede pasar de cerrojo compartido a exclusivo en {self.ruta}.")
+            estado.profundidad += 1
+            return True
+
+        if fcntl is None:
+            if not self._cerrojo_proceso.acquire(blocking=bloquear):
+                return False
+        else:
+            if estado.archivo is None:
+                estado.archivo = open(self.ruta, 'ab')
+            modo = fcntl.LOCK_EX if exclusivo else fcntl.LOCK_SH
+            try:
+                fcntl.flock(estado.archivo.fileno(), modo if bloquear else modo | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return False
+
+        estado.exclusivo = exclusivo
+        estado.profundidad = 1
+        return True
+
+    def liberar(self) -> None:
+        """Suelta el cerrojo (o un nivel de anidamiento) del hilo actual."""
+        estado = self._estado()
+        estado.profundidad -= 1
+        if estado.profundidad:
+            return
+        if fcntl is None:
+            self._cerrojo_proceso.release()
+        else:
+            fcntl.flock(estado.archivo.fileno(), fcntl.LOCK_UN)
+
+    @contextmanager
+    def compartido(self):
+        """Mantiene el cerrojo en modo compartido durante el bloque `with`."""
+        self.adquirir(exclusivo=False)
+        try:
+            yield self
+        finally:
+            self.liberar()
+
+    @contextmanager
+    def exclusivo(self):
+        """Mantiene el cerrojo en modo exclusivo durante el bloque `with`."""
+        self.adquirir(exclusivo=True)
+        try:
+            yield self
+        finally:
+            self.liberar()
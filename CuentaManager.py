@@ -1,6 +1,9 @@
 import re
-import csv
 from Entidad import Entidad
+from Errores import ErrorValidacion
+from Indices import fecha_ordinal
+from Metricas import instrumentado
+from Registros import Cuenta
 
 class CuentaManager(Entidad):
     """
@@ -15,6 +18,14 @@ class CuentaManager(Entidad):
         participante_manager (ParticipanteManager): Instancia para gestionar participantes
     """
     
+    # Índices secundarios: cuentas de un participante y cuenta por usuario (único)
+    indices_hash = ("id_participante",)
+    indices_unicos = ("usuario",)
+    # Índice ordenado por fecha de creación (como ordinal de la fecha)
+    indices_rango = {"fecha_creacion": fecha_ordinal}
+    # Las lecturas devuelven registros tipados (Cuenta)
+    tipo_registro = Cuenta
+    
     def __init__(self, participante_manager):
         """
         Inicializa el manager de cuentas.
@@ -28,7 +39,63 @@ class CuentaManager(Entidad):
             ["id_cuenta", "id_participante", "usuario", "contrasena", "fecha_creacion"]
         )
         self.participante_manager = participante_manager
+        self.participante_manager.registrar_dependiente(self, "id_participante")
+    
+    def validar_campo(self, campo: str, valor):
+        """
+        Valida y normaliza el valor de un campo de cuenta.
+        
+        Reúne las reglas usadas por `agregar`, `editar` e `importar_lote`: el
+        participante debe existir, usuario y contraseña no pueden estar vacíos
+        y la fecha de creación debe ser una fecha válida con el formato
+        YYYY-MM-DD.
+        
+        Args:
+            campo (str): Nombre del campo a validar
+            valor: Valor capturado para el campo
+        
+        Returns:
+            El valor normalizado (el ID de participante se convierte a int)
+        
+        Raises:
+            ErrorValidacion: Si el valor no es del tipo esperado o no cumple la regla del campo
+            ErrorIntegridad: Si la entidad referenciada no existe
+        """
+        self._verificar_tipo(campo, valor)
+        if campo == "id_participante":
+            valor = self.participante_manager.verificar_referencia(valor, "participante")
+        if campo == "usuario" and not valor:
+            raise ErrorValidacion("El usuario no puede estar vacío.")
+        if campo == "contrasena" and not valor:
+            raise ErrorValidacion("La contraseña no puede estar vacía.")
+        if campo == "fecha_creacion":
+            if not re.match(r'^\d{4}-\d{2}-\d{2}$', str(valor or "")):
+                raise ErrorValidacion("El formato de fecha debe ser YYYY-MM-DD.")
+            # Lo que se acepta debe poder indexarse en `indices_rango`
+            try:
+                fecha_ordinal(valor)
+            except ValueError:
+                raise ErrorValidacion(f"La fecha {valor} no existe.")
+        return valor
     
+    def crear(self, id_participante: int, usuario: str, contrasena: str, fecha_creacion: str) -> list:
+        """
+        Valida y guarda una cuenta nueva sin interacción con la consola.
+        
+        Returns:
+            Cuenta: Registro guardado, con el ID asignado en el primer campo
+        
+        Raises:
+            ErrorValidacion: Si algún campo no pasa las validaciones
+        """
+        return super().crear(
+            id_participante=id_participante,
+            usuario=usuario,
+            contrasena=contrasena,
+            fecha_creacion=fecha_creacion
+        )
+    
+    @instrumentado
     def agregar(self):
         """
         Agrega una nueva cuenta al sistema.
@@ -45,34 +112,16 @@ class CuentaManager(Entidad):
         print("\n--- AGREGAR CUENTA ---")
         try:
             # Verificar que el participante existe
-            id_participante = int(input("ID del participante: "))
-            participante = self.participante_manager.consultar(id_participante)
+            id_participante = self.validar_campo("id_participante", input("ID del participante: "))
             
-            if not participante:
-                print("Error: El participante no existe.")
-                return None
+            usuario = self.validar_campo("usuario", input("Usuario: "))
+            contrasena = self.validar_campo("contrasena", input("Contraseña: "))
+            fecha_creacion = self.validar_campo("fecha_creacion", input("Fecha de creación (YYYY-MM-DD): "))
+            
+            registro = self.crear(id_participante, usuario, contrasena, fecha_creacion)
+            print(f"Cuenta agregada con éxito. ID: {registro[0]}")
+            return int(registro[0])
             
-            with open(self.archivo, 'a', newline='', encoding='utf-8') as file:
-                writer = csv.writer(file)
-                
-                nuevo_id = self.obtener_ultimo_id()
-                
-                usuario = input("Usuario: ")
-                if not usuario:
-                    raise ValueError("El usuario no puede estar vacío.")
-                
-                contrasena = input("Contraseña: ")
-                if not contrasena:
-                    raise ValueError("La contraseña no puede estar vacía.")
-                
-                fecha_creacion = input("Fecha de creación (YYYY-MM-DD): ")
-                if not re.match(r'^\d{4}-\d{2}-\d{2}$', fecha_creacion):
-                    raise ValueError("El formato de fecha debe ser YYYY-MM-DD.")
-                
-                writer.writerow([nuevo_id, id_participante, usuario, contrasena, fecha_creacion])
-                print(f"Cuenta agregada con éxito. ID: {nuevo_id}")
-                return nuevo_id
-                
         except ValueError as ve:
             print(f"Error de validación: {ve}")
             return None
@@ -80,6 +129,7 @@ class CuentaManager(Entidad):
             print(f"Error al agregar cuenta: {e}")
             return None
     
+    @instrumentado
     def consultar(self, id_cuenta):
         """
         Consulta una cuenta específica por su ID.
@@ -88,7 +138,7 @@ class CuentaManager(Entidad):
             id_cuenta (str or int): ID de la cuenta a consultar
         
         Returns:
-            list or None: Datos de la cuenta si se encuentra, None si no existe
+            Cuenta or None: Datos de la cuenta si se encuentra, None si no existe
         
         """
         print("\n--- CONSULTAR CUENTA ---")
@@ -114,6 +164,7 @@ class CuentaManager(Entidad):
             print(f"Error al consultar cuenta: {e}")
             return None
     
+    @instrumentado
     def editar(self, id_cuenta):
         """
         Edita los datos de una cuenta existente.
@@ -130,46 +181,36 @@ class CuentaManager(Entidad):
         print("\n--- EDITAR CUENTA ---")
         try:
             id_cuenta = int(id_cuenta)
-            indice, row = self.buscar_por_id(id_cuenta)
+            _, row = self.buscar_por_id(id_cuenta)
             
             if not row:
                 print("Cuenta no encontrada.")
                 return False
             
             # Verificar que el nuevo participante existe si se cambia
-            nuevo_id_participante = input(f"Nuevo ID de participante ({row[1]}): ") or row[1]
-            participante = self.participante_manager.consultar(nuevo_id_participante)
-            
-            if not participante:
-                print("Error: El participante no existe.")
-                return False
-            
-            # Leer todas las cuentas
-            with open(self.archivo, 'r', encoding='utf-8') as file:
-                reader = csv.reader(file)
-                rows = list(reader)
+            nuevo_id_participante = self.validar_campo(
+                "id_participante",
+                input(f"Nuevo ID de participante ({row[1]}): ") or row[1]
+            )
             
             print(f"\nEditando cuenta: {row[2]}")
             
-            usuario = input(f"Nuevo usuario ({row[2]}): ") or row[2]
-            if not usuario:
-                raise ValueError("El usuario no puede estar vacío.")
+            usuario = self.validar_campo("usuario", input(f"Nuevo usuario ({row[2]}): ") or row[2])
             
             contrasena = input("Nueva contraseña (dejar vacío para mantener la actual): ")
             if not contrasena:
                 contrasena = row[3]
             
-            fecha_creacion = input(f"Nueva fecha ({row[4]}): ") or row[4]
-            if not re.match(r'^\d{4}-\d{2}-\d{2}$', fecha_creacion):
-                raise ValueError("El formato de fecha debe ser YYYY-MM-DD.")
+            fecha_creacion = self.validar_campo("fecha_creacion", input(f"Nueva fecha ({row[4]}): ") or row[4])
             
             # Actualizar los datos
-            rows[indice + 1] = [id_cuenta, nuevo_id_participante, usuario, contrasena, fecha_creacion]
-            
-            # Escribir todos los datos de vuelta al archivo
-            with open(self.archivo, 'w', newline='', encoding='utf-8') as file:
-                writer = csv.writer(file)
-                writer.writerows(rows)
+            self.actualizar(
+                id_cuenta,
+                id_participante=nuevo_id_participante,
+                usuario=usuario,
+                contrasena=contrasena,
+                fecha_creacion=fecha_creacion
+            )
             
             print("Cuenta actualizada con éxito.")
             return True
@@ -181,6 +222,7 @@ class CuentaManager(Entidad):
             print(f"Error al editar cuenta: {e}")
             return False
     
+    @instrumentado
     def eliminar(self, id_cuenta):
         """
         Elimina una cuenta del sistema después de confirmación.
@@ -200,18 +242,6 @@ class CuentaManager(Entidad):
                 print("Cuenta no encontrada.")
                 return False
             
-            # Leer todas las cuentas
-            with open(self.archivo, 'r', encoding='utf-8') as file:
-                reader = csv.reader(file)
-                rows = list(reader)
-            
-            # Filtrar la cuenta a eliminar
-            nuevos_rows = [rows[0]]  # Mantener la cabecera
-            
-            for row_data in rows[1:]:  # Saltar la cabecera
-                if row_data and row_data[0].isdigit() and int(row_data[0]) != id_cuenta:
-                    nuevos_rows.append(row_data)
-            
             print(f"¿Está seguro de eliminar la cuenta: {row[2]}?")
             confirmacion = input("Escriba 'SI' para confirmar: ")
             
@@ -219,10 +249,7 @@ class CuentaManager(Entidad):
                 print("Eliminación cancelada.")
                 return False
             
-            # Escribir todos los datos de vuelta al archivo
-            with open(self.archivo, 'w', newline='', encoding='utf-8') as file:
-                writer = csv.writer(file)
-                writer.writerows(nuevos_rows)
+            self.borrar(id_cuenta)
             
             print("Cuenta eliminada con éxito.")
             return True
@@ -1,6 +1,17 @@
 import csv
+import json
 import os
+import threading
 from abc import ABC, abstractmethod
+from contextlib import ExitStack
+from itertools import islice
+from AlmacenCSV import AlmacenCSV
+from AlmacenSQLite import AlmacenSQLite
+from Cache import CacheLRU
+from Errores import ErrorIntegridad, ErrorValidacion, RegistroNoEncontrado
+from Indices import IndiceHash, IndiceOrdenado, IndiceTexto, IndiceUnico
+from InstantaneaColumnar import TablaColumnar, escribir_instantanea
+from Metricas import instrumentado
 
 class Entidad(ABC):
     """
@@ -9,11 +20,73 @@ class Entidad(ABC):
     Esta clase proporciona funcionalidades comunes para operaciones CRUD (Crear, Leer,
     Actualizar, Eliminar) y sirve como base para todas las entidades del sistema.
     
+    Las operaciones se ofrecen en dos capas: una API programática (`crear`,
+    `obtener`, `actualizar`, `borrar`) que recibe argumentos, devuelve registros
+    y lanza excepciones de `Errores` sin usar la consola, y los métodos
+    interactivos (`agregar`, `consultar`, `editar`, `eliminar`) que piden los
+    datos con `input()`, llaman a la API y muestran el resultado.
+    
+    El acceso a los datos se delega en un motor de almacenamiento (`Almacen`),
+    elegido con el atributo de clase `motor` o, si es None, con la variable de
+    entorno SOLROCK_MOTOR ("csv" por defecto):
+    
+    - "csv": `AlmacenCSV`, de solo anexado: las ediciones y eliminaciones agregan
+      filas al final del CSV en lugar de reescribirlo, y un índice primario
+      persistido (`<archivo>.idx`) resuelve la versión vigente de cada registro
+      con un solo `seek`. El siguiente ID a asignar se persiste en `<archivo>.seq`.
+    - "sqlite": `AlmacenSQLite`, una tabla (llamada como el CSV sin extensión)
+      de la base `solrock.db` del mismo directorio, con índices en la clave
+      primaria y en las columnas de `indices_hash` e `indices_unicos`.
+    
+    Las clases hijas funcionan igual con cualquiera de los dos motores;
+    `migrar.py` copia los datos de uno a otro.
+    
+    Las clases hijas pueden declarar índices secundarios en `indices_hash` (búsqueda
+    por valor), `indices_unicos` (además, el valor no puede repetirse) e
+    `indices_rango` (campo -> conversión a clave ordenable, para consultas por
+    rango) e `indices_texto` (búsqueda por prefijo y tolerante a errores de
+    tipeo). Se construyen en memoria la primera vez que se usan, se mantienen en
+    cada alta, edición y baja, y se consultan con `buscar_por`, `buscar_rango`,
+    `autocompletar` y `buscar_aproximado`. Cada campo admite un solo índice.
+    
+    Si la clase hija declara `tipo_registro` (una subclase de `Registros.Registro`),
+    todas las lecturas devuelven registros tipados en lugar de listas de textos;
+    los registros siguen admitiendo `registro[i]`.
+    
+    Para arrancar sin analizar el CSV, `cargar_instantanea` abre con `mmap` una
+    copia binaria por columnas de la tabla (`<archivo>.col`), que se regenera
+    cuando el CSV cambió después de generarla.
+    
+    Las lecturas por ID, las búsquedas y las páginas de los listados pasan por
+    una caché LRU (`cache`) de `capacidad_cache` resultados que viven
+    `ttl_cache` segundos. Cada resultado se guarda con la versión de la tabla
+    (`Almacen.version`), así que cualquier alta, edición o baja, propia o de
+    otro proceso, lo invalida. Los registros en caché se comparten entre
+    llamadas: no deben modificarse.
+    
+    Las operaciones públicas están marcadas con `@instrumentado`: cada llamada
+    suma al registro `Metricas.METRICAS` su duración y la E/S que provocó.
+    
     Atributos:
         archivo (str): Ruta del archivo CSV donde se almacenan los datos
         campos (list): Lista de nombres de columnas para el archivo CSV
+        almacen (Almacen): Motor de almacenamiento de la tabla
+        archivo_instantanea (str): Ruta de la instantánea columnar de la tabla
+        indices (dict): Índices secundarios por nombre de campo
+        cache (CacheLRU): Caché de resultados de lectura
+        dependientes (list): Pares (entidad, campo) de las entidades que referencian
+            a esta por clave foránea
     """
     
+    motor = None
+    indices_hash = ()
+    indices_unicos = ()
+    indices_rango = {}
+    indices_texto = ()
+    tipo_registro = None
+    capacidad_cache = 1024
+    ttl_cache = None
+    
     def __init__(self, archivo: str, campos: list):
         """
         Inicializa una nueva entidad con su archivo y estructura de datos.
@@ -24,7 +97,40 @@ class Entidad(ABC):
         """
         self.archivo = archivo
         self.campos = campos
-        self.inicializar_archivo()
+        self.archivo_instantanea = archivo + ".col"
+        self.almacen = self._crear_almacen(
+            archivo, campos,
+            fabrica=self.tipo_registro.desde_fila if self.tipo_registro else None
+        )
+        
+        self.indices = {}
+        for campo in self.indices_hash:
+            self.indices[campo] = IndiceHash(campo, campos.index(campo))
+        for campo in self.indices_unicos:
+            self.indices[campo] = IndiceUnico(campo, campos.index(campo))
+        for campo, convertir in self.indices_rango.items():
+            self.indices[campo] = IndiceOrdenado(campo, campos.index(campo), convertir)
+        for campo in self.indices_texto:
+            self.indices[campo] = IndiceTexto(campo, campos.index(campo))
+        self._cerrojo_indices = threading.RLock()
+        self.almacen.suscribir(self)
+        self.dependientes = []
+        self.cache = CacheLRU(self.capacidad_cache, self.ttl_cache)
+    
+    def _crear_almacen(self, archivo: str, campos: list, fabrica):
+        """
+        Crea el motor de almacenamiento indicado por `motor` o SOLROCK_MOTOR.
+        
+        Raises:
+            ValueError: Si el motor no es "csv" ni "sqlite"
+        """
+        motor = self.motor or os.environ.get("SOLROCK_MOTOR", "csv")
+        if motor == "csv":
+            return AlmacenCSV(archivo, campos, fabrica=fabrica)
+        if motor == "sqlite":
+            return AlmacenSQLite(archivo, campos, fabrica=fabrica,
+                                 indices=(*self.indices_hash, *self.indices_unicos))
+        raise ValueError(f"Motor de almacenamiento desconocido: {motor!r}.")
     
     def inicializar_archivo(self) -> None:
         """
@@ -33,65 +139,840 @@ class Entidad(ABC):
         Verifica la existencia del archivo y lo crea con la estructura definida
         en `self.campos` si no está presente en el sistema de archivos.
         """
-        if not os.path.exists(self.archivo):
-            with open(self.archivo, 'w', newline='', encoding='utf-8') as file:
-                writer = csv.writer(file)
-                writer.writerow(self.campos)
+        self.almacen.inicializar_archivo()
     
+    @instrumentado
     def obtener_ultimo_id(self) -> int:
         """
-        Obtiene el último ID utilizado en el archivo para generar uno nuevo.
+        Obtiene el siguiente ID disponible a partir de la secuencia persistida.
+        
+        La secuencia solo avanza, por lo que los IDs de registros eliminados nunca
+        se reutilizan. La consulta es O(1): no recorre el CSV.
         
         Returns:
-            int: El último ID incrementado en 1, o 1 si el archivo está vacío
+            int: El siguiente ID a asignar, o 1 si nunca se ha registrado ninguno
         """
         try:
-            with open(self.archivo, 'r', encoding='utf-8') as f:
-                reader = csv.reader(f)
-                next(reader)  # Saltar la cabecera
-                ids = [int(row[0]) for row in reader if row and row[0].isdigit()]
-                return max(ids) + 1 if ids else 1
-        except (FileNotFoundError, ValueError, IndexError):
+            return self.almacen.siguiente_id()
+        except FileNotFoundError:
             return 1
     
+    @instrumentado
     def buscar_por_id(self, id_buscar: int) -> tuple:
         """
-        Busca un registro específico por su ID en el archivo CSV.
+        Busca un registro específico por su ID usando el índice primario.
+        
+        La búsqueda cuesta un acceso al índice en memoria, un `seek` y el
+        análisis de una sola fila del CSV.
         
         Args:
             id_buscar (int): ID del registro a buscar
         
         Returns:
-            tuple: (índice, fila) donde el índice es la posición y fila los datos,
-                o (-1, None) si no se encuentra
+            tuple: (posición, fila) donde la posición es el desplazamiento en bytes
+                de la fila dentro del archivo, o (-1, None) si no se encuentra
         """
         try:
-            with open(self.archivo, 'r', encoding='utf-8') as file:
-                reader = csv.reader(file)
-                next(reader)  # Saltar la cabecera
-                
-                for i, row in enumerate(reader):
-                    if row and row[0].isdigit() and int(row[0]) == id_buscar:
-                        return i, row
-                return -1, None
+            return self._consultar_cache(("id", id_buscar), lambda: self.almacen.buscar(id_buscar))
         except (FileNotFoundError, ValueError, IndexError):
             return -1, None
     
+    def existe(self, id_entidad: int) -> bool:
+        """
+        Indica si existe un registro vigente con el ID indicado.
+        
+        Solo consulta el índice primario en memoria; no lee el CSV ni imprime nada.
+        
+        Args:
+            id_entidad (int): ID del registro
+        
+        Returns:
+            bool: True si el registro existe, False en otro caso
+        """
+        try:
+            return self.almacen.existe(int(id_entidad))
+        except (FileNotFoundError, TypeError, ValueError):
+            return False
+    
+    def verificar_referencia(self, valor, nombre: str) -> int:
+        """
+        Valida una clave foránea que apunta a esta entidad.
+        
+        Es el validador compartido por las entidades dependientes. La existencia
+        se consulta en el índice primario en memoria, que es el conjunto de IDs
+        vigentes: el almacén lo actualiza en cada alta y baja y lo pone al día
+        si otro proceso escribió. No lee el CSV ni imprime nada.
+        
+        Args:
+            valor: ID referenciado, como texto o número
+            nombre (str): Rol de la entidad en los mensajes de error (por ejemplo "entrenador")
+        
+        Returns:
+            int: El ID convertido a entero
+        
+        Raises:
+            ErrorValidacion: Si el ID no es un número entero
+            ErrorIntegridad: Si no existe un registro vigente con ese ID
+        """
+        try:
+            valor = int(valor)
+        except (TypeError, ValueError):
+            raise ErrorValidacion(f"El ID del {nombre} debe ser un número entero.")
+        if not self.existe(valor):
+            raise ErrorIntegridad(f"El {nombre} no existe.")
+        return valor
+    
+    @instrumentado
+    def validar_integridad(self) -> dict:
+        """
+        Busca los registros huérfanos de todas las entidades que dependen de esta.
+        
+        Cada archivo dependiente se recorre una sola vez en streaming y su clave
+        foránea se comprueba contra el conjunto de IDs vigentes del padre, tomado
+        una vez antes del recorrido. Los candidatos se vuelven a comprobar al
+        final, para no reportar registros que otro proceso dio de alta o
+        eliminó durante el recorrido.
+        
+        Returns:
+            dict: Archivo dependiente -> lista de pares (ID del registro, valor de
+                la clave foránea que no existe), ordenada por ID
+        """
+        huerfanos = {}
+        entidades = [self]
+        for entidad in entidades:
+            vigentes = entidad.almacen.ids()
+            for dependiente, campo in entidad.dependientes:
+                posicion = dependiente.campos.index(campo)
+                candidatos = []
+                for row in dependiente.iterar():
+                    try:
+                        referencia = int(row[posicion])
+                    except (TypeError, ValueError):
+                        referencia = None
+                    if referencia not in vigentes:
+                        candidatos.append((int(row[0]), row[posicion]))
+                
+                confirmados = [(id_entidad, referencia) for id_entidad, referencia in candidatos
+                               if dependiente.existe(id_entidad) and not entidad.existe(referencia)]
+                huerfanos.setdefault(dependiente.archivo, []).extend(confirmados)
+                if dependiente not in entidades:
+                    entidades.append(dependiente)
+        
+        return {archivo: sorted(pares) for archivo, pares in huerfanos.items()}
+    
+    @instrumentado
     def obtener_todos(self) -> list:
         """
-        Obtiene todos los registros del archivo CSV excluyendo la cabecera.
+        Obtiene todos los registros vigentes del archivo CSV excluyendo la cabecera.
         
         Returns:
             list: Lista de todos los registros encontrados, lista vacía si no hay datos
         """
         try:
-            with open(self.archivo, 'r', encoding='utf-8') as file:
-                reader = csv.reader(file)
-                next(reader)  # Saltar la cabecera
-                return [row for row in reader if row]
+            return self.almacen.leer_todas()
         except FileNotFoundError:
             return []
     
+    def iterar(self, offset: int = 0, limit: int = None, filtro=None, tamano_bloque: int = 1000):
+        """
+        Recorre los registros vigentes sin cargar la tabla completa en memoria.
+        
+        Lee el archivo en bloques de `tamano_bloque` filas, así que la memoria
+        usada no depende del tamaño de la tabla. Entre un bloque y otro no se
+        mantiene ningún cerrojo.
+        
+        Args:
+            offset (int): Número de registros (que cumplen el filtro) a saltar
+            limit (int): Número máximo de registros a generar (None = todos)
+            filtro (callable): Función fila -> bool para seleccionar registros
+            tamano_bloque (int): Filas leídas del archivo por bloque
+        
+        Yields:
+            Registro: Registros en orden físico del archivo
+        """
+        fin = None if limit is None else offset + limit
+        yield from islice(self._recorrer(filtro, tamano_bloque), offset, fin)
+    
+    def _recorrer(self, filtro, tamano_bloque: int):
+        """Genera todos los registros que cumplen el filtro, bloque a bloque."""
+        cursor = None
+        while True:
+            filas, cursor = self.almacen.leer_pagina(cursor, tamano_bloque, filtro)
+            yield from filas
+            if cursor is None:
+                return
+    
+    @instrumentado
+    def pagina(self, cursor: str = None, limite: int = 20, filtro=None) -> tuple:
+        """
+        Devuelve una página de registros con paginación por cursor.
+        
+        A diferencia de `iterar(offset=...)`, pedir la página siguiente no vuelve
+        a recorrer las anteriores.
+        
+        Args:
+            cursor (str): Cursor de la página anterior (None para la primera)
+            limite (int): Tamaño de la página
+            filtro (callable): Función fila -> bool para seleccionar registros
+        
+        Returns:
+            tuple: (registros, cursor de la página siguiente o None si no hay más)
+        
+        Raises:
+            CursorInvalido: Si el cursor no es válido
+        """
+        if filtro is not None:
+            return self.almacen.leer_pagina(cursor, limite, filtro)
+        filas, siguiente = self._consultar_cache(("pagina", cursor, limite),
+                                                 lambda: self.almacen.leer_pagina(cursor, limite))
+        return list(filas), siguiente
+    
+    def guardar_instantanea(self) -> int:
+        """
+        Escribe la instantánea columnar con los registros vigentes.
+        
+        Los campos numéricos del `tipo_registro` se guardan como enteros de ancho
+        fijo y el resto como texto. Mientras se genera, nadie puede escribir en la
+        tabla, así que la instantánea corresponde exactamente a una versión del CSV.
+        
+        Returns:
+            int: Número de registros guardados
+        """
+        enteros = self.tipo_registro.enteros if self.tipo_registro else ()
+        with self.almacen.leyendo():
+            return escribir_instantanea(self.archivo_instantanea, self.campos, enteros,
+                                        self.iterar(), self.almacen.firma())
+    
+    def cargar_instantanea(self) -> TablaColumnar:
+        """
+        Abre la instantánea columnar de la tabla mediante `mmap`.
+        
+        Si falta, está dañada o es anterior a la última escritura del CSV, se
+        regenera antes de abrirla.
+        
+        Returns:
+            TablaColumnar: Tabla por columnas (conviene cerrarla con `cerrar()` o `with`)
+        """
+        categoricos = self.tipo_registro.categoricos if self.tipo_registro else ()
+        try:
+            tabla = TablaColumnar(self.archivo_instantanea, categoricos)
+            if tabla.firma == self.almacen.firma():
+                return tabla
+            tabla.cerrar()
+        except (FileNotFoundError, ValueError):
+            pass
+        self.guardar_instantanea()
+        return TablaColumnar(self.archivo_instantanea, categoricos)
+    
+    def insertar_fila(self, fila: list) -> int:
+        """
+        Agrega una fila nueva al final del CSV y la registra en el índice primario.
+        
+        Args:
+            fila (list): Valores de la fila; el primer elemento debe ser el ID
+        
+        Returns:
+            int: Desplazamiento en bytes donde quedó escrita la fila
+        """
+        return self.almacen.escribir(fila)
+    
+    def reemplazar_fila(self, id_entidad: int, fila: list) -> bool:
+        """
+        Sustituye la fila con el ID indicado anexando una nueva versión.
+        
+        Args:
+            id_entidad (int): ID del registro a reemplazar
+            fila (list): Nuevos valores de la fila, incluyendo el ID
+        
+        Returns:
+            bool: True si el registro existía y fue reemplazado, False en otro caso
+        """
+        return self.almacen.reemplazar(id_entidad, fila)
+    
+    def eliminar_fila(self, id_entidad: int) -> bool:
+        """
+        Elimina la fila con el ID indicado anexando una lápida.
+        
+        Args:
+            id_entidad (int): ID del registro a eliminar
+        
+        Returns:
+            bool: True si el registro existía y fue eliminado, False en otro caso
+        """
+        return self.almacen.eliminar(id_entidad)
+    
+    @instrumentado
+    def obtener(self, id_entidad: int) -> list:
+        """
+        Obtiene un registro por su ID sin imprimir nada.
+        
+        Args:
+            id_entidad (int): ID del registro
+        
+        Returns:
+            Registro: Registro tipado (o lista si la entidad no declara `tipo_registro`)
+        
+        Raises:
+            RegistroNoEncontrado: Si no existe un registro vigente con ese ID
+        """
+        _, row = self.buscar_por_id(self._convertir_id(id_entidad))
+        if row is None:
+            raise RegistroNoEncontrado(f"No existe el registro con ID {id_entidad}.")
+        return row
+    
+    @instrumentado
+    def crear(self, **datos) -> list:
+        """
+        Valida y guarda un registro nuevo.
+        
+        Args:
+            **datos: Valores de los campos (todos excepto el ID)
+        
+        Returns:
+            Registro: Registro guardado, con el ID asignado en el primer campo
+        
+        Raises:
+            ErrorValidacion: Si algún campo no pasa las validaciones o no existe
+        """
+        self._verificar_campos(datos)
+        valores = self.validar_datos(datos)
+        # La verificación de únicos y el alta forman una sola sección crítica
+        with self.grupo(), self.almacen.bloquear():
+            self._verificar_unicos(None, valores)
+            nuevo_id = self.almacen.insertar_lote([valores])[0]
+        return self._como_registro([nuevo_id, *valores])
+    
+    @instrumentado
+    def actualizar(self, id_entidad: int, **cambios) -> list:
+        """
+        Modifica los campos indicados de un registro existente.
+        
+        Los campos no mencionados conservan su valor; el registro completo se
+        vuelve a validar antes de guardarse.
+        
+        Args:
+            id_entidad (int): ID del registro a modificar
+            **cambios: Nuevos valores de los campos a modificar
+        
+        Returns:
+            Registro: Registro guardado
+        
+        Raises:
+            RegistroNoEncontrado: Si el registro no existe
+            ErrorValidacion: Si algún campo no pasa las validaciones o no existe
+        """
+        self._verificar_campos(cambios)
+        id_entidad = self._convertir_id(id_entidad)
+        datos = dict(zip(self.campos, self.obtener(id_entidad)))
+        datos.update(cambios)
+        
+        fila = [id_entidad, *self.validar_datos(datos)]
+        with self.grupo(), self.almacen.bloquear():
+            self._verificar_unicos(id_entidad, fila[1:])
+            if not self.reemplazar_fila(id_entidad, fila):
+                raise RegistroNoEncontrado(f"No existe el registro con ID {id_entidad}.")
+        return self._como_registro(fila)
+    
+    @instrumentado
+    def borrar(self, id_entidad: int) -> None:
+        """
+        Elimina un registro sin pedir confirmación.
+        
+        Args:
+            id_entidad (int): ID del registro a eliminar
+        
+        Raises:
+            RegistroNoEncontrado: Si el registro no existe
+        """
+        if not self.eliminar_fila(self._convertir_id(id_entidad)):
+            raise RegistroNoEncontrado(f"No existe el registro con ID {id_entidad}.")
+    
+    def grupo(self):
+        """
+        Confirma con un único fsync todas las escrituras hechas dentro del bloque.
+        
+        Sirve para cualquier entidad del mismo directorio, ya que comparten la
+        bitácora (o, con el motor SQLite, la base). Ejemplo::
+        
+            with participantes.grupo():
+                for datos in nuevos:
+                    participantes.crear(**datos)
+        
+        Returns:
+            Administrador de contexto del almacén
+        """
+        return self.almacen.grupo()
+    
+    def registrar_dependiente(self, entidad, campo: str) -> None:
+        """
+        Declara que `entidad` referencia a esta entidad a través de `campo`.
+        
+        Los dependientes registrados se eliminan junto con el registro padre en
+        `eliminar_en_cascada`. Conviene que `campo` tenga un índice secundario
+        en la entidad dependiente para no recorrer su archivo.
+        
+        Args:
+            entidad (Entidad): Entidad que contiene la clave foránea
+            campo (str): Nombre del campo de clave foránea en `entidad`
+        """
+        self.dependientes.append((entidad, campo))
+    
+    @instrumentado
+    def eliminar_en_cascada(self, id_entidad: int, simular: bool = False) -> dict:
+        """
+        Elimina un registro junto con todos los registros que dependen de él.
+        
+        Los dependientes se encuentran a través de los índices de clave foránea y
+        cada archivo recibe una sola escritura con todas sus lápidas. Los archivos
+        dependientes se escriben antes que el del padre, así que una interrupción
+        nunca deja registros huérfanos. Todas las entidades involucradas quedan
+        bloqueadas durante la operación.
+        
+        Args:
+            id_entidad (int): ID del registro a eliminar
+            simular (bool): Si es True no elimina nada; solo informa qué se eliminaría
+        
+        Returns:
+            dict: Número de registros afectados por archivo
+        
+        Raises:
+            RegistroNoEncontrado: Si el registro no existe
+        """
+        id_entidad = self._convertir_id(id_entidad)
+        
+        entidades = {}
+        pendientes = [self]
+        while pendientes:
+            entidad = pendientes.pop()
+            if entidad.archivo not in entidades:
+                entidades[entidad.archivo] = entidad
+                pendientes.extend(dependiente for dependiente, _ in entidad.dependientes)
+        
+        # Bloquear en orden fijo (por nombre de archivo) para evitar interbloqueos
+        # entre hilos y entre procesos; el fsync se hace al salir, ya sin cerrojos
+        with self.grupo(), ExitStack() as pila:
+            for archivo in sorted(entidades):
+                pila.enter_context(entidades[archivo].almacen.bloquear())
+            
+            if not self.existe(id_entidad):
+                raise RegistroNoEncontrado(f"No existe el registro con ID {id_entidad}.")
+            
+            plan = {self.archivo: {id_entidad}}
+            orden = [self]
+            for entidad in orden:
+                ids = plan[entidad.archivo]
+                for dependiente, campo in entidad.dependientes:
+                    hijos = plan.setdefault(dependiente.archivo, set())
+                    for id_padre in ids:
+                        hijos.update(dependiente._ids_por(campo, id_padre))
+                    if dependiente not in orden:
+                        orden.append(dependiente)
+            
+            if not simular:
+                for entidad in reversed(orden):
+                    entidad.almacen.eliminar_lote(sorted(plan[entidad.archivo]))
+        
+        return {archivo: len(ids) for archivo, ids in plan.items()}
+    
+    def _ids_por(self, campo: str, valor) -> set:
+        """Devuelve los IDs de los registros cuyo campo tiene el valor indicado."""
+        if campo in self.indices:
+            return self._consultar_indice(campo, lambda indice: indice.buscar(valor))
+        return {int(row[0]) for row in self.buscar_por(campo, valor)}
+    
+    @instrumentado
+    def buscar_por(self, campo: str, valor) -> list:
+        """
+        Obtiene los registros cuyo campo tiene el valor indicado.
+        
+        Si el campo tiene un índice secundario, la búsqueda cuesta una consulta al
+        índice y un `seek` por resultado sobre un único archivo abierto; si no,
+        se recorre el archivo completo.
+        
+        Args:
+            campo (str): Nombre del campo
+            valor: Valor buscado (se compara como texto)
+        
+        Returns:
+            list: Filas encontradas, ordenadas por ID
+        
+        Raises:
+            ErrorValidacion: Si la entidad no tiene ese campo
+        """
+        if campo not in self.campos:
+            raise ErrorValidacion(f"Campo desconocido: {campo}.")
+        
+        def calcular():
+            if campo not in self.indices:
+                posicion = self.campos.index(campo)
+                return [row for row in self.obtener_todos() if str(row[posicion]) == str(valor)]
+            rows = self.almacen.leer_varios(self._consultar_indice(campo, lambda indice: indice.buscar(valor)))
+            return sorted(rows, key=lambda row: int(row[0]))
+        
+        return list(self._consultar_cache(("por", campo, str(valor)), calcular))
+    
+    @instrumentado
+    def buscar_rango(self, campo: str, desde=None, hasta=None, limite: int = None) -> list:
+        """
+        Obtiene los registros cuyo campo está entre `desde` y `hasta` (incluidos).
+        
+        Usa el índice ordenado del campo: la consulta cuesta O(log n + k), con un
+        `seek` por resultado.
+        
+        Args:
+            campo (str): Campo declarado en `indices_rango`
+            desde: Límite inferior (None = sin límite), en el formato del campo
+            hasta: Límite superior (None = sin límite), en el formato del campo
+            limite (int): Número máximo de registros a devolver
+        
+        Returns:
+            list: Filas encontradas, ordenadas por el campo
+        
+        Raises:
+            ErrorValidacion: Si el campo no tiene índice por rango o un límite no es válido
+        """
+        if campo not in self.indices_rango:
+            raise ErrorValidacion(f"El campo {campo} no tiene índice por rango.")
+        
+        def calcular():
+            try:
+                ids = self._consultar_indice(
+                    campo, lambda indice: list(islice(indice.iterar_rango(desde, hasta), limite)))
+            except (TypeError, ValueError):
+                raise ErrorValidacion(f"Límites no válidos para {campo}: {desde!r}, {hasta!r}.")
+            por_id = {int(row[0]): row for row in self.almacen.leer_varios(ids)}
+            return [por_id[id_entidad] for id_entidad in ids if id_entidad in por_id]
+        
+        return list(self._consultar_cache(("rango", campo, desde, hasta, limite), calcular))
+    
+    @instrumentado
+    def autocompletar(self, campo: str, prefijo: str, limite: int = 10) -> list:
+        """
+        Obtiene los registros cuyo campo empieza por `prefijo`.
+        
+        No distingue mayúsculas ni acentos. Usa el índice de texto del campo: la
+        consulta cuesta O(log n + k), con un `seek` por resultado.
+        
+        Args:
+            campo (str): Campo declarado en `indices_texto`
+            prefijo (str): Comienzo del valor buscado
+            limite (int): Número máximo de registros a devolver
+        
+        Returns:
+            list: Filas encontradas, en orden alfabético del campo
+        
+        Raises:
+            ErrorValidacion: Si el campo no tiene índice de texto
+        """
+        def calcular():
+            ids = self._consultar_indice(self._campo_texto(campo),
+                                         lambda indice: indice.buscar_prefijo(prefijo, limite))
+            por_id = {int(row[0]): row for row in self.almacen.leer_varios(ids)}
+            return [por_id[id_entidad] for id_entidad in ids if id_entidad in por_id]
+        
+        return list(self._consultar_cache(("prefijo", campo, prefijo, limite), calcular))
+    
+    @instrumentado
+    def buscar_aproximado(self, campo: str, texto: str, limite: int = 10,
+                          similitud_minima: float = 0.3) -> list:
+        """
+        Obtiene los registros cuyo campo se parece a `texto` aunque tenga errores de tipeo.
+        
+        Args:
+            campo (str): Campo declarado en `indices_texto`
+            texto (str): Texto buscado
+            limite (int): Número máximo de registros a devolver
+            similitud_minima (float): Similitud mínima (0 a 1), por trigramas en común o
+                distancia de edición (ver `Indices.similitud_texto`)
+        
+        Returns:
+            list: Pares (fila, similitud), de mayor a menor similitud
+        
+        Raises:
+            ErrorValidacion: Si el campo no tiene índice de texto
+        """
+        def calcular():
+            pares = self._consultar_indice(self._campo_texto(campo),
+                                           lambda indice: indice.buscar_aproximado(texto, limite, similitud_minima))
+            por_id = {int(row[0]): row for row in self.almacen.leer_varios([id_entidad for id_entidad, _ in pares])}
+            return [(por_id[id_entidad], similitud) for id_entidad, similitud in pares if id_entidad in por_id]
+        
+        return list(self._consultar_cache(("aproximado", campo, texto, limite, similitud_minima), calcular))
+    
+    def buscar_texto(self, campos, texto: str, limite: int = 10) -> list:
+        """
+        Búsqueda para el usuario: primero los registros cuyo campo empieza por
+        `texto` y, si no alcanzan el límite, los parecidos.
+        
+        Args:
+            campos (iterable): Campos declarados en `indices_texto` donde buscar
+            texto (str): Texto buscado
+            limite (int): Número máximo de registros a devolver
+        
+        Returns:
+            list: Filas encontradas, sin repetir
+        """
+        def candidatos():
+            for campo in campos:
+                yield from self.autocompletar(campo, texto, limite)
+            for campo in campos:
+                yield from (row for row, _ in self.buscar_aproximado(campo, texto, limite))
+        
+        vistos = set()
+        resultado = []
+        for row in candidatos():
+            if len(resultado) >= limite:
+                break
+            if int(row[0]) not in vistos:
+                vistos.add(int(row[0]))
+                resultado.append(row)
+        return resultado
+    
+    def _consultar_cache(self, clave, calcular):
+        """
+        Devuelve el resultado de `calcular()`, desde la caché si la tabla no cambió.
+        
+        La versión se lee antes de calcular: si otra escritura ocurre mientras
+        tanto, el resultado queda guardado con la versión vieja y no se reutiliza.
+        """
+        version = self.almacen.version()
+        encontrado, resultado = self.cache.obtener(clave, version)
+        if not encontrado:
+            resultado = calcular()
+            self.cache.guardar(clave, version, resultado)
+        return resultado
+    
+    def _campo_texto(self, campo: str) -> str:
+        """Devuelve el campo si tiene índice de texto o lanza ErrorValidacion si no lo tiene."""
+        if campo not in self.indices_texto:
+            raise ErrorValidacion(f"El campo {campo} no tiene índice de texto.")
+        return campo
+    
+    def _obtener_indice(self, campo: str):
+        """
+        Devuelve el índice secundario del campo, construyéndolo si hace falta.
+        
+        Si varios hilos lo piden a la vez sin construir, solo uno lo construye.
+        Los cerrojos se toman en el mismo orden que en una escritura (primero
+        el del almacén y luego el de los índices, que `al_escribir` pide con el
+        almacén ya tomado); al revés, un hilo que construye y otro que escribe
+        se esperarían mutuamente.
+        """
+        indice = self.indices[campo]
+        self.almacen.refrescar()
+        if not indice.construido:
+            with self.almacen.leyendo(), self._cerrojo_indices:
+                if not indice.construido:
+                    indice.construir(self.obtener_todos())
+        return indice
+    
+    def _consultar_indice(self, campo: str, consulta):
+        """
+        Devuelve `consulta(indice)` sobre el índice secundario del campo.
+        
+        La consulta corre con el cerrojo de los índices, que también toman
+        `al_escribir` y `al_recargar`: así un hilo nunca lee un índice a medio
+        modificar por la escritura de otro. El cerrojo solo cubre el trabajo en
+        memoria, no la E/S.
+        """
+        indice = self._obtener_indice(campo)
+        with self._cerrojo_indices:
+            return consulta(indice)
+    
+    def _verificar_unicos(self, id_entidad, valores: list, pendientes: dict = None, ignorar=()) -> None:
+        """
+        Comprueba que los valores de los campos únicos no pertenezcan a otro registro.
+        
+        Args:
+            id_entidad (int or None): ID del registro (None si es nuevo)
+            valores (list): Valores de `campos[1:]`
+            pendientes (dict): Valores ya usados por filas del mismo lote aún no
+                escritas (campo -> set), que se actualiza con los de esta fila
+            ignorar (iterable): IDs cuyos valores guardados no cuentan porque el
+                mismo lote los reemplaza o elimina
+        """
+        for campo in self.indices_unicos:
+            valor = str(valores[self.campos.index(campo) - 1])
+            self._consultar_indice(campo, lambda indice: indice.verificar(id_entidad, valor, ignorar))
+            if pendientes is not None:
+                usados = pendientes.setdefault(campo, set())
+                if valor in usados:
+                    raise ErrorValidacion(f"Ya existe un registro con {campo} '{valor}'.")
+                usados.add(valor)
+    
+    def al_escribir(self, id_entidad: int, fila) -> None:
+        """
+        Mantiene los índices secundarios tras un alta, edición o baja.
+        
+        Lo invoca el almacén después de cada escritura; `fila` es None en una baja.
+        """
+        with self._cerrojo_indices:
+            for indice in self.indices.values():
+                if not indice.construido:
+                    continue
+                if fila is None:
+                    indice.quitar(id_entidad)
+                else:
+                    indice.agregar(id_entidad, fila)
+    
+    def al_recargar(self) -> None:
+        """Descarta los índices secundarios cuando el CSV cambió desde otro proceso."""
+        with self._cerrojo_indices:
+            for indice in self.indices.values():
+                indice.invalidar()
+    
+    def _verificar_campos(self, datos: dict) -> None:
+        """Rechaza nombres de campo que la entidad no tiene (o el ID, que no se modifica)."""
+        desconocidos = set(datos) - set(self.campos[1:])
+        if desconocidos:
+            raise ErrorValidacion(f"Campos desconocidos: {', '.join(sorted(desconocidos))}.")
+    
+    def _como_registro(self, fila: list):
+        """Convierte una fila recién guardada al tipo que devuelven las lecturas."""
+        if self.tipo_registro is None:
+            return [str(valor) for valor in fila]
+        return self.tipo_registro.desde_fila(fila)
+    
+    @staticmethod
+    def _convertir_id(id_entidad) -> int:
+        """Convierte un ID recibido como texto o número entero a int (no acepta bool ni decimales)."""
+        if isinstance(id_entidad, bool) or not isinstance(id_entidad, (int, str)):
+            raise ErrorValidacion("El ID debe ser un número entero.")
+        try:
+            return int(id_entidad)
+        except ValueError:
+            raise ErrorValidacion("El ID debe ser un número entero.")
+    
+    def _verificar_tipo(self, campo: str, valor) -> None:
+        """
+        Rechaza valores que no sean texto, o enteros en los campos de `tipo_registro.enteros`.
+        
+        Los datos que llegan como JSON pueden traer listas, objetos, booleanos o
+        decimales que `str()` o `int()` convertirían sin avisar. None se deja
+        pasar para que `validar_campo` dé su mensaje de campo vacío.
+        
+        Raises:
+            ErrorValidacion: Si el valor no es de un tipo aceptado para el campo
+        """
+        if valor is None or isinstance(valor, str):
+            return
+        enteros = self.tipo_registro.enteros if self.tipo_registro else frozenset()
+        if campo not in enteros:
+            raise ErrorValidacion(f"El campo {campo} debe ser texto.")
+        if isinstance(valor, bool) or not isinstance(valor, int):
+            raise ErrorValidacion(f"El campo {campo} debe ser un número entero.")
+    
+    def validar_campo(self, campo: str, valor):
+        """
+        Valida y normaliza el valor de un campo.
+        
+        Las clases hijas lo sobrescriben con sus reglas (empezando por
+        `_verificar_tipo`); por defecto solo comprueba el tipo del valor.
+        
+        Args:
+            campo (str): Nombre del campo a validar
+            valor: Valor capturado para el campo
+        
+        Returns:
+            El valor normalizado
+        
+        Raises:
+            ValueError: Si el valor no cumple la regla del campo
+        """
+        self._verificar_tipo(campo, valor)
+        return valor
+    
+    def validar_datos(self, datos) -> list:
+        """
+        Valida un registro completo (sin ID) con las reglas de `validar_campo`.
+        
+        Args:
+            datos (dict or list): Diccionario campo -> valor, o secuencia con los
+                valores de `campos[1:]` en orden
+        
+        Returns:
+            list: Valores normalizados en el orden de `campos[1:]`
+        
+        Raises:
+            ValueError: Si algún campo no pasa las validaciones
+        """
+        if not isinstance(datos, dict):
+            datos = dict(zip(self.campos[1:], datos))
+        return [self.validar_campo(campo, datos.get(campo)) for campo in self.campos[1:]]
+    
+    @instrumentado
+    def importar_lote(self, registros, tamano_lote: int = 5000) -> dict:
+        """
+        Importa registros en bloque sin interacción con el usuario.
+        
+        Cada registro se valida con las mismas reglas que `agregar`; los válidos
+        se escriben en lotes de `tamano_lote` filas con una sola escritura y un
+        solo fsync por lote. Los registros inválidos no detienen la importación:
+        se reportan con su número de fila (empezando en 1). Si el registro trae
+        un ID, se ignora y se asigna uno nuevo.
+        
+        Args:
+            registros (iterable): Diccionarios campo -> valor o secuencias con los
+                valores de `campos[1:]`
+            tamano_lote (int): Número de filas válidas por escritura
+        
+        Returns:
+            dict: {"insertados": [IDs asignados], "errores": [(fila, mensaje), ...]}
+        """
+        reporte = {"insertados": [], "errores": []}
+        lote = []
+        pendientes = {}
+        for numero, datos in enumerate(registros, start=1):
+            try:
+                if isinstance(datos, Exception):
+                    raise datos
+                valores = self.validar_datos(datos)
+                self._verificar_unicos(None, valores, pendientes)
+                lote.append(valores)
+            except (TypeError, ValueError) as ve:
+                reporte["errores"].append((numero, str(ve)))
+                continue
+            
+            if len(lote) >= tamano_lote:
+                reporte["insertados"].extend(self.almacen.insertar_lote(lote))
+                lote = []
+                pendientes = {}
+        
+        if lote:
+            reporte["insertados"].extend(self.almacen.insertar_lote(lote))
+        return reporte
+    
+    def importar_archivo(self, ruta: str, tamano_lote: int = 5000) -> dict:
+        """
+        Importa registros desde un archivo CSV (con cabecera) o JSONL.
+        
+        El formato se decide por la extensión: `.jsonl` para un objeto JSON por
+        línea; cualquier otra se lee como CSV cuyas columnas se llaman como los
+        campos de la entidad. Las líneas JSON ilegibles se reportan como error.
+        
+        Args:
+            ruta (str): Ruta del archivo a importar
+            tamano_lote (int): Número de filas válidas por escritura
+        
+        Returns:
+            dict: Reporte con el mismo formato que `importar_lote`
+        """
+        with open(ruta, 'r', newline='', encoding='utf-8') as file:
+            if ruta.lower().endswith(".jsonl"):
+                return self.importar_lote(self._leer_jsonl(file), tamano_lote)
+            return self.importar_lote(csv.DictReader(file), tamano_lote)
+    
+    @staticmethod
+    def _leer_jsonl(file):
+        """Genera un diccionario por línea JSON, o el error si la línea es ilegible."""
+        for linea in file:
+            if not linea.strip():
+                continue
+            try:
+                yield json.loads(linea)
+            except json.JSONDecodeError as error:
+                yield ValueError(f"JSON inválido: {error}")
+    
     @abstractmethod
     def agregar(self):
         """
@@ -0,0 +1,343 @@
+"""
+Módulo EntidadAsincrona - API asyncio de los managers del Sistema Solrock Battle Association.
+
+Los managers hacen E/S de disco bloqueante. `EntidadAsincrona` envuelve uno y
+ofrece los mismos métodos como corrutinas, que corren el trabajo en los hilos
+de un `EjecutorDisco` sin bloquear el bucle de eventos:
+
+    async with abrir() as sistema:
+        participante = await sistema.participantes.obtener(1)
+        async for pokemon in sistema.pokemones.iterar():
+            ...
+        await sistema.cuentas.actualizar(3, usuario="brock")
+
+- Lecturas coalescidas: si varias corrutinas piden la misma lectura (mismo
+  método y mismos argumentos sobre la misma tabla) mientras una ya está en
+  curso, todas esperan esa única lectura. Una escritura terminada corta la
+  coalescencia de sus tablas, así que nadie recibe datos anteriores a una
+  escritura que ya vio terminar.
+- Escrituras serializadas por tabla: cada tabla tiene un `asyncio.Lock`, y las
+  escrituras de una misma tabla se ejecutan de a una, en orden de llegada. Las
+  lecturas no toman ese cerrojo, así que no esperan a las escrituras en cola.
+  Un borrado en cascada o una inscripción toman los cerrojos de todas las
+  tablas que modifican.
+
+Un `EjecutorDisco` debe usarse desde un único bucle de eventos.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from CuentaManager import CuentaManager
+from ParticipanteManager import ParticipanteManager
+from PokemonManager import PokemonManager
+from UnidadDeTrabajo import inscribir
+
+
+class EjecutorDisco:
+    """
+    Pool de hilos para la E/S de disco de las entidades asíncronas.
+
+    Además del pool, guarda las lecturas en curso (para coalescerlas) y los
+    cerrojos de escritura por tabla, así que todas las entidades que deban
+    coordinarse entre sí tienen que compartir el mismo ejecutor. Se cierra con
+    `cerrar()` o usándolo con `async with`.
+
+    Attributes:
+        hilos (int): Hilos del pool
+    """
+
+    def __init__(self, hilos: int = 8):
+        """
+        Args:
+            hilos (int): Operaciones de disco simultáneas como máximo
+        """
+        self.hilos = hilos
+        self._pool = ThreadPoolExecutor(hilos, thread_name_prefix="solrock-disco")
+        self._en_curso = {}
+        self._cerrojos = {}
+
+    async def leer(self, tabla: str, funcion, *args):
+        """
+        Ejecuta una lectura en el pool, o se suma a una idéntica que ya esté en curso.
+
+        La clave de coalescencia es (tabla, función, argumentos); si algún
+        argumento no es hashable, la lectura se ejecuta sola.
+
+        Args:
+            tabla (str): Archivo de la tabla que se lee
+            funcion (callable): Método del manager
+            *args: Argumentos del método
+
+        Returns:
+            El resultado de `funcion(*args)`; cada corrutina recibe su propia
+            copia de las listas del resultado
+        """
+        clave = (tabla, funcion, args)
+        try:
+            futuro = self._en_curso.get(clave)
+        except TypeError:
+            clave, futuro = None, None
+        if futuro is None:
+            futuro = asyncio.get_running_loop().run_in_executor(self._pool, partial(funcion, *args))
+            if clave is not None:
+                self._en_curso[clave] = futuro
+                futuro.add_done_callback(partial(self._olvidar, clave))
+        # shield: si una de las corrutinas que esperan se cancela, la lectura sigue para las demás
+        return _copiar(await asyncio.shield(futuro))
+
+    async def escribir(self, tablas, funcion, *args, **kwargs):
+        """
+        Ejecuta una escritura en el pool con los cerrojos de escritura de `tablas`.
+
+        Los cerrojos se toman en orden de nombre (sin interbloqueos entre
+        escrituras de varias tablas) y se liberan cuando el hilo termina, aunque
+        la corrutina que esperaba se haya cancelado antes.
+
+        Args:
+            tablas (iterable): Archivos de las tablas que la escritura modifica
+            funcion (callable): Método del manager
+            *args, **kwargs: Argumentos del método
+
+        Returns:
+            El resultado de `funcion(*args, **kwargs)`
+        """
+        tablas = sorted(set(tablas))
+        cerrojos = [self._cerrojos.setdefault(tabla, asyncio.Lock()) for tabla in tablas]
+        tomados = []
+        try:
+            for cerrojo in cerrojos:
+                await cerrojo.acquire()
+                tomados.append(cerrojo)
+        except BaseException:
+            for cerrojo in tomados:
+                cerrojo.release()
+            raise
+
+        futuro = asyncio.get_running_loop().run_in_executor(self._pool, partial(funcion, *args, **kwargs))
+        futuro.add_done_callback(lambda _: self._terminar_escritura(tablas, cerrojos))
+        return await asyncio.shield(futuro)
+
+    def _olvidar(self, clave, futuro) -> None:
+        """Quita una lectura terminada de las lecturas en curso (si sigue siendo la registrada)."""
+        if self._en_curso.get(clave) is futuro:
+            del self._en_curso[clave]
+
+    def _terminar_escritura(self, tablas: list, cerrojos: list) -> None:
+        """Corta la coalescencia de las tablas escritas y libera sus cerrojos."""
+        for clave in [clave for clave in self._en_curso if clave[0] in tablas]:
+            del self._en_curso[clave]
+        for cerrojo in cerrojos:
+            cerrojo.release()
+
+    def cerrar(self) -> None:
+        """Espera a que terminen las operaciones en curso y libera los hilos."""
+        self._pool.shutdown(wait=True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *excepcion) -> None:
+        await asyncio.get_running_loop().run_in_executor(None, self.cerrar)
+
+
+class EntidadAsincrona:
+    """
+    Versión asíncrona de un manager (`Entidad`).
+
+    Cada método es una corrutina que ejecuta el método homónimo del manager en
+    el `EjecutorDisco` y devuelve lo mismo (o lanza las mismas excepciones).
+    Los registros devueltos pueden estar compartidos con otras corrutinas y con
+    la caché del manager: no deben modificarse.
+
+    Attributes:
+        entidad (Entidad): Manager envuelto
+        ejecutor (EjecutorDisco): Ejecutor compartido con las demás entidades
+    """
+
+    def __init__(self, entidad, ejecutor: EjecutorDisco):
+        """
+        Args:
+            entidad (Entidad): Manager a envolver
+            ejecutor (EjecutorDisco): Ejecutor donde corre la E/S
+        """
+        self.entidad = entidad
+        self.ejecutor = ejecutor
+
+    def _leer(self, nombre: str, *args):
+        return self.ejecutor.leer(self.entidad.archivo, getattr(self.entidad, nombre), *args)
+
+    def _tablas_en_cascada(self) -> set:
+        """Archivos de esta tabla y de todas las que dependen de ella, directa o indirectamente."""
+        tablas = {self.entidad.archivo}
+        pendientes = [self.entidad]
+        while pendientes:
+            for dependiente, _ in pendientes.pop().dependientes:
+                if dependiente.archivo not in tablas:
+                    tablas.add(dependiente.archivo)
+                    pendientes.append(dependiente)
+        return tablas
+
+    # ----------------------------------------------------------------- lectura
+
+    async def obtener(self, id_entidad: int):
+        """Versión asíncrona de `Entidad.obtener`."""
+        return await self._leer("obtener", id_entidad)
+
+    async def buscar_por_id(self, id_buscar: int) -> tuple:
+        """Versión asíncrona de `Entidad.buscar_por_id`."""
+        return await self._leer("buscar_por_id", id_buscar)
+
+    async def existe(self, id_entidad: int) -> bool:
+        """Versión asíncrona de `Entidad.existe`."""
+        return await self._leer("existe", id_entidad)
+
+    async def obtener_ultimo_id(self) -> int:
+        """Versión asíncrona de `Entidad.obtener_ultimo_id`."""
+        return await self._leer("obtener_ultimo_id")
+
+    async def obtener_todos(self) -> list:
+        """Versión asíncrona de `Entidad.obtener_todos` (carga la tabla completa; ver `iterar`)."""
+        return await self._leer("obtener_todos")
+
+    async def pagina(self, cursor: str = None, limite: int = 20, filtro=None) -> tuple:
+        """Versión asíncrona de `Entidad.pagina`."""
+        return await self._leer("pagina", cursor, limite, filtro)
+
+    async def iterar(self, filtro=None, tamano_bloque: int = 1000):
+        """
+        Recorre los registros vigentes como iterador asíncrono (`async for`).
+
+        Lee la tabla por páginas de `tamano_bloque` registros, cada una en el
+        ejecutor, así que la memoria no depende del tamaño de la tabla.
+
+        Args:
+            filtro (callable): Función fila -> bool para seleccionar registros
+            tamano_bloque (int): Registros leídos por página
+
+        Yields:
+            Registro: Registros en el orden del almacén
+        """
+        cursor = None
+        while True:
+            registros, cursor = await self.pagina(cursor, tamano_bloque, filtro)
+            for registro in registros:
+                yield registro
+            if cursor is None:
+                return
+
+    async def buscar_por(self, campo: str, valor) -> list:
+        """Versión asíncrona de `Entidad.buscar_por`."""
+        return await self._leer("buscar_por", campo, valor)
+
+    async def buscar_rango(self, campo: str, desde=None, hasta=None, limite: int = None) -> list:
+        """Versión asíncrona de `Entidad.buscar_rango`."""
+        return await self._leer("buscar_rango", campo, desde, hasta, limite)
+
+    async def autocompletar(self, campo: str, prefijo: str, limite: int = 10) -> list:
+        """Versión asíncrona de `Entidad.autocompletar`."""
+        return await self._leer("autocompletar", campo, prefijo, limite)
+
+    async def buscar_aproximado(self, campo: str, texto: str, limite: int = 10,
+                                similitud_minima: float = 0.3) -> list:
+        """Versión asíncrona de `Entidad.buscar_aproximado`."""
+        return await self._leer("buscar_aproximado", campo, texto, limite, similitud_minima)
+
+    async def buscar_texto(self, campos, texto: str, limite: int = 10) -> list:
+        """Versión asíncrona de `Entidad.buscar_texto`."""
+        return await self._leer("buscar_texto", tuple(campos), texto, limite)
+
+    async def validar_integridad(self) -> dict:
+        """Versión asíncrona de `Entidad.validar_integridad`."""
+        return await self._leer("validar_integridad")
+
+    # --------------------------------------------------------------- escritura
+
+    async def crear(self, *args, **datos):
+        """Versión asíncrona de `crear` del manager (mismos argumentos)."""
+        return await self.ejecutor.escribir([self.entidad.archivo], self.entidad.crear, *args, **datos)
+
+    async def actualizar(self, id_entidad: int, **cambios):
+        """Versión asíncrona de `Entidad.actualizar`."""
+        return await self.ejecutor.escribir([self.entidad.archivo], self.entidad.actualizar,
+                                            id_entidad, **cambios)
+
+    async def borrar(self, id_entidad: int) -> None:
+        """Versión asíncrona de `Entidad.borrar`."""
+        return await self.ejecutor.escribir([self.entidad.archivo], self.entidad.borrar, id_entidad)
+
+    async def eliminar_en_cascada(self, id_entidad: int, simular: bool = False) -> dict:
+        """Versión asíncrona de `Entidad.eliminar_en_cascada`; bloquea las escrituras de las tablas dependientes."""
+        if simular:
+            return await self._leer("eliminar_en_cascada", id_entidad, True)
+        return await self.ejecutor.escribir(self._tablas_en_cascada(), self.entidad.eliminar_en_cascada,
+                                            id_entidad)
+
+    async def importar_lote(self, registros, tamano_lote: int = 5000) -> dict:
+        """Versión asíncrona de `Entidad.importar_lote` (`registros` se consume en el ejecutor)."""
+        return await self.ejecutor.escribir([self.entidad.archivo], self.entidad.importar_lote,
+                                            registros, tamano_lote)
+
+
+class SistemaAsincrono:
+    """
+    Los tres managers del directorio actual en versión asíncrona, sobre un
+    mismo `EjecutorDisco`. Se obtiene con `abrir()`.
+
+    Attributes:
+        ejecutor (EjecutorDisco): Ejecutor compartido
+        participantes (EntidadAsincrona): Participantes
+        cuentas (EntidadAsincrona): Cuentas
+        pokemones (EntidadAsincrona): Pokémones
+    """
+
+    def __init__(self, hilos: int = 8):
+        participante_manager = ParticipanteManager()
+        self.ejecutor = EjecutorDisco(hilos)
+        self.participantes = EntidadAsincrona(participante_manager, self.ejecutor)
+        self.cuentas = EntidadAsincrona(CuentaManager(participante_manager), self.ejecutor)
+        self.pokemones = EntidadAsincrona(PokemonManager(participante_manager), self.ejecutor)
+
+    async def inscribir(self, participante: dict, cuenta: dict = None, equipo=()) -> dict:
+        """
+        Versión asíncrona de `UnidadDeTrabajo.inscribir`: participante, cuenta y
+        equipo en una sola transacción, con los cerrojos de escritura de las tres tablas.
+        """
+        managers = (self.participantes.entidad, self.cuentas.entidad, self.pokemones.entidad)
+        return await self.ejecutor.escribir([manager.archivo for manager in managers], inscribir,
+                                            *managers, participante, cuenta, list(equipo))
+
+    def cerrar(self) -> None:
+        """Cierra el ejecutor (ver `EjecutorDisco.cerrar`)."""
+        self.ejecutor.cerrar()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *excepcion) -> None:
+        await self.ejecutor.__aexit__(*excepcion)
+
+
+def abrir(hilos: int = 8) -> SistemaAsincrono:
+    """
+    Construye los tres managers del directorio actual en versión asíncrona.
+
+    La construcción lee los datos de forma bloqueante; hágase antes de
+    arrancar el bucle de eventos o con `asyncio.to_thread(abrir)`.
+
+    Args:
+        hilos (int): Hilos del ejecutor de disco
+
+    Returns:
+        SistemaAsincrono: Para usar con `async with`
+    """
+    return SistemaAsincrono(hilos)
+
+
+def _copiar(resultado):
+    """Copia las listas del resultado (también dentro de una tupla) para que cada corrutina tenga la suya."""
+    if isinstance(resultado, list):
+        return list(resultado)
+    if isinstance(resultado, tuple) and any(isinstance(valor, list) for valor in resultado):
+        return tuple(list(valor) if isinstance(valor, list) else valor for valor in resultado)
+    return resultado
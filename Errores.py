@@ -0,0 +1,32 @@
+"""
+Módulo Errores - Excepciones del Sistema Solrock Battle Association.
+
+Define los errores que lanza la API programática de las entidades para que
+scripts, procesos de fondo o servidores puedan distinguirlos sin depender de
+mensajes impresos en consola.
+"""
+
+
+class ErrorEntidad(Exception):
+    """Error base de las operaciones sobre entidades."""
+
+
+class ErrorValidacion(ErrorEntidad, ValueError):
+    """
+    Un valor no cumple las reglas de su campo.
+
+    Hereda de ValueError para que el código que ya captura ValueError siga
+    funcionando igual.
+    """
+
+
+class ErrorIntegridad(ErrorValidacion):
+    """Una referencia a otra entidad (por ejemplo, el entrenador de un pokémon) no existe."""
+
+
+class RegistroNoEncontrado(ErrorEntidad, LookupError):
+    """No existe un registro vigente con el ID solicitado."""
+
+
+class CursorInvalido(ErrorEntidad, ValueError):
+    """El cursor de paginación está mal formado o ya no corresponde al archivo (por ejemplo, tras una compactación)."""
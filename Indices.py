@@ -0,0 +1,509 @@
+"""
+Módulo Indices - Índices secundarios en memoria para el Sistema Solrock Battle Association.
+
+Este módulo define los índices que una entidad puede declarar sobre sus campos
+(por ejemplo, el entrenador de un pokémon o el usuario de una cuenta) para
+resolver búsquedas por valor, por rango o por texto (prefijo y aproximada) sin
+recorrer el CSV.
+"""
+
+import unicodedata
+import warnings
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter
+from datetime import date
+from Errores import ErrorValidacion
+
+
+class IndiceHash:
+    """
+    Índice hash de un campo: valor -> conjunto de IDs que lo tienen.
+
+    Se construye una sola vez a partir de las filas vigentes y luego se mantiene
+    de forma incremental con `agregar` y `quitar`. Los valores se comparan como
+    texto, igual que se guardan en el CSV.
+
+    Attributes:
+        campo (str): Nombre del campo indexado
+        posicion (int): Posición del campo dentro de la fila
+        construido (bool): Si el índice refleja el contenido actual del archivo
+    """
+
+    def __init__(self, campo: str, posicion: int):
+        """
+        Inicializa un índice vacío, pendiente de construir.
+
+        Args:
+            campo (str): Nombre del campo indexado
+            posicion (int): Posición del campo dentro de la fila
+        """
+        self.campo = campo
+        self.posicion = posicion
+        self.construido = False
+        self._ids = {}
+        self._claves = {}
+
+    def construir(self, filas) -> None:
+        """
+        Rellena el índice a partir de todas las filas vigentes.
+
+        Args:
+            filas (iterable): Filas de la entidad, con el ID en la primera posición
+        """
+        self._ids = {}
+        self._claves = {}
+        for fila in filas:
+            self.agregar(int(fila[0]), fila)
+        self.construido = True
+
+    def invalidar(self) -> None:
+        """Descarta el contenido; se volverá a construir en la próxima consulta."""
+        self._ids = {}
+        self._claves = {}
+        self.construido = False
+
+    def agregar(self, id_entidad: int, fila) -> None:
+        """Registra (o actualiza) el valor del campo para el ID indicado."""
+        self.quitar(id_entidad)
+        clave = str(fila[self.posicion])
+        self._claves[id_entidad] = clave
+        self._ids.setdefault(clave, set()).add(id_entidad)
+
+    def quitar(self, id_entidad: int) -> None:
+        """Elimina el ID del índice, si estaba."""
+        clave = self._claves.pop(id_entidad, None)
+        if clave is None:
+            return
+        ids = self._ids[clave]
+        ids.discard(id_entidad)
+        if not ids:
+            del self._ids[clave]
+
+    def buscar(self, valor) -> set:
+        """
+        Devuelve los IDs cuyo campo tiene el valor indicado.
+
+        Args:
+            valor: Valor buscado (se compara como texto)
+
+        Returns:
+            set: IDs encontrados (conjunto vacío si no hay ninguno)
+        """
+        return set(self._ids.get(str(valor), ()))
+
+
+class IndiceUnico(IndiceHash):
+    """
+    Índice hash de un campo cuyo valor no puede repetirse entre registros.
+    """
+
+    def verificar(self, id_entidad, valor, ignorar=()) -> None:
+        """
+        Comprueba que ningún otro registro tenga ya el valor indicado.
+
+        Args:
+            id_entidad (int or None): ID del registro que tomará el valor (None si es nuevo)
+            valor: Valor a comprobar
+            ignorar (iterable): IDs cuyo valor actual no cuenta (por ejemplo,
+                registros que se editan o eliminan en la misma operación)
+
+        Raises:
+            ErrorValidacion: Si el valor ya pertenece a otro registro
+        """
+        if self.buscar(valor) - {id_entidad} - set(ignorar):
+            raise ErrorValidacion(f"Ya existe un registro con {self.campo} '{valor}'.")
+
+
+def fecha_ordinal(valor) -> int:
+    """
+    Convierte una fecha 'YYYY-MM-DD' (o un `date`) en su número ordinal.
+
+    Args:
+        valor (str or date): Fecha a convertir
+
+    Returns:
+        int: Ordinal de la fecha, útil como clave ordenable
+
+    Raises:
+        ValueError: Si el texto no es una fecha válida
+    """
+    if isinstance(valor, date):
+        return valor.toordinal()
+    return date.fromisoformat(str(valor)).toordinal()
+
+
+class IndiceOrdenado:
+    """
+    Índice ordenado de un campo para consultas por rango.
+
+    Mantiene una lista de pares (clave, id) ordenada; las consultas por rango
+    usan `bisect` y cuestan O(log n + k). Las altas y bajas son incrementales
+    (`insort` y borrado por posición).
+
+    Attributes:
+        campo (str): Nombre del campo indexado
+        posicion (int): Posición del campo dentro de la fila
+        convertir (callable): Función que transforma el valor del CSV en la clave
+            ordenable (por ejemplo `int` o `fecha_ordinal`)
+        construido (bool): Si el índice refleja el contenido actual del archivo
+    """
+
+    def __init__(self, campo: str, posicion: int, convertir=int):
+        """
+        Inicializa un índice vacío, pendiente de construir.
+
+        Args:
+            campo (str): Nombre del campo indexado
+            posicion (int): Posición del campo dentro de la fila
+            convertir (callable): Conversión del valor del CSV a clave ordenable
+        """
+        self.campo = campo
+        self.posicion = posicion
+        self.convertir = convertir
+        self.construido = False
+        self._pares = []
+        self._claves = {}
+
+    def construir(self, filas) -> None:
+        """
+        Rellena el índice a partir de todas las filas vigentes con un solo ordenamiento.
+
+        Args:
+            filas (iterable): Filas de la entidad, con el ID en la primera posición
+        """
+        self._claves = {}
+        for fila in filas:
+            clave = self._clave(fila)
+            if clave is not None:
+                self._claves[int(fila[0])] = clave
+        self._pares = sorted((clave, id_entidad) for id_entidad, clave in self._claves.items())
+        self.construido = True
+
+    def invalidar(self) -> None:
+        """Descarta el contenido; se volverá a construir en la próxima consulta."""
+        self._pares = []
+        self._claves = {}
+        self.construido = False
+
+    def agregar(self, id_entidad: int, fila) -> None:
+        """Registra (o actualiza) la clave del ID indicado."""
+        self.quitar(id_entidad)
+        clave = self._clave(fila)
+        if clave is None:
+            return
+        self._claves[id_entidad] = clave
+        insort(self._pares, (clave, id_entidad))
+
+    def quitar(self, id_entidad: int) -> None:
+        """Elimina el ID del índice, si estaba."""
+        clave = self._claves.pop(id_entidad, None)
+        if clave is None:
+            return
+        posicion = bisect_left(self._pares, (clave, id_entidad))
+        del self._pares[posicion]
+
+    def buscar(self, valor) -> set:
+        """Devuelve los IDs cuya clave es exactamente `valor`."""
+        return set(self.iterar_rango(valor, valor))
+
+    def iterar_rango(self, desde=None, hasta=None):
+        """
+        Genera los IDs cuya clave está en [desde, hasta], en orden de clave.
+
+        Args:
+            desde: Límite inferior incluido (None = sin límite)
+            hasta: Límite superior incluido (None = sin límite)
+
+        Yields:
+            int: IDs dentro del rango
+        """
+        inicio = 0 if desde is None else bisect_left(self._pares, (self.convertir(desde), -1))
+        fin = len(self._pares) if hasta is None else bisect_right(
+            self._pares, (self.convertir(hasta), float('inf'))
+        )
+        for posicion in range(inicio, fin):
+            yield self._pares[posicion][1]
+
+    def _clave(self, fila):
+        """
+        Calcula la clave de la fila, o None si el valor no es convertible.
+
+        Las entidades solo aceptan valores convertibles, así que uno que no lo
+        es viene de un CSV editado a mano: se avisa con un RuntimeWarning,
+        porque esa fila no aparecerá en ninguna búsqueda por rango.
+        """
+        try:
+            return self.convertir(fila[self.posicion])
+        except (TypeError, ValueError) as error:
+            warnings.warn(f"El registro {fila[0]} queda fuera del índice de {self.campo}: {error}",
+                          RuntimeWarning, stacklevel=2)
+            return None
+
+
+def normalizar_texto(valor) -> str:
+    """
+    Normaliza un texto para buscarlo: minúsculas, sin acentos y con los espacios colapsados.
+
+    Args:
+        valor: Texto a normalizar
+
+    Returns:
+        str: Texto normalizado ("José  Pérez" -> "jose perez")
+    """
+    valor = str(valor)
+    if valor.isascii():
+        return " ".join(valor.lower().split())
+    descompuesto = unicodedata.normalize("NFKD", valor.casefold())
+    sin_acentos = "".join(caracter for caracter in descompuesto if not unicodedata.combining(caracter))
+    return " ".join(sin_acentos.split())
+
+
+def trigramas(texto: str) -> set:
+    """
+    Devuelve los trigramas de un texto normalizado, con relleno en los extremos.
+
+    El relleno hace que las palabras cortas también tengan trigramas y que el
+    inicio y el final pesen más ("ana" -> {"  a", " an", "ana", "na "}).
+    """
+    relleno = f"  {texto} "
+    return {relleno[posicion:posicion + 3] for posicion in range(len(relleno) - 2)}
+
+
+def distancia_edicion(a: str, b: str) -> int:
+    """
+    Distancia de edición entre dos textos: inserciones, borrados, sustituciones
+    y transposiciones de dos caracteres vecinos ("bbo" -> "bob" cuesta 1).
+
+    Returns:
+        int: Número mínimo de ediciones
+    """
+    anterior2, anterior = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        actual = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            costo = a[i - 1] != b[j - 1]
+            actual[j] = min(anterior[j] + 1, actual[j - 1] + 1, anterior[j - 1] + costo)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                actual[j] = min(actual[j], anterior2[j - 2] + 1)
+        anterior2, anterior = anterior, actual
+    return anterior[-1]
+
+
+def similitud_texto(buscado: str, clave: str, trigramas_buscados: set = None) -> float:
+    """
+    Similitud (0 a 1) entre dos textos normalizados: la mayor entre el
+    coeficiente de Dice de sus trigramas y 1 - distancia de edición / largo.
+
+    Los trigramas castigan mucho un error en un texto corto ("bbo" y "bob"
+    solo comparten "  b": Dice 0.25); la distancia de edición lo ve como un
+    solo error (0.67).
+    """
+    buscados = trigramas(buscado) if trigramas_buscados is None else trigramas_buscados
+    propios = trigramas(clave)
+    dice = 2 * len(buscados & propios) / (len(buscados) + len(propios))
+    largo = max(len(buscado), len(clave))
+    if not largo:
+        return dice
+    return max(dice, 1 - distancia_edicion(buscado, clave) / largo)
+
+
+class IndiceTexto:
+    """
+    Índice de texto de un campo para autocompletar y para búsquedas tolerantes a errores.
+
+    Trabaja sobre los valores distintos del campo ya normalizados (ver
+    `normalizar_texto`), así que los campos con muchos valores repetidos (el
+    nombre de un pokémon, un movimiento) ocupan poco:
+
+    - una lista ordenada de valores para las búsquedas por prefijo, que con
+      `bisect` cuestan O(log n + k);
+    - un índice de trigramas (trigrama -> códigos de los valores que lo contienen)
+      para encontrar valores parecidos aunque tengan errores de tipeo. Los
+      candidatos salen de las listas de los trigramas menos frecuentes del texto
+      buscado, hasta `PRESUPUESTO_CANDIDATOS` entradas, para que la consulta siga
+      tardando milisegundos aunque la tabla tenga millones de filas.
+
+    Se mantiene de forma incremental con `agregar` y `quitar`. Las listas de
+    trigramas solo crecen: un valor que desaparece se marca como borrado y se
+    limpian todas juntas cuando los borrados superan a los vigentes.
+
+    Attributes:
+        campo (str): Nombre del campo indexado
+        posicion (int): Posición del campo dentro de la fila
+        construido (bool): Si el índice refleja el contenido actual del archivo
+    """
+
+    # Candidatos (por trigramas en común) que se puntúan por cada resultado pedido
+    CANDIDATOS_POR_RESULTADO = 20
+    # Entradas de listas de trigramas que se recorren como máximo por consulta...
+    PRESUPUESTO_CANDIDATOS = 100_000
+    # ...salvo las de los trigramas más raros, que se recorren siempre
+    LISTAS_MINIMAS = 2
+
+    def __init__(self, campo: str, posicion: int):
+        """
+        Inicializa un índice vacío, pendiente de construir.
+
+        Args:
+            campo (str): Nombre del campo indexado
+            posicion (int): Posición del campo dentro de la fila
+        """
+        self.campo = campo
+        self.posicion = posicion
+        self.invalidar()
+
+    def construir(self, filas) -> None:
+        """
+        Rellena el índice a partir de todas las filas vigentes con un solo ordenamiento.
+
+        Args:
+            filas (iterable): Filas de la entidad, con el ID en la primera posición
+        """
+        self.invalidar()
+        for fila in filas:
+            self._registrar(int(fila[0]), fila)
+        self._ordenadas = sorted(self._ids)
+        self.construido = True
+
+    def invalidar(self) -> None:
+        """Descarta el contenido; se volverá a construir en la próxima consulta."""
+        self._valores = {}
+        self._ids = {}
+        self._ordenadas = []
+        self._codigos = {}
+        self._textos = []
+        self._trigramas = {}
+        self._borrados = 0
+        self.construido = False
+
+    def agregar(self, id_entidad: int, fila) -> None:
+        """Registra (o actualiza) el valor del campo para el ID indicado."""
+        self.quitar(id_entidad)
+        clave = self._registrar(id_entidad, fila)
+        if len(self._ids[clave]) == 1:
+            insort(self._ordenadas, clave)
+
+    def quitar(self, id_entidad: int) -> None:
+        """Elimina el ID del índice, si estaba."""
+        valor = self._valores.pop(id_entidad, None)
+        if valor is None:
+            return
+        clave = normalizar_texto(valor)
+        ids = self._ids[clave]
+        ids.discard(id_entidad)
+        if ids:
+            return
+        del self._ids[clave]
+        del self._ordenadas[bisect_left(self._ordenadas, clave)]
+        self._textos[self._codigos.pop(clave)] = None
+        self._borrados += 1
+        if self._borrados > len(self._codigos):
+            self._reconstruir_trigramas()
+
+    def buscar(self, valor) -> set:
+        """Devuelve los IDs cuyo campo es exactamente `valor` (comparado como texto)."""
+        valor = str(valor)
+        return {id_entidad for id_entidad in self._ids.get(normalizar_texto(valor), ())
+                if self._valores[id_entidad] == valor}
+
+    def buscar_prefijo(self, prefijo: str, limite: int = 10) -> list:
+        """
+        IDs cuyo valor empieza por `prefijo` (sin distinguir mayúsculas ni acentos).
+
+        Args:
+            prefijo (str): Comienzo del valor buscado
+            limite (int): Número máximo de IDs a devolver
+
+        Returns:
+            list: IDs en orden alfabético de su valor (y por ID dentro de un mismo valor)
+        """
+        prefijo = normalizar_texto(prefijo)
+        resultado = []
+        for posicion in range(bisect_left(self._ordenadas, prefijo), len(self._ordenadas)):
+            clave = self._ordenadas[posicion]
+            if len(resultado) >= limite or not clave.startswith(prefijo):
+                break
+            resultado.extend(sorted(self._ids[clave])[:limite - len(resultado)])
+        return resultado
+
+    def buscar_aproximado(self, texto: str, limite: int = 10, similitud_minima: float = 0.3) -> list:
+        """
+        IDs cuyo valor se parece a `texto`, aunque tenga errores de tipeo.
+
+        Los candidatos son los valores con más trigramas en común con el texto
+        (contados sobre las listas de sus trigramas más raros); a los mejores se
+        les calcula `similitud_texto` (coeficiente de Dice de los trigramas o,
+        si es mayor, la basada en la distancia de edición, que tolera una
+        transposición en un nombre corto) y se ordenan por ella.
+
+        Args:
+            texto (str): Texto buscado
+            limite (int): Número máximo de IDs a devolver
+            similitud_minima (float): Similitud mínima (0 a 1) para aceptar un valor
+
+        Returns:
+            list: Pares (ID, similitud), de mayor a menor similitud
+        """
+        texto = normalizar_texto(texto)
+        buscados = trigramas(texto)
+        listas = sorted((self._trigramas[trigrama] for trigrama in buscados if trigrama in self._trigramas), key=len)
+        comunes = Counter()
+        presupuesto = self.PRESUPUESTO_CANDIDATOS
+        for numero, lista in enumerate(listas):
+            if numero >= self.LISTAS_MINIMAS and len(lista) > presupuesto:
+                break
+            comunes.update(lista)
+            presupuesto -= len(lista)
+
+        puntuados = []
+        for codigo, _ in comunes.most_common(limite * self.CANDIDATOS_POR_RESULTADO):
+            clave = self._textos[codigo]
+            if clave is None:
+                continue
+            similitud = similitud_texto(texto, clave, buscados)
+            if similitud >= similitud_minima:
+                puntuados.append((-similitud, clave))
+        puntuados.sort()
+
+        resultado = []
+        for similitud, clave in puntuados:
+            for id_entidad in sorted(self._ids[clave]):
+                if len(resultado) >= limite:
+                    return resultado
+                resultado.append((id_entidad, round(-similitud, 3)))
+        return resultado
+
+    def _registrar(self, id_entidad: int, fila) -> str:
+        """Guarda el valor del ID y da de alta su clave normalizada (sin tocar la lista ordenada)."""
+        valor = str(fila[self.posicion])
+        clave = normalizar_texto(valor)
+        self._valores[id_entidad] = valor
+        ids = self._ids.get(clave)
+        if ids is None:
+            ids = self._ids[clave] = set()
+            self._codigos[clave] = codigo = len(self._textos)
+            self._textos.append(clave)
+            self._indexar_trigramas(clave, codigo)
+        ids.add(id_entidad)
+        return clave
+
+    def _indexar_trigramas(self, clave: str, codigo: int) -> None:
+        """Agrega el código de la clave a la lista de cada uno de sus trigramas."""
+        for trigrama in trigramas(clave):
+            lista = self._trigramas.get(trigrama)
+            if lista is None:
+                lista = self._trigramas[trigrama] = array('i')
+            lista.append(codigo)
+
+    def _reconstruir_trigramas(self) -> None:
+        """Renumera los valores vigentes y rehace las listas de trigramas sin los borrados."""
+        claves = list(self._codigos)
+        self._codigos = {}
+        self._textos = []
+        self._trigramas = {}
+        self._borrados = 0
+        for codigo, clave in enumerate(claves):
+            self._codigos[clave] = codigo
+            self._textos.append(clave)
+            self._indexar_trigramas(clave, codigo)
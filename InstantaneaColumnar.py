@@ -0,0 +1,231 @@
+"""
+Módulo InstantaneaColumnar - Instantáneas binarias por columnas para el Sistema Solrock Battle Association.
+
+El CSV sigue siendo el formato de intercambio, pero leerlo obliga a analizar
+todo el texto en cada arranque. Una instantánea guarda las filas vigentes de
+una tabla por columnas: las numéricas como enteros de 64 bits de ancho fijo y
+las de texto como un arreglo de desplazamientos más un bloque de bytes UTF-8.
+Se abre con `mmap`, así que cargarla no copia ni analiza nada: las columnas
+numéricas son `memoryview` directos sobre el archivo y los textos se
+decodifican solo cuando se leen.
+
+Formato (cabecera little-endian; las columnas usan el orden de bytes de la
+máquina, little-endian en x86 y ARM; secciones alineadas a 8 bytes):
+
+    cabecera      "<8sqqqI": firma, tamaño y mtime (ns) del CSV de origen,
+                  número de filas y número de columnas
+    descriptores  por columna "<H" largo del nombre, el nombre en UTF-8,
+                  "<cqq" tipo (b"q" entero, b"s" texto), desplazamiento y
+                  longitud de su primera sección; las columnas de texto
+                  agregan "<qq" con el desplazamiento y la longitud del bloque
+    datos         enteros: n valores "q"; textos: n + 1 desplazamientos "q"
+                  seguidos (en su propia sección) del bloque de bytes
+"""
+
+import array
+import mmap
+import os
+import struct
+import sys
+
+FIRMA = b"ECOLUMN1"
+CABECERA = struct.Struct("<8sqqqI")
+ENTERO = b"q"
+TEXTO = b"s"
+
+
+class ColumnaTexto:
+    """
+    Columna de texto respaldada por el `mmap` de la instantánea.
+
+    Se comporta como una secuencia de solo lectura; cada acceso decodifica
+    únicamente el valor pedido.
+    """
+
+    def __init__(self, desplazamientos: memoryview, datos: memoryview, internar: bool = False):
+        """
+        Args:
+            desplazamientos (memoryview): n + 1 posiciones de inicio dentro de `datos`
+            datos (memoryview): Bytes UTF-8 de todos los valores, uno tras otro
+            internar (bool): Internar los textos leídos (columnas de pocos valores distintos)
+        """
+        self.desplazamientos = desplazamientos
+        self.datos = datos
+        self.internar = internar
+
+    def __len__(self) -> int:
+        return len(self.desplazamientos) - 1
+
+    def __getitem__(self, posicion: int) -> str:
+        if posicion < 0:
+            posicion += len(self)
+        if not 0 <= posicion < len(self):
+            raise IndexError(posicion)
+        valor = str(self.datos[self.desplazamientos[posicion]:self.desplazamientos[posicion + 1]], 'utf-8')
+        return sys.intern(valor) if self.internar else valor
+
+    def __iter__(self):
+        for posicion in range(len(self)):
+            yield self[posicion]
+
+
+class TablaColumnar:
+    """
+    Instantánea abierta con `mmap`.
+
+    Attributes:
+        campos (list): Nombres de las columnas, en el orden del CSV
+        firma (tuple): (tamaño, mtime en ns) del CSV a partir del cual se generó
+        columnas (dict): Nombre -> `memoryview` de enteros o `ColumnaTexto`
+    """
+
+    def __init__(self, ruta: str, categoricos=()):
+        """
+        Abre la instantánea.
+
+        Args:
+            ruta (str): Ruta del archivo de la instantánea
+            categoricos (iterable): Columnas de texto cuyos valores se internan al leerlos
+
+        Raises:
+            ValueError: Si el archivo no es una instantánea válida
+        """
+        with open(ruta, 'rb') as file:
+            self._mapa = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._vista = memoryview(self._mapa)
+            marca, tamano, mtime, filas, num_columnas = CABECERA.unpack_from(self._vista)
+            if marca != FIRMA:
+                raise ValueError(f"{ruta} no es una instantánea columnar.")
+            self.firma = (tamano, mtime)
+            self.filas = filas
+            self.campos = []
+            self.columnas = {}
+
+            posicion = CABECERA.size
+            for _ in range(num_columnas):
+                (largo,) = struct.unpack_from("<H", self._vista, posicion)
+                nombre = str(self._vista[posicion + 2:posicion + 2 + largo], 'utf-8')
+                posicion += 2 + largo
+                tipo, inicio, longitud = struct.unpack_from("<cqq", self._vista, posicion)
+                posicion += struct.calcsize("<cqq")
+                primera = self._vista[inicio:inicio + longitud].cast('q')
+                if tipo == ENTERO:
+                    columna = primera
+                else:
+                    inicio_datos, longitud_datos = struct.unpack_from("<qq", self._vista, posicion)
+                    posicion += 16
+                    columna = ColumnaTexto(primera, self._vista[inicio_datos:inicio_datos + longitud_datos],
+                                           internar=nombre in categoricos)
+                self.campos.append(nombre)
+                self.columnas[nombre] = columna
+        except (struct.error, TypeError, ValueError) as error:
+            self.cerrar()
+            raise ValueError(f"Instantánea dañada: {ruta} ({error})")
+
+    def __len__(self) -> int:
+        return self.filas
+
+    def columna(self, nombre: str):
+        """Devuelve la columna indicada (memoryview de enteros o `ColumnaTexto`)."""
+        return self.columnas[nombre]
+
+    def fila(self, posicion: int) -> list:
+        """Devuelve los valores de la fila en la posición indicada."""
+        return [self.columnas[campo][posicion] for campo in self.campos]
+
+    def __iter__(self):
+        columnas = [self.columnas[campo] for campo in self.campos]
+        for posicion in range(self.filas):
+            yield [columna[posicion] for columna in columnas]
+
+    def cerrar(self) -> None:
+        """Libera el `mmap`; las columnas obtenidas dejan de ser válidas."""
+        self.columnas = {}
+        vista = getattr(self, "_vista", None)
+        if vista is not None:
+            vista.release()
+            self._vista = None
+        try:
+            self._mapa.close()
+        except BufferError:
+            pass  # Aún hay columnas en uso; el mmap se libera cuando dejen de usarse
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excepcion):
+        self.cerrar()
+
+
+def escribir_instantanea(ruta: str, campos: list, enteros, filas, firma: tuple) -> int:
+    """
+    Escribe la instantánea de una tabla (en un temporal que luego la reemplaza).
+
+    Las columnas de `enteros` se guardan como enteros de 64 bits; si algún valor
+    no es entero (por ejemplo, editado a mano en el CSV), la columna se guarda
+    como texto.
+
+    Args:
+        ruta (str): Ruta de la instantánea
+        campos (list): Nombres de las columnas
+        enteros (iterable): Columnas numéricas
+        filas (iterable): Filas (o registros) vigentes, en orden
+        firma (tuple): (tamaño, mtime en ns) del CSV del que provienen las filas
+
+    Returns:
+        int: Número de filas escritas
+    """
+    numericas = {campo: array.array('q') for campo in campos if campo in enteros}
+    textos = {campo: (array.array('q', [0]), bytearray()) for campo in campos if campo not in enteros}
+    total = 0
+    for fila in filas:
+        for campo, valor in zip(campos, fila):
+            columna = numericas.get(campo)
+            if columna is not None:
+                if isinstance(valor, int):
+                    columna.append(valor)
+                    continue
+                # Valor no numérico: la columna pasa a guardarse como texto
+                desplazamientos, datos = array.array('q', [0]), bytearray()
+                for previo in numericas.pop(campo):
+                    datos += str(previo).encode('utf-8')
+                    desplazamientos.append(len(datos))
+                textos[campo] = (desplazamientos, datos)
+            desplazamientos, datos = textos[campo]
+            datos += ("" if valor is None else str(valor)).encode('utf-8')
+            desplazamientos.append(len(datos))
+        total += 1
+
+    secciones = []
+    descriptores = bytearray()
+    posicion = CABECERA.size + sum(2 + len(campo.encode('utf-8')) + struct.calcsize("<cqq")
+                                   + (0 if campo in numericas else 16) for campo in campos)
+
+    def reservar(datos: bytes) -> tuple:
+        nonlocal posicion
+        posicion += -posicion % 8
+        inicio = posicion
+        secciones.append((inicio, datos))
+        posicion += len(datos)
+        return inicio, len(datos)
+
+    for campo in campos:
+        nombre = campo.encode('utf-8')
+        descriptores += struct.pack("<H", len(nombre)) + nombre
+        if campo in numericas:
+            descriptores += struct.pack("<cqq", ENTERO, *reservar(numericas[campo].tobytes()))
+        else:
+            desplazamientos, datos = textos[campo]
+            descriptores += struct.pack("<cqq", TEXTO, *reservar(desplazamientos.tobytes()))
+            descriptores += struct.pack("<qq", *reservar(bytes(datos)))
+
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    with open(temporal, 'wb') as file:
+        file.write(CABECERA.pack(FIRMA, *firma, total, len(campos)))
+        file.write(descriptores)
+        for inicio, datos in secciones:
+            file.write(b"\0" * (inicio - file.tell()))
+            file.write(datos)
+    os.replace(temporal, ruta)
+    return total
@@ -3,11 +3,26 @@ Módulo MenuManager - Gestor de menús para el Sistema Solrock Battle Associatio
 
 Este módulo proporciona la interfaz de usuario por menús para interactuar con
 el sistema de gestión de participantes, cuentas y pokémones.
+
+Con la variable de entorno SOLROCK_PERFIL=1 la sesión se ejecuta bajo
+`cProfile` y `tracemalloc`; al salir del menú principal se escriben en el
+directorio actual el reporte `perfil_<fecha>.txt`, los datos crudos
+`perfil_<fecha>.pstats` y las métricas en `metricas_<fecha>.json` y
+`metricas_<fecha>.prom`.
 """
 
+import cProfile
+import io
+import os
+import pstats
+import sys
+import time
+import tracemalloc
+from Metricas import METRICAS
 from ParticipanteManager import ParticipanteManager
 from CuentaManager import CuentaManager
 from PokemonManager import PokemonManager
+from UnidadDeTrabajo import MAXIMO_EQUIPO, inscribir
 
 class MenuManager:
     """
@@ -20,15 +35,27 @@ class MenuManager:
         participante_manager (ParticipanteManager): Instancia para gestionar participantes
         cuenta_manager (CuentaManager): Instancia para gestionar cuentas
         pokemon_manager (PokemonManager): Instancia para gestionar pokémones
+        perfilar (bool): Si la sesión del menú principal se perfila con cProfile y tracemalloc
     """
     
-    def __init__(self):
+    # Registros por página en los listados, y por escritura al mostrar todo de una vez
+    TAMANO_PAGINA = 20
+    TAMANO_BLOQUE = 1000
+    # Funciones y líneas de asignación de memoria que se incluyen en el reporte de perfil
+    LINEAS_PERFIL = 40
+    
+    def __init__(self, perfilar: bool = None):
         """
         Inicializa el MenuManager y todas las dependencias.
         
         Crea las instancias de los managers necesarios y establece las relaciones
         entre ellos para el correcto funcionamiento del sistema.
+        
+        Args:
+            perfilar (bool): Perfilar la sesión del menú principal (None = según
+                la variable de entorno SOLROCK_PERFIL)
         """
+        self.perfilar = os.environ.get("SOLROCK_PERFIL") == "1" if perfilar is None else perfilar
         self.participante_manager = ParticipanteManager()
         self.cuenta_manager = CuentaManager(self.participante_manager)
         self.pokemon_manager = PokemonManager(self.participante_manager)
@@ -51,31 +78,70 @@ class MenuManager:
             3. Gestionar Pokémones
             4. Salir del sistema
         """
-        while True:
-            print("\n=== SISTEMA SOLROCK BATTLE ASSOCIATION ===")
-            print("1. Gestionar Participantes")
-            print("2. Gestionar Cuentas")
-            print("3. Gestionar Pokémones")
-            print("4. Salir")
-            
-            try:
-                opcion = int(input("Seleccione una opción: "))
+        perfil = self._iniciar_perfil() if self.perfilar else None
+        try:
+            while True:
+                print("\n=== SISTEMA SOLROCK BATTLE ASSOCIATION ===")
+                print("1. Gestionar Participantes")
+                print("2. Gestionar Cuentas")
+                print("3. Gestionar Pokémones")
+                print("4. Salir")
                 
-                if opcion == 1:
-                    self.mostrar_menu_participantes()
-                elif opcion == 2:
-                    self.mostrar_menu_cuentas()
-                elif opcion == 3:
-                    self.mostrar_menu_pokemones()
-                elif opcion == 4:
-                    print("¡Hasta pronto!")
-                    break
-                else:
-                    print("Opción no válida. Intente nuevamente.")
-            except ValueError:
-                print("Error: Debe ingresar un número entero.")
-            except Exception as e:
-                print(f"Error inesperado: {e}")
+                try:
+                    opcion = int(input("Seleccione una opción: "))
+                    
+                    if opcion == 1:
+                        self.mostrar_menu_participantes()
+                    elif opcion == 2:
+                        self.mostrar_menu_cuentas()
+                    elif opcion == 3:
+                        self.mostrar_menu_pokemones()
+                    elif opcion == 4:
+                        print("¡Hasta pronto!")
+                        break
+                    else:
+                        print("Opción no válida. Intente nuevamente.")
+                except ValueError:
+                    print("Error: Debe ingresar un número entero.")
+                except Exception as e:
+                    print(f"Error inesperado: {e}")
+        finally:
+            if perfil is not None:
+                self._volcar_perfil(perfil)
+    
+    def _iniciar_perfil(self) -> cProfile.Profile:
+        """Empieza a registrar llamadas (cProfile) y asignaciones de memoria (tracemalloc)."""
+        tracemalloc.start()
+        perfil = cProfile.Profile()
+        perfil.enable()
+        return perfil
+    
+    def _volcar_perfil(self, perfil: cProfile.Profile) -> None:
+        """
+        Detiene el perfilado y escribe el reporte de la sesión y las métricas.
+        
+        Args:
+            perfil (cProfile.Profile): Perfil iniciado por `_iniciar_perfil`
+        """
+        perfil.disable()
+        instantanea = tracemalloc.take_snapshot()
+        actual, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        
+        fecha = time.strftime("%Y%m%d_%H%M%S")
+        perfil.dump_stats(f"perfil_{fecha}.pstats")
+        texto = io.StringIO()
+        texto.write(f"=== Funciones por tiempo acumulado (top {self.LINEAS_PERFIL}) ===\n")
+        pstats.Stats(perfil, stream=texto).sort_stats("cumulative").print_stats(self.LINEAS_PERFIL)
+        texto.write(f"=== Memoria (tracemalloc): actual {actual / 2**20:.1f} MiB, pico {pico / 2**20:.1f} MiB ===\n")
+        for estadistica in instantanea.statistics("lineno")[:self.LINEAS_PERFIL]:
+            texto.write(f"{estadistica}\n")
+        with open(f"perfil_{fecha}.txt", 'w', encoding='utf-8') as file:
+            file.write(texto.getvalue())
+        
+        METRICAS.exportar_json(f"metricas_{fecha}.json")
+        METRICAS.exportar_prometheus(f"metricas_{fecha}.prom")
+        print(f"Perfil guardado en perfil_{fecha}.txt (métricas en metricas_{fecha}.json/.prom).")
     
     def mostrar_menu_participantes(self) -> None:
         """
@@ -90,7 +156,9 @@ class MenuManager:
             3. Editar participante
             4. Eliminar participante
             5. Listar todos los participantes
-            6. Volver al menú principal
+            6. Buscar participante por nombre
+            7. Inscribir participante con cuenta y equipo
+            8. Volver al menú principal
         """
         while True:
             print("\n--- GESTIÓN DE PARTICIPANTES ---")
@@ -99,7 +167,9 @@ class MenuManager:
             print("3. Editar participante")
             print("4. Eliminar participante")
             print("5. Listar todos los participantes")
-            print("6. Volver al menú principal")
+            print("6. Buscar participante por nombre")
+            print("7. Inscribir participante con cuenta y equipo")
+            print("8. Volver al menú principal")
             
             try:
                 opcion = int(input("Seleccione una opción: "))
@@ -118,6 +188,10 @@ class MenuManager:
                 elif opcion == 5:
                     self.listar_participantes()
                 elif opcion == 6:
+                    self.buscar_participantes()
+                elif opcion == 7:
+                    self.inscribir_participante()
+                elif opcion == 8:
                     break
                 else:
                     print("Opción no válida. Intente nuevamente.")
@@ -131,7 +205,8 @@ class MenuManager:
         Lista todos los participantes registrados en el sistema.
         
         Muestra una vista tabular de todos los participantes con sus
-        datos principales en formato legible.
+        datos principales en formato legible. Se muestran por páginas
+        (ver `listar_paginado`).
         
         Output Format:
             ID: [id], Nombre: [nombre], Edad: [edad], Ciudad: [ciudad]
@@ -140,15 +215,66 @@ class MenuManager:
             ID: 1, Nombre: Ash Ketchum, Edad: 10, Ciudad: Pueblo Paleta
         """
         print("\n--- LISTA DE PARTICIPANTES ---")
-        participantes = self.participante_manager.obtener_todos()
+        self.listar_paginado(
+            self.participante_manager,
+            lambda participante: f"ID: {participante[0]}, Nombre: {participante[1]}, Edad: {participante[2]}, Ciudad: {participante[3]}",
+            "No hay participantes registrados."
+        )
+    
+    def buscar_participantes(self) -> None:
+        """
+        Busca participantes por nombre (prefijo o parecido, sin distinguir acentos).
         
-        if not participantes:
-            print("No hay participantes registrados.")
-            return
+        Output Format:
+            ID: [id], Nombre: [nombre], Edad: [edad], Ciudad: [ciudad]
+        """
+        texto = input("Nombre (o parte del comienzo): ").strip()
+        participantes = self.participante_manager.buscar_texto(("nombre",), texto, self.TAMANO_PAGINA)
         
+        print("\n--- RESULTADOS DE LA BÚSQUEDA ---")
+        if not participantes:
+            print("No se encontraron participantes.")
         for participante in participantes:
             print(f"ID: {participante[0]}, Nombre: {participante[1]}, Edad: {participante[2]}, Ciudad: {participante[3]}")
     
+    def inscribir_participante(self) -> None:
+        """
+        Inscribe un participante, su cuenta y hasta `MAXIMO_EQUIPO` pokémones de una vez.
+        
+        Cada dato se valida al capturarlo; al final todo se guarda en una sola
+        unidad de trabajo, así que un error no deja al participante registrado
+        a medias.
+        """
+        print("\n--- INSCRIBIR PARTICIPANTE ---")
+        try:
+            participante = {campo: self.participante_manager.validar_campo(campo, input(etiqueta))
+                            for campo, etiqueta in (("nombre", "Nombre: "), ("edad", "Edad: "),
+                                                    ("ciudad", "Ciudad: "), ("telefono", "Teléfono: "))}
+            cuenta = {campo: self.cuenta_manager.validar_campo(campo, input(etiqueta))
+                      for campo, etiqueta in (("usuario", "Usuario: "), ("contrasena", "Contraseña: "),
+                                              ("fecha_creacion", "Fecha de creación (YYYY-MM-DD): "))}
+            equipo = []
+            while len(equipo) < MAXIMO_EQUIPO:
+                nombre = input(f"Pokémon {len(equipo) + 1} (Enter para terminar): ").strip()
+                if not nombre:
+                    break
+                equipo.append({
+                    "nombre": nombre,
+                    "tipo": self.pokemon_manager.validar_campo("tipo", input("  Tipo: ")),
+                    "nivel": self.pokemon_manager.validar_campo("nivel", input("  Nivel (1-100): ")),
+                    "movimiento_principal": self.pokemon_manager.validar_campo(
+                        "movimiento_principal", input("  Movimiento principal: ")),
+                })
+            
+            inscripcion = inscribir(self.participante_manager, self.cuenta_manager, self.pokemon_manager,
+                                    participante, cuenta, equipo)
+            print(f"Participante inscrito con éxito. ID: {inscripcion['participante'][0]}, "
+                  f"cuenta: {inscripcion['cuenta'][0]}, pokémones: {len(inscripcion['pokemones'])}")
+        except ValueError as ve:
+            print(f"Error de validación: {ve}")
+        except Exception as e:
+            print(f"Error al inscribir participante: {e}")
+    
     def mostrar_menu_cuentas(self) -> None:
         """
         Muestra el submenú para la gestión de cuentas de usuario.
@@ -203,20 +329,18 @@ class MenuManager:
         Lista todas las cuentas registradas en el sistema.
         
         Muestra información resumida de todas las cuentas existentes
-        con sus datos principales.
+        con sus datos principales. Se muestran por páginas
+        (ver `listar_paginado`).
         
         Output Format:
             ID: [id], ID Participante: [id_participante], Usuario: [usuario]
         """
         print("\n--- LISTA DE CUENTAS ---")
-        cuentas = self.cuenta_manager.obtener_todos()
-        
-        if not cuentas:
-            print("No hay cuentas registradas.")
-            return
-        
-        for cuenta in cuentas:
-            print(f"ID: {cuenta[0]}, ID Participante: {cuenta[1]}, Usuario: {cuenta[2]}")
+        self.listar_paginado(
+            self.cuenta_manager,
+            lambda cuenta: f"ID: {cuenta[0]}, ID Participante: {cuenta[1]}, Usuario: {cuenta[2]}",
+            "No hay cuentas registradas."
+        )
     
     def mostrar_menu_pokemones(self) -> None:
         """
@@ -231,7 +355,8 @@ class MenuManager:
             3. Editar pokémon
             4. Eliminar pokémon
             5. Listar todos los pokémones
-            6. Volver al menú principal
+            6. Buscar pokémon por nombre o movimiento
+            7. Volver al menú principal
         """
         while True:
             print("\n--- GESTIÓN DE POKÉMONES ---")
@@ -240,7 +365,8 @@ class MenuManager:
             print("3. Editar pokémon")
             print("4. Eliminar pokémon")
             print("5. Listar todos los pokémones")
-            print("6. Volver al menú principal")
+            print("6. Buscar pokémon por nombre o movimiento")
+            print("7. Volver al menú principal")
             
             try:
                 opcion = int(input("Seleccione una opción: "))
@@ -259,6 +385,8 @@ class MenuManager:
                 elif opcion == 5:
                     self.listar_pokemones()
                 elif opcion == 6:
+                    self.buscar_pokemones()
+                elif opcion == 7:
                     break
                 else:
                     print("Opción no válida. Intente nuevamente.")
@@ -272,18 +400,73 @@ class MenuManager:
         Lista todos los pokémones registrados en el sistema.
         
         Muestra información detallada de todos los pokémones con sus
-        características principales en formato legible.
+        características principales en formato legible. Se muestran por páginas
+        (ver `listar_paginado`).
         
         Output Format:
             ID: [id], Entrenador: [id_entrenador], Nombre: [nombre], 
             Tipo: [tipo], Nivel: [nivel]
         """
         print("\n--- LISTA DE POKÉMONES ---")
-        pokemones = self.pokemon_manager.obtener_todos()
+        self.listar_paginado(
+            self.pokemon_manager,
+            lambda pokemon: f"ID: {pokemon[0]}, Entrenador: {pokemon[1]}, Nombre: {pokemon[2]}, Tipo: {pokemon[3]}, Nivel: {pokemon[4]}",
+            "No hay pokémones registrados."
+        )
+    
+    def buscar_pokemones(self) -> None:
+        """
+        Busca pokémones por nombre o movimiento principal (prefijo o parecido).
         
-        if not pokemones:
-            print("No hay pokémones registrados.")
-            return
+        Output Format:
+            ID: [id], Entrenador: [id_entrenador], Nombre: [nombre], 
+            Tipo: [tipo], Nivel: [nivel], Movimiento: [movimiento_principal]
+        """
+        texto = input("Nombre o movimiento (o parte del comienzo): ").strip()
+        pokemones = self.pokemon_manager.buscar_texto(("nombre", "movimiento_principal"), texto, self.TAMANO_PAGINA)
         
+        print("\n--- RESULTADOS DE LA BÚSQUEDA ---")
+        if not pokemones:
+            print("No se encontraron pokémones.")
         for pokemon in pokemones:
-            print(f"ID: {pokemon[0]}, Entrenador: {pokemon[1]}, Nombre: {pokemon[2]}, Tipo: {pokemon[3]}, Nivel: {pokemon[4]}")
\ No newline at end of file
+            print(f"ID: {pokemon[0]}, Entrenador: {pokemon[1]}, Nombre: {pokemon[2]}, Tipo: {pokemon[3]}, Nivel: {pokemon[4]}, Movimiento: {pokemon[5]}")
+    
+    def listar_paginado(self, manager, formatear, mensaje_vacio: str) -> None:
+        """
+        Muestra los registros de una entidad por páginas.
+        
+        Cada página se lee con un cursor (sin cargar la tabla completa) y se
+        escribe en la consola con una sola operación. Tras cada página, si
+        quedan registros, el usuario puede seguir, mostrar todo lo que falta o
+        salir; al mostrar todo, los registros se escriben en bloques de
+        `TAMANO_BLOQUE`.
+        
+        Args:
+            manager (Entidad): Entidad a listar
+            formatear (callable): Función registro -> línea de texto
+            mensaje_vacio (str): Mensaje cuando no hay registros
+        """
+        tamano = self.TAMANO_PAGINA
+        mostrados = 0
+        filas, cursor = manager.pagina(None, tamano)
+        while True:
+            if filas:
+                sys.stdout.write("\n".join(formatear(fila) for fila in filas) + "\n")
+                sys.stdout.flush()
+                mostrados += len(filas)
+            if cursor is None:
+                break
+            # La página siguiente se lee antes de preguntar: si la anterior
+            # terminó justo en el último registro, no queda nada que ofrecer
+            filas, cursor = manager.pagina(cursor, tamano)
+            if not filas and cursor is None:
+                break
+            if tamano == self.TAMANO_PAGINA:
+                opcion = input("Enter: siguiente página | T: mostrar todo | S: salir: ").strip().upper()
+                if opcion == "S":
+                    break
+                if opcion == "T":
+                    tamano = self.TAMANO_BLOQUE
+        
+        if not mostrados:
+            print(mensaje_vacio)
\ No newline at end of file
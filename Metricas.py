@@ -0,0 +1,200 @@
+"""
+Módulo Metricas - Instrumentación de operaciones del Sistema Solrock Battle Association.
+
+Registra, por tabla y por operación (`crear`, `obtener`, `editar`...), el
+número de llamadas y de errores, un histograma del tiempo de reloj, las filas
+recorridas, los bytes leídos y escritos y los archivos abiertos. Las
+entidades marcan sus métodos con `@instrumentado` y el almacén informa de su
+E/S con `METRICAS.sumar`; la E/S se atribuye a todas las operaciones en curso
+del hilo (una operación incluye a las que llama) y al total de la tabla.
+
+El registro compartido `METRICAS` se exporta con `exportar_json` o
+`exportar_prometheus` (formato de texto de Prometheus).
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Límites superiores (segundos) de las cubetas del histograma de duración
+CUBETAS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+           0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Contadores de E/S que informa el almacén
+CONTADORES = ("filas_leidas", "bytes_leidos", "bytes_escritos", "aperturas")
+
+
+class Metricas:
+    """
+    Registro de métricas, seguro entre hilos.
+
+    Attributes:
+        activo (bool): Si es False, `operacion` y `sumar` no registran nada
+    """
+
+    def __init__(self):
+        self.activo = True
+        self._cerrojo = threading.Lock()
+        self._local = threading.local()
+        self._operaciones = {}
+        self._tablas = {}
+
+    def _pila(self) -> list:
+        """Acumuladores de E/S de las operaciones en curso del hilo actual."""
+        pila = getattr(self._local, "pila", None)
+        if pila is None:
+            pila = self._local.pila = []
+        return pila
+
+    @contextmanager
+    def operacion(self, tabla: str, nombre: str):
+        """
+        Mide una operación para usarla con `with`.
+
+        Args:
+            tabla (str): Tabla sobre la que opera (por ejemplo "pokemones.csv")
+            nombre (str): Nombre de la operación
+        """
+        if not self.activo:
+            yield
+            return
+        pila = self._pila()
+        acumulado = dict.fromkeys(CONTADORES, 0)
+        pila.append(acumulado)
+        error = False
+        inicio = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            error = True
+            raise
+        finally:
+            duracion = time.perf_counter() - inicio
+            pila.pop()
+            with self._cerrojo:
+                datos = self._operaciones.get((tabla, nombre))
+                if datos is None:
+                    datos = self._operaciones[(tabla, nombre)] = {
+                        "llamadas": 0, "errores": 0, "segundos": 0.0,
+                        "cubetas": [0] * len(CUBETAS), **dict.fromkeys(CONTADORES, 0),
+                    }
+                datos["llamadas"] += 1
+                datos["errores"] += error
+                datos["segundos"] += duracion
+                for posicion, limite in enumerate(CUBETAS):
+                    if duracion <= limite:
+                        datos["cubetas"][posicion] += 1
+                        break
+                for contador in CONTADORES:
+                    datos[contador] += acumulado[contador]
+
+    def sumar(self, tabla: str, **cantidades) -> None:
+        """
+        Suma contadores de E/S (`filas_leidas`, `bytes_leidos`, `bytes_escritos`,
+        `aperturas`) a la tabla y a las operaciones en curso del hilo.
+        """
+        if not self.activo:
+            return
+        for acumulado in self._pila():
+            for contador, cantidad in cantidades.items():
+                acumulado[contador] += cantidad
+        with self._cerrojo:
+            totales = self._tablas.setdefault(tabla, dict.fromkeys(CONTADORES, 0))
+            for contador, cantidad in cantidades.items():
+                totales[contador] += cantidad
+
+    def reiniciar(self) -> None:
+        """Descarta todo lo registrado."""
+        with self._cerrojo:
+            self._operaciones = {}
+            self._tablas = {}
+
+    def instantanea(self) -> dict:
+        """
+        Devuelve una copia de las métricas.
+
+        Returns:
+            dict: {"operaciones": [...], "tablas": {tabla: contadores}}; cada
+                operación incluye tabla, nombre, llamadas, errores, segundos,
+                el histograma acumulado ("cubetas": [[límite, llamadas <= límite], ...])
+                y los contadores de E/S
+        """
+        with self._cerrojo:
+            operaciones = []
+            for (tabla, nombre), datos in sorted(self._operaciones.items()):
+                acumuladas = 0
+                cubetas = []
+                for limite, cantidad in zip(CUBETAS, datos["cubetas"]):
+                    acumuladas += cantidad
+                    cubetas.append([limite, acumuladas])
+                operaciones.append({"tabla": tabla, "operacion": nombre,
+                                    **{clave: valor for clave, valor in datos.items() if clave != "cubetas"},
+                                    "cubetas": cubetas})
+            return {"operaciones": operaciones,
+                    "tablas": {tabla: dict(totales) for tabla, totales in sorted(self._tablas.items())}}
+
+    def exportar_json(self, ruta: str) -> None:
+        """Escribe la instantánea de las métricas como JSON."""
+        datos = {"fecha": time.strftime("%Y-%m-%dT%H:%M:%S"), **self.instantanea()}
+        _escribir(ruta, json.dumps(datos, indent=2, ensure_ascii=False))
+
+    def exportar_prometheus(self, ruta: str) -> None:
+        """Escribe la instantánea de las métricas en el formato de texto de Prometheus."""
+        datos = self.instantanea()
+        lineas = []
+
+        def metrica(nombre: str, tipo: str, ayuda: str) -> None:
+            lineas.append(f"# HELP solrock_{nombre} {ayuda}")
+            lineas.append(f"# TYPE solrock_{nombre} {tipo}")
+
+        def etiquetas(operacion: dict, **extra) -> str:
+            pares = {"tabla": operacion["tabla"], "operacion": operacion["operacion"], **extra}
+            return "{" + ",".join(f'{clave}="{valor}"' for clave, valor in pares.items()) + "}"
+
+        metrica("operaciones_total", "counter", "Llamadas por tabla y operación.")
+        lineas += [f"solrock_operaciones_total{etiquetas(op)} {op['llamadas']}" for op in datos["operaciones"]]
+        metrica("errores_total", "counter", "Llamadas que terminaron con una excepción.")
+        lineas += [f"solrock_errores_total{etiquetas(op)} {op['errores']}" for op in datos["operaciones"]]
+
+        metrica("operacion_segundos", "histogram", "Tiempo de reloj de cada llamada.")
+        for op in datos["operaciones"]:
+            for limite, acumuladas in op["cubetas"]:
+                lineas.append(f"solrock_operacion_segundos_bucket{etiquetas(op, le=limite)} {acumuladas}")
+            lineas.append(f"solrock_operacion_segundos_bucket{etiquetas(op, le='+Inf')} {op['llamadas']}")
+            lineas.append(f"solrock_operacion_segundos_sum{etiquetas(op)} {op['segundos']:.6f}")
+            lineas.append(f"solrock_operacion_segundos_count{etiquetas(op)} {op['llamadas']}")
+
+        for contador in CONTADORES:
+            metrica(f"{contador}_total", "counter", f"{contador.replace('_', ' ').capitalize()} por operación.")
+            lineas += [f"solrock_{contador}_total{etiquetas(op)} {op[contador]}" for op in datos["operaciones"]]
+            metrica(f"tabla_{contador}_total", "counter",
+                    f"{contador.replace('_', ' ').capitalize()} por tabla (incluye índices y compactación).")
+            lineas += [f'solrock_tabla_{contador}_total{{tabla="{tabla}"}} {totales[contador]}'
+                       for tabla, totales in datos["tablas"].items()]
+        _escribir(ruta, "\n".join(lineas) + "\n")
+
+
+def _escribir(ruta: str, texto: str) -> None:
+    """Escribe `texto` en un temporal que luego reemplaza a `ruta`."""
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    with open(temporal, 'w', encoding='utf-8') as file:
+        file.write(texto)
+    os.replace(temporal, ruta)
+
+
+# Registro compartido por todas las entidades y almacenes del proceso
+METRICAS = Metricas()
+
+
+def instrumentado(metodo):
+    """
+    Decorador para los métodos de las entidades: registra cada llamada en
+    `METRICAS` con la tabla de la entidad y el nombre del método.
+    """
+    @functools.wraps(metodo)
+    def envoltura(self, *args, **kwargs):
+        with METRICAS.operacion(self.almacen.tabla, metodo.__name__):
+            return metodo(self, *args, **kwargs)
+    return envoltura
@@ -5,9 +5,11 @@ Este módulo proporciona la funcionalidad CRUD (Crear, Leer, Actualizar, Elimina
 para gestionar los participantes del torneo Pokémon.
 """
 
-import csv
 import re
 from Entidad import Entidad
+from Errores import ErrorValidacion
+from Metricas import instrumentado
+from Registros import Participante
 
 class ParticipanteManager(Entidad):
     """
@@ -21,6 +23,13 @@ class ParticipanteManager(Entidad):
         campos (list): Lista de campos ['id_participante', 'nombre', 'edad', 'ciudad', 'telefono']
     """
     
+    # Índice ordenado para consultas por rango de edad
+    indices_rango = {"edad": int}
+    # Índice de texto para buscar por nombre (autocompletar y con errores de tipeo)
+    indices_texto = ("nombre",)
+    # Las lecturas devuelven registros tipados (Participante)
+    tipo_registro = Participante
+    
     def __init__(self):
         """
         Inicializa el manager de participantes con su archivo y estructura de datos.
@@ -33,6 +42,53 @@ class ParticipanteManager(Entidad):
             ["id_participante", "nombre", "edad", "ciudad", "telefono"]
         )
     
+    def validar_campo(self, campo: str, valor):
+        """
+        Valida y normaliza el valor de un campo de participante.
+        
+        Reúne las reglas usadas por `agregar`, `editar` e `importar_lote`:
+        nombre y ciudad no vacíos, edad entera entre 1 y 120 y teléfono con
+        dígitos, espacios, guiones, paréntesis o '+'.
+        
+        Args:
+            campo (str): Nombre del campo a validar
+            valor: Valor capturado para el campo
+        
+        Returns:
+            El valor normalizado (la edad se convierte a int)
+        
+        Raises:
+            ErrorValidacion: Si el valor no es del tipo esperado o no cumple la regla del campo
+        """
+        self._verificar_tipo(campo, valor)
+        if campo == "nombre" and not valor:
+            raise ErrorValidacion("El nombre no puede estar vacío.")
+        if campo == "edad":
+            try:
+                valor = int(valor)
+            except (TypeError, ValueError):
+                raise ErrorValidacion("La edad debe ser un número entero.")
+            if valor < 1 or valor > 120:
+                raise ErrorValidacion("La edad debe estar entre 1 y 120 años.")
+        if campo == "ciudad" and not valor:
+            raise ErrorValidacion("La ciudad no puede estar vacía.")
+        if campo == "telefono" and not re.match(r'^[\d\s\-\+\(\)]+$', str(valor or "")):
+            raise ErrorValidacion("El formato del teléfono no es válido.")
+        return valor
+    
+    def crear(self, nombre: str, edad: int, ciudad: str, telefono: str) -> list:
+        """
+        Valida y guarda un participante nuevo sin interacción con la consola.
+        
+        Returns:
+            Participante: Registro guardado, con el ID asignado en el primer campo
+        
+        Raises:
+            ErrorValidacion: Si algún campo no pasa las validaciones
+        """
+        return super().crear(nombre=nombre, edad=edad, ciudad=ciudad, telefono=telefono)
+    
+    @instrumentado
     def agregar(self) -> int:
         """
         Agrega un nuevo participante al sistema con validación de datos.
@@ -48,36 +104,23 @@ class ParticipanteManager(Entidad):
         """
         print("\n--- AGREGAR PARTICIPANTE ---")
         try:
-            with open(self.archivo, 'a', newline='', encoding='utf-8') as file:
-                writer = csv.writer(file)
-                
-                nuevo_id = self.obtener_ultimo_id()
-                
-                # Validación y captura de nombre
-                nombre = input("Nombre: ")
-                if not nombre:
-                    raise ValueError("El nombre no puede estar vacío.")
-                
-                # Validación y captura de edad
-                edad = int(input("Edad: "))
-                if edad < 1 or edad > 120:
-                    raise ValueError("La edad debe estar entre 1 y 120 años.")
-                
-                # Validación y captura de ciudad
-                ciudad = input("Ciudad: ")
-                if not ciudad:
-                    raise ValueError("La ciudad no puede estar vacía.")
-                
-                # Validación y captura de teléfono
-                telefono = input("Teléfono: ")
-                if not re.match(r'^[\d\s\-\+\(\)]+$', telefono):
-                    raise ValueError("El formato del teléfono no es válido.")
-                
-                # Guardar el nuevo participante
-                writer.writerow([nuevo_id, nombre, edad, ciudad, telefono])
-                print(f"Participante agregado con éxito. ID: {nuevo_id}")
-                return nuevo_id
-                
+            # Validación y captura de nombre
+            nombre = self.validar_campo("nombre", input("Nombre: "))
+            
+            # Validación y captura de edad
+            edad = self.validar_campo("edad", input("Edad: "))
+            
+            # Validación y captura de ciudad
+            ciudad = self.validar_campo("ciudad", input("Ciudad: "))
+            
+            # Validación y captura de teléfono
+            telefono = self.validar_campo("telefono", input("Teléfono: "))
+            
+            # Guardar el nuevo participante
+            registro = self.crear(nombre, edad, ciudad, telefono)
+            print(f"Participante agregado con éxito. ID: {registro[0]}")
+            return int(registro[0])
+            
         except ValueError as ve:
             print(f"Error de validación: {ve}")
             return None
@@ -85,6 +128,7 @@ class ParticipanteManager(Entidad):
             print(f"Error al agregar participante: {e}")
             return None
     
+    @instrumentado
     def consultar(self, id_participante: str) -> list:
         """
         Consulta un participante específico por su ID.
@@ -93,7 +137,7 @@ class ParticipanteManager(Entidad):
             id_participante (str): ID del participante a consultar (puede ser string)
         
         Returns:
-            list: Datos del participante [id, nombre, edad, ciudad, telefono] si se encuentra,
+            Participante: Datos del participante [id, nombre, edad, ciudad, telefono] si se encuentra,
                 None si no existe
         
         Raises:
@@ -123,6 +167,7 @@ class ParticipanteManager(Entidad):
             print(f"Error al consultar participante: {e}")
             return None
     
+    @instrumentado
     def editar(self, id_participante: str) -> bool:
         """
         Edita los datos de un participante existente.
@@ -143,50 +188,28 @@ class ParticipanteManager(Entidad):
         print("\n--- EDITAR PARTICIPANTE ---")
         try:
             id_participante = int(id_participante)
-            indice, row = self.buscar_por_id(id_participante)
+            _, row = self.buscar_por_id(id_participante)
             
             if not row:
                 print("Participante no encontrado.")
                 return False
             
-            # Leer todos los participantes
-            with open(self.archivo, 'r', encoding='utf-8') as file:
-                reader = csv.reader(file)
-                rows = list(reader)
-            
             print(f"\nEditando participante: {row[1]}")
             
             # Editar nombre con validación
-            nombre = input(f"Nuevo nombre ({row[1]}): ") or row[1]
-            if not nombre:
-                raise ValueError("El nombre no puede estar vacío.")
+            nombre = self.validar_campo("nombre", input(f"Nuevo nombre ({row[1]}): ") or row[1])
             
             # Editar edad con validación
-            try:
-                edad = input(f"Nueva edad ({row[2]}): ")
-                edad = int(edad) if edad else int(row[2])
-                if edad < 1 or edad > 120:
-                    raise ValueError("La edad debe estar entre 1 y 120 años.")
-            except ValueError:
-                raise ValueError("La edad debe ser un número entero.")
+            edad = self.validar_campo("edad", input(f"Nueva edad ({row[2]}): ") or row[2])
             
             # Editar ciudad con validación
-            ciudad = input(f"Nueva ciudad ({row[3]}): ") or row[3]
-            if not ciudad:
-                raise ValueError("La ciudad no puede estar vacía.")
+            ciudad = self.validar_campo("ciudad", input(f"Nueva ciudad ({row[3]}): ") or row[3])
             
             # Editar teléfono con validación
-            telefono = input(f"Nuevo teléfono ({row[4]}): ") or row[4]
-            if not re.match(r'^[\d\s\-\+\(\)]+$', telefono):
-                raise ValueError("El formato del teléfono no es válido.")
+            telefono = self.validar_campo("telefono", input(f"Nuevo teléfono ({row[4]}): ") or row[4])
             
-            # Actualizar los datos (indice + 1 porque la primera fila es la cabecera)
-            rows[indice + 1] = [id_participante, nombre, edad, ciudad, telefono]
-            
-            # Escribir todos los datos de vuelta al archivo
-            with open(self.archivo, 'w', newline='', encoding='utf-8') as file:
-                writer = csv.writer(file)
-                writer.writerows(rows)
+            # Actualizar los datos
+            self.actualizar(id_participante, nombre=nombre, edad=edad, ciudad=ciudad, telefono=telefono)
             
             print("Participante actualizado con éxito.")
             return True
@@ -198,10 +221,15 @@ class ParticipanteManager(Entidad):
             print(f"Error al editar participante: {e}")
             return False
     
+    @instrumentado
     def eliminar(self, id_participante: str) -> bool:
         """
         Elimina un participante del sistema después de confirmación.
         
+        La eliminación es en cascada: también se eliminan las cuentas y los
+        pokémones del participante. Antes de confirmar se muestra cuántos
+        registros de cada archivo se verán afectados.
+        
         Args:
             id_participante (str): ID del participante a eliminar
         
@@ -220,17 +248,11 @@ class ParticipanteManager(Entidad):
                 print("Participante no encontrado.")
                 return False
             
-            # Leer todos los participantes
-            with open(self.archivo, 'r', encoding='utf-8') as file:
-                reader = csv.reader(file)
-                rows = list(reader)
-            
-            # Filtrar el participante a eliminar
-            nuevos_rows = [rows[0]]  # Mantener la cabecera
-            
-            for row_data in rows[1:]:  # Saltar la cabecera
-                if row_data and row_data[0].isdigit() and int(row_data[0]) != id_participante:
-                    nuevos_rows.append(row_data)
+            # Mostrar los registros dependientes que también se eliminarán
+            afectados = self.eliminar_en_cascada(id_participante, simular=True)
+            for archivo, cantidad in afectados.items():
+                if archivo != self.archivo and cantidad:
+                    print(f"También se eliminarán {cantidad} registro(s) de {archivo}.")
             
             # Confirmación de eliminación
             print(f"¿Está seguro de eliminar al participante: {row[1]}?")
@@ -240,10 +262,7 @@ class ParticipanteManager(Entidad):
                 print("Eliminación cancelada.")
                 return False
             
-            # Escribir todos los datos de vuelta al archivo
-            with open(self.archivo, 'w', newline='', encoding='utf-8') as file:
-                writer = csv.writer(file)
-                writer.writerows(nuevos_rows)
+            self.eliminar_en_cascada(id_participante)
             
             print("Participante eliminado con éxito.")
             return True
@@ -6,8 +6,10 @@ para gestionar los pokémones de los participantes del torneo.
 """
 
 import re
-import csv
 from Entidad import Entidad
+from Errores import ErrorValidacion
+from Metricas import instrumentado
+from Registros import Pokemon
 
 class PokemonManager(Entidad):
     """
@@ -23,6 +25,15 @@ class PokemonManager(Entidad):
         participante_manager (ParticipanteManager): Instancia para validar entrenadores
     """
     
+    # Índice secundario para listar el equipo de un entrenador
+    indices_hash = ("id_entrenador",)
+    # Índice ordenado para consultas por rango de nivel
+    indices_rango = {"nivel": int}
+    # Índices de texto para buscar por nombre o movimiento (autocompletar y con errores de tipeo)
+    indices_texto = ("nombre", "movimiento_principal")
+    # Las lecturas devuelven registros tipados (Pokemon)
+    tipo_registro = Pokemon
+    
     def __init__(self, participante_manager):
         """
         Inicializa el manager de pokémones con su archivo y estructura de datos.
@@ -36,7 +47,64 @@ class PokemonManager(Entidad):
             ["id_pokemon", "id_entrenador", "nombre", "tipo", "nivel", "movimiento_principal"]
         )
         self.participante_manager = participante_manager
+        self.participante_manager.registrar_dependiente(self, "id_entrenador")
     
+    def validar_campo(self, campo: str, valor):
+        """
+        Valida y normaliza el valor de un campo de pokémon.
+        
+        Reúne las reglas usadas por `agregar`, `editar` e `importar_lote`: el
+        entrenador debe existir, nombre, tipo y movimiento principal no pueden
+        estar vacíos y el nivel debe ser un entero entre 1 y 100.
+        
+        Args:
+            campo (str): Nombre del campo a validar
+            valor: Valor capturado para el campo
+        
+        Returns:
+            El valor normalizado (ID de entrenador y nivel se convierten a int)
+        
+        Raises:
+            ErrorValidacion: Si el valor no es del tipo esperado o no cumple la regla del campo
+            ErrorIntegridad: Si la entidad referenciada no existe
+        """
+        self._verificar_tipo(campo, valor)
+        if campo == "id_entrenador":
+            valor = self.participante_manager.verificar_referencia(valor, "entrenador")
+        if campo == "nombre" and not valor:
+            raise ErrorValidacion("El nombre no puede estar vacío.")
+        if campo == "tipo" and not valor:
+            raise ErrorValidacion("El tipo no puede estar vacío.")
+        if campo == "nivel":
+            try:
+                valor = int(valor)
+            except (TypeError, ValueError):
+                raise ErrorValidacion("El nivel debe ser un número entero.")
+            if valor < 1 or valor > 100:
+                raise ErrorValidacion("El nivel debe estar entre 1 y 100.")
+        if campo == "movimiento_principal" and not valor:
+            raise ErrorValidacion("El movimiento principal no puede estar vacío.")
+        return valor
+    
+    def crear(self, id_entrenador: int, nombre: str, tipo: str, nivel: int, movimiento_principal: str) -> list:
+        """
+        Valida y guarda un pokémon nuevo sin interacción con la consola.
+        
+        Returns:
+            Pokemon: Registro guardado, con el ID asignado en el primer campo
+        
+        Raises:
+            ErrorValidacion: Si algún campo no pasa las validaciones
+        """
+        return super().crear(
+            id_entrenador=id_entrenador,
+            nombre=nombre,
+            tipo=tipo,
+            nivel=nivel,
+            movimiento_principal=movimiento_principal
+        )
+    
+    @instrumentado
     def agregar(self) -> int:
         """
         Agrega un nuevo pokémon al sistema con validación de datos.
@@ -53,43 +121,25 @@ class PokemonManager(Entidad):
         print("\n--- AGREGAR POKÉMON ---")
         try:
             # Verificar que el entrenador (participante) existe
-            id_entrenador = int(input("ID del entrenador (participante): "))
-            participante = self.participante_manager.consultar(id_entrenador)
+            id_entrenador = self.validar_campo("id_entrenador", input("ID del entrenador (participante): "))
             
-            if not participante:
-                print("Error: El entrenador no existe.")
-                return None
+            # Validación y captura de nombre del Pokémon
+            nombre = self.validar_campo("nombre", input("Nombre del Pokémon: "))
+            
+            # Validación y captura de tipo
+            tipo = self.validar_campo("tipo", input("Tipo: "))
+            
+            # Validación y captura de nivel
+            nivel = self.validar_campo("nivel", input("Nivel: "))
+            
+            # Validación y captura de movimiento principal
+            movimiento_principal = self.validar_campo("movimiento_principal", input("Movimiento principal: "))
+            
+            # Guardar el nuevo Pokémon
+            registro = self.crear(id_entrenador, nombre, tipo, nivel, movimiento_principal)
+            print(f"Pokémon agregado con éxito. ID: {registro[0]}")
+            return int(registro[0])
             
-            with open(self.archivo, 'a', newline='', encoding='utf-8') as file:
-                writer = csv.writer(file)
-                
-                nuevo_id = self.obtener_ultimo_id()
-                
-                # Validación y captura de nombre del Pokémon
-                nombre = input("Nombre del Pokémon: ")
-                if not nombre:
-                    raise ValueError("El nombre no puede estar vacío.")
-                
-                # Validación y captura de tipo
-                tipo = input("Tipo: ")
-                if not tipo:
-                    raise ValueError("El tipo no puede estar vacío.")
-                
-                # Validación y captura de nivel
-                nivel = int(input("Nivel: "))
-                if nivel < 1 or nivel > 100:
-                    raise ValueError("El nivel debe estar entre 1 y 100.")
-                
-                # Validación y captura de movimiento principal
-                movimiento_principal = input("Movimiento principal: ")
-                if not movimiento_principal:
-                    raise ValueError("El movimiento principal no puede estar vacío.")
-                
-                # Guardar el nuevo Pokémon
-                writer.writerow([nuevo_id, id_entrenador, nombre, tipo, nivel, movimiento_principal])
-                print(f"Pokémon agregado con éxito. ID: {nuevo_id}")
-                return nuevo_id
-                
         except ValueError as ve:
             print(f"Error de validación: {ve}")
             return None
@@ -97,6 +147,7 @@ class PokemonManager(Entidad):
             print(f"Error al agregar pokémon: {e}")
             return None
     
+    @instrumentado
     def consultar(self, id_pokemon: str) -> list:
         """
         Consulta un pokémon específico por su ID.
@@ -105,7 +156,7 @@ class PokemonManager(Entidad):
             id_pokemon (str): ID del pokémon a consultar (puede ser string)
         
         Returns:
-            list: Datos del pokémon [id, id_entrenador, nombre, tipo, nivel, movimiento] 
+            Pokemon: Datos del pokémon [id, id_entrenador, nombre, tipo, nivel, movimiento] 
                 si se encuentra, None si no existe
         
         Raises:
@@ -135,6 +186,7 @@ class PokemonManager(Entidad):
             print(f"Error al consultar pokémon: {e}")
             return None
     
+    @instrumentado
     def editar(self, id_pokemon: str) -> bool:
         """
         Edita los datos de un pokémon existente.
@@ -154,58 +206,44 @@ class PokemonManager(Entidad):
         print("\n--- EDITAR POKÉMON ---")
         try:
             id_pokemon = int(id_pokemon)
-            indice, row = self.buscar_por_id(id_pokemon)
+            _, row = self.buscar_por_id(id_pokemon)
             
             if not row:
                 print("Pokémon no encontrado.")
                 return False
             
             # Verificar que el nuevo entrenador existe si se cambia
-            nuevo_id_entrenador = input(f"Nuevo ID de entrenador ({row[1]}): ") or row[1]
-            participante = self.participante_manager.consultar(nuevo_id_entrenador)
-            
-            if not participante:
-                print("Error: El entrenador no existe.")
-                return False
-            
-            # Leer todos los pokémones
-            with open(self.archivo, 'r', encoding='utf-8') as file:
-                reader = csv.reader(file)
-                rows = list(reader)
+            nuevo_id_entrenador = self.validar_campo(
+                "id_entrenador",
+                input(f"Nuevo ID de entrenador ({row[1]}): ") or row[1]
+            )
             
             print(f"\nEditando pokémon: {row[2]}")
             
             # Editar nombre con validación
-            nombre = input(f"Nuevo nombre ({row[2]}): ") or row[2]
-            if not nombre:
-                raise ValueError("El nombre no puede estar vacío.")
+            nombre = self.validar_campo("nombre", input(f"Nuevo nombre ({row[2]}): ") or row[2])
             
             # Editar tipo con validación
-            tipo = input(f"Nuevo tipo ({row[3]}): ") or row[3]
-            if not tipo:
-                raise ValueError("El tipo no puede estar vacío.")
+            tipo = self.validar_campo("tipo", input(f"Nuevo tipo ({row[3]}): ") or row[3])
             
             # Editar nivel con validación
-            try:
-                nivel = input(f"Nuevo nivel ({row[4]}): ")
-                nivel = int(nivel) if nivel else int(row[4])
-                if nivel < 1 or nivel > 100:
-                    raise ValueError("El nivel debe estar entre 1 y 100.")
-            except ValueError:
-                raise ValueError("El nivel debe ser un número entero.")
+            nivel = self.validar_campo("nivel", input(f"Nuevo nivel ({row[4]}): ") or row[4])
             
             # Editar movimiento principal con validación
-            movimiento_principal = input(f"Nuevo movimiento principal ({row[5]}): ") or row[5]
-            if not movimiento_principal:
-                raise ValueError("El movimiento principal no puede estar vacío.")
+            movimiento_principal = self.validar_campo(
+                "movimiento_principal",
+                input(f"Nuevo movimiento principal ({row[5]}): ") or row[5]
+            )
             
             # Actualizar los datos
-            rows[indice + 1] = [id_pokemon, nuevo_id_entrenador, nombre, tipo, nivel, movimiento_principal]
-            
-            # Escribir todos los datos de vuelta al archivo
-            with open(self.archivo, 'w', newline='', encoding='utf-8') as file:
-                writer = csv.writer(file)
-                writer.writerows(rows)
+            self.actualizar(
+                id_pokemon,
+                id_entrenador=nuevo_id_entrenador,
+                nombre=nombre,
+                tipo=tipo,
+                nivel=nivel,
+                movimiento_principal=movimiento_principal
+            )
             
             print("Pokémon actualizado con éxito.")
             return True
@@ -217,6 +255,7 @@ class PokemonManager(Entidad):
             print(f"Error al editar pokémon: {e}")
             return False
     
+    @instrumentado
     def eliminar(self, id_pokemon: str) -> bool:
         """
         Elimina un pokémon del sistema después de confirmación.
@@ -239,18 +278,6 @@ class PokemonManager(Entidad):
                 print("Pokémon no encontrado.")
                 return False
             
-            # Leer todos los pokémones
-            with open(self.archivo, 'r', encoding='utf-8') as file:
-                reader = csv.reader(file)
-                rows = list(reader)
-            
-            # Filtrar el pokémon a eliminar
-            nuevos_rows = [rows[0]]  # Mantener la cabecera
-            
-            for row_data in rows[1:]:  # Saltar la cabecera
-                if row_data and row_data[0].isdigit() and int(row_data[0]) != id_pokemon:
-                    nuevos_rows.append(row_data)
-            
             # Confirmación de eliminación
             print(f"¿Está seguro de eliminar el pokémon: {row[2]}?")
             confirmacion = input("Escriba 'SI' para confirmar: ")
@@ -259,10 +286,7 @@ class PokemonManager(Entidad):
                 print("Eliminación cancelada.")
                 return False
             
-            # Escribir todos los datos de vuelta al archivo
-            with open(self.archivo, 'w', newline='', encoding='utf-8') as file:
-                writer = csv.writer(file)
-                writer.writerows(nuevos_rows)
+            self.borrar(id_pokemon)
             
             print("Pokémon eliminado con éxito.")
             return True
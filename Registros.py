@@ -0,0 +1,115 @@
+"""
+Módulo Registros - Registros tipados del Sistema Solrock Battle Association.
+
+Define las clases con las que las entidades devuelven sus filas: usan
+`__slots__` (sin diccionario por instancia), guardan los campos numéricos
+como `int` y comparten los textos de pocos valores distintos (tipo, ciudad,
+movimiento...) mediante `sys.intern`, de modo que una tabla cargada ocupa
+bastante menos memoria y los números no se vuelven a convertir en cada uso.
+"""
+
+import sys
+
+
+class Registro:
+    """
+    Clase base de los registros tipados.
+
+    Las subclases declaran sus campos en `__slots__` (en el orden del CSV), los
+    campos numéricos en `enteros` y los de baja cardinalidad en `categoricos`.
+    Un registro se comporta también como la fila de antes: admite `registro[i]`,
+    `len()` e iteración, así que el código que usaba listas sigue funcionando.
+    """
+
+    __slots__ = ()
+    enteros = frozenset()
+    categoricos = frozenset()
+
+    def __init__(self, *valores):
+        """
+        Crea el registro con los valores en el orden de `__slots__`.
+
+        Args:
+            *valores: Valores de los campos; los que falten quedan en None
+        """
+        for campo, valor in zip(self.__slots__, valores):
+            setattr(self, campo, valor)
+        for campo in self.__slots__[len(valores):]:
+            setattr(self, campo, None)
+
+    @classmethod
+    def desde_fila(cls, fila) -> "Registro":
+        """
+        Construye un registro a partir de una fila leída del CSV (o de una lista de valores).
+
+        Los campos de `enteros` se convierten a int (si un valor editado a mano no
+        es numérico se conserva como texto) y los de `categoricos` se internan.
+
+        Args:
+            fila (list): Valores en el orden de las columnas
+
+        Returns:
+            Registro: Registro tipado
+        """
+        valores = []
+        for campo, valor in zip(cls.__slots__, fila):
+            if campo in cls.enteros:
+                try:
+                    valor = int(valor)
+                except (TypeError, ValueError):
+                    pass
+            elif campo in cls.categoricos and isinstance(valor, str):
+                valor = sys.intern(valor)
+            valores.append(valor)
+        return cls(*valores)
+
+    def a_dict(self) -> dict:
+        """Devuelve el registro como diccionario campo -> valor."""
+        return {campo: getattr(self, campo) for campo in self.__slots__}
+
+    def __getitem__(self, posicion):
+        if isinstance(posicion, slice):
+            return [getattr(self, campo) for campo in self.__slots__[posicion]]
+        return getattr(self, self.__slots__[posicion])
+
+    def __len__(self) -> int:
+        return len(self.__slots__)
+
+    def __iter__(self):
+        return (getattr(self, campo) for campo in self.__slots__)
+
+    def __eq__(self, otro) -> bool:
+        if type(otro) is not type(self):
+            return NotImplemented
+        return tuple(self) == tuple(otro)
+
+    def __hash__(self) -> int:
+        return hash(tuple(self))
+
+    def __repr__(self) -> str:
+        valores = ", ".join(f"{campo}={getattr(self, campo)!r}" for campo in self.__slots__)
+        return f"{type(self).__name__}({valores})"
+
+
+class Participante(Registro):
+    """Participante del torneo."""
+
+    __slots__ = ("id_participante", "nombre", "edad", "ciudad", "telefono")
+    enteros = frozenset({"id_participante", "edad"})
+    categoricos = frozenset({"ciudad"})
+
+
+class Cuenta(Registro):
+    """Cuenta de usuario de un participante."""
+
+    __slots__ = ("id_cuenta", "id_participante", "usuario", "contrasena", "fecha_creacion")
+    enteros = frozenset({"id_cuenta", "id_participante"})
+    categoricos = frozenset({"fecha_creacion"})
+
+
+class Pokemon(Registro):
+    """Pokémon de un entrenador."""
+
+    __slots__ = ("id_pokemon", "id_entrenador", "nombre", "tipo", "nivel", "movimiento_principal")
+    enteros = frozenset({"id_pokemon", "id_entrenador", "nivel"})
+    categoricos = frozenset({"nombre", "tipo", "movimiento_principal"})
@@ -0,0 +1,130 @@
+"""
+Módulo Reportes - Reportes combinados del Sistema Solrock Battle Association.
+
+Une cada participante con sus cuentas y su equipo de pokémones mediante un
+hash join: `cuentas.csv` y `pokemones.csv` se leen una vez para construir
+tablas hash por participante y después `participantes.csv` se recorre una sola
+vez, generando un registro desnormalizado por participante. Exportar el roster
+completo cuesta así una pasada por archivo, sin consultas por ID.
+"""
+
+import csv
+import json
+from collections import defaultdict
+
+
+class ReporteRoster:
+    """
+    Roster de participantes con sus cuentas y pokémones.
+
+    Las contraseñas de las cuentas nunca se incluyen en el reporte.
+
+    Attributes:
+        participante_manager (ParticipanteManager): Tabla que se recorre en streaming
+        cuenta_manager (CuentaManager): Tabla indexada por `id_participante`
+        pokemon_manager (PokemonManager): Tabla indexada por `id_entrenador`
+    """
+
+    # Campos de cada tabla que aparecen en el reporte
+    CAMPOS_PARTICIPANTE = ("id_participante", "nombre", "edad", "ciudad", "telefono")
+    CAMPOS_CUENTA = ("id_cuenta", "usuario", "fecha_creacion")
+    CAMPOS_POKEMON = ("id_pokemon", "nombre", "tipo", "nivel", "movimiento_principal")
+
+    def __init__(self, participante_manager, cuenta_manager, pokemon_manager):
+        """
+        Args:
+            participante_manager (ParticipanteManager): Gestor de participantes
+            cuenta_manager (CuentaManager): Gestor de cuentas
+            pokemon_manager (PokemonManager): Gestor de pokémones
+        """
+        self.participante_manager = participante_manager
+        self.cuenta_manager = cuenta_manager
+        self.pokemon_manager = pokemon_manager
+
+    @staticmethod
+    def _tabla_hash(manager, clave: str, campos: tuple) -> dict:
+        """
+        Agrupa los registros de `manager` por el campo `clave` en una sola pasada.
+
+        Returns:
+            dict: valor de la clave (int) -> lista de diccionarios con `campos`
+        """
+        posicion = manager.campos.index(clave)
+        posiciones = [manager.campos.index(campo) for campo in campos]
+        tabla = defaultdict(list)
+        for registro in manager.iterar():
+            try:
+                id_padre = int(registro[posicion])
+            except (TypeError, ValueError):
+                continue
+            tabla[id_padre].append({campo: registro[i] for campo, i in zip(campos, posiciones)})
+        return tabla
+
+    def generar(self, filtro=None):
+        """
+        Genera un registro por participante con sus cuentas y pokémones.
+
+        Args:
+            filtro (callable): Función registro de participante -> bool
+
+        Yields:
+            dict: Campos del participante más las listas "cuentas" y "pokemones"
+        """
+        cuentas = self._tabla_hash(self.cuenta_manager, "id_participante", self.CAMPOS_CUENTA)
+        pokemones = self._tabla_hash(self.pokemon_manager, "id_entrenador", self.CAMPOS_POKEMON)
+
+        posiciones = [self.participante_manager.campos.index(campo) for campo in self.CAMPOS_PARTICIPANTE]
+        for participante in self.participante_manager.iterar(filtro=filtro):
+            registro = {campo: participante[i] for campo, i in zip(self.CAMPOS_PARTICIPANTE, posiciones)}
+            id_participante = int(participante[0])
+            registro["cuentas"] = cuentas.get(id_participante, [])
+            registro["pokemones"] = pokemones.get(id_participante, [])
+            yield registro
+
+    def exportar_jsonl(self, ruta: str, filtro=None) -> int:
+        """
+        Escribe el roster como JSONL: un participante (con sus listas anidadas) por línea.
+
+        Args:
+            ruta (str): Archivo de salida
+            filtro (callable): Función registro de participante -> bool
+
+        Returns:
+            int: Número de participantes exportados
+        """
+        total = 0
+        with open(ruta, 'w', encoding='utf-8') as file:
+            for registro in self.generar(filtro):
+                file.write(json.dumps(registro, ensure_ascii=False) + "\n")
+                total += 1
+        return total
+
+    def exportar_csv(self, ruta: str, filtro=None) -> int:
+        """
+        Escribe el roster como CSV plano, con una fila por pokémon de cada participante.
+
+        Es un left join: un participante sin pokémones aparece en una fila con
+        las columnas del pokémon vacías. Las cuentas se resumen en la columna
+        `usuarios` (separados por ';') para no multiplicar filas.
+
+        Args:
+            ruta (str): Archivo de salida
+            filtro (callable): Función registro de participante -> bool
+
+        Returns:
+            int: Número de filas escritas (sin la cabecera)
+        """
+        columnas_pokemon = [f"pokemon_{campo}" if campo == "nombre" else campo
+                            for campo in self.CAMPOS_POKEMON]
+        total = 0
+        with open(ruta, 'w', newline='', encoding='utf-8') as file:
+            writer = csv.writer(file)
+            writer.writerow([*self.CAMPOS_PARTICIPANTE, "usuarios", *columnas_pokemon])
+            for registro in self.generar(filtro):
+                base = [registro[campo] for campo in self.CAMPOS_PARTICIPANTE]
+                base.append(";".join(str(cuenta["usuario"]) for cuenta in registro["cuentas"]))
+                equipo = registro["pokemones"] or [dict.fromkeys(self.CAMPOS_POKEMON, "")]
+                writer.writerows([*base, *(pokemon[campo] for campo in self.CAMPOS_POKEMON)]
+                                 for pokemon in equipo)
+                total += len(equipo)
+        return total
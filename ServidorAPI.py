@@ -0,0 +1,559 @@
+"""
+Módulo ServidorAPI - API HTTP/JSON del Sistema Solrock Battle Association.
+
+Expone las operaciones de los managers sobre HTTP con `http.server` de la
+biblioteca estándar, para los kioscos del evento y las herramientas de
+llaves. Todas las conexiones comparten una sola instancia de cada manager
+(y por lo tanto sus índices en memoria y su caché de lecturas).
+
+Rutas (`<tabla>` es participantes, cuentas o pokemones):
+
+    GET    /<tabla>                   todos los registros, transmitidos por partes
+    GET    /<tabla>?campo=valor       registros con ese valor (índice si lo hay)
+    GET    /<tabla>?campo_desde=&campo_hasta=   rango sobre un campo de `indices_rango`
+    GET    /<tabla>?limite=20&cursor=C           una página: {"registros": [...], "cursor": ...}
+    GET    /<tabla>/buscar?q=texto    búsqueda por prefijo y aproximada (campos de texto)
+    POST   /<tabla>                   alta; el cuerpo es un objeto con todos los campos
+    GET    /<tabla>/<id>              un registro
+    PATCH  /<tabla>/<id>              edición de los campos enviados (también PUT)
+    DELETE /<tabla>/<id>[?simular=1]  baja en cascada; devuelve lo eliminado por archivo
+    GET    /<tabla>/<id>/<dependiente>   registros que lo referencian (p. ej. /participantes/3/pokemones)
+    POST   /inscripciones             participante, cuenta y equipo en una transacción
+    GET    /salud, GET /metricas
+
+Las contraseñas nunca aparecen en las respuestas. Los errores se devuelven
+como {"error": mensaje, "tipo": clase} con el estado HTTP correspondiente.
+
+Uso:
+    python ServidorAPI.py [--host 127.0.0.1] [--puerto 8080] [--hilos 8]
+                          [--directorio .] [--registrar]
+"""
+
+import argparse
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from itertools import chain, islice
+from urllib.parse import parse_qs, unquote, urlsplit
+from CuentaManager import CuentaManager
+from Errores import CursorInvalido, ErrorIntegridad, ErrorValidacion, RegistroNoEncontrado
+from Metricas import METRICAS
+from ParticipanteManager import ParticipanteManager
+from PokemonManager import PokemonManager
+from UnidadDeTrabajo import inscribir
+
+# Campos que nunca se envían al cliente
+CAMPOS_OCULTOS = frozenset({"contrasena"})
+# Registros por parte en las respuestas transmitidas, y tamaño máximo de un cuerpo
+TAMANO_LOTE = 500
+MAXIMO_CUERPO = 1024 * 1024
+
+
+class ErrorHTTP(Exception):
+    """Error de la petición (ruta, método o cuerpo) con su estado HTTP."""
+
+    def __init__(self, estado: int, mensaje: str):
+        super().__init__(mensaje)
+        self.estado = estado
+
+
+class CerrojoLectoresEscritor:
+    """
+    Cerrojo entre hilos que admite varios lectores o un solo escritor.
+
+    Los escritores tienen preferencia: cuando uno espera, no entran lectores
+    nuevos, así que una racha de lecturas no los deja esperando para siempre.
+    No es reentrante.
+    """
+
+    def __init__(self):
+        self._condicion = threading.Condition()
+        self._lectores = 0
+        self._escribiendo = False
+        self._escritores_esperando = 0
+
+    @contextmanager
+    def leyendo(self):
+        """Toma el cerrojo compartido para usarlo con `with`."""
+        with self._condicion:
+            while self._escribiendo or self._escritores_esperando:
+                self._condicion.wait()
+            self._lectores += 1
+        try:
+            yield
+        finally:
+            with self._condicion:
+                self._lectores -= 1
+                if not self._lectores:
+                    self._condicion.notify_all()
+
+    @contextmanager
+    def escribiendo(self):
+        """Toma el cerrojo exclusivo para usarlo con `with`."""
+        with self._condicion:
+            self._escritores_esperando += 1
+            while self._escribiendo or self._lectores:
+                self._condicion.wait()
+            self._escritores_esperando -= 1
+            self._escribiendo = True
+        try:
+            yield
+        finally:
+            with self._condicion:
+                self._escribiendo = False
+                self._condicion.notify_all()
+
+
+class ServidorAPI(HTTPServer):
+    """
+    Servidor HTTP que atiende cada conexión en un pool acotado de hilos.
+
+    Cada conexión (con keep-alive, varias peticiones) ocupa un hilo del pool
+    mientras dura; si todos están ocupados, las conexiones nuevas esperan en
+    la cola de `listen` hasta que uno se libere. Una conexión inactiva se
+    cierra a los `ManejadorAPI.timeout` segundos para devolver su hilo.
+
+    Las lecturas de los managers se hacen con el cerrojo compartido y las
+    escrituras con el exclusivo (`cerrojo`), porque los índices secundarios en
+    memoria no admiten que se modifiquen mientras otro hilo los consulta.
+
+    Attributes:
+        participante_manager (ParticipanteManager): Gestor de participantes
+        cuenta_manager (CuentaManager): Gestor de cuentas
+        pokemon_manager (PokemonManager): Gestor de pokémones
+        tablas (dict): Nombre de la tabla en la URL -> manager
+        cerrojo (CerrojoLectoresEscritor): Coordina lecturas y escrituras entre hilos
+        registrar_accesos (bool): Si se escribe una línea por petición en stderr
+    """
+
+    request_queue_size = 128
+    allow_reuse_address = True
+
+    def __init__(self, direccion: tuple, hilos: int = 8, registrar_accesos: bool = False):
+        """
+        Crea los managers en el directorio actual y abre el socket.
+
+        Args:
+            direccion (tuple): (host, puerto); el puerto 0 elige uno libre
+            hilos (int): Conexiones atendidas a la vez
+            registrar_accesos (bool): Escribir el registro de accesos en stderr
+        """
+        self.participante_manager = ParticipanteManager()
+        self.cuenta_manager = CuentaManager(self.participante_manager)
+        self.pokemon_manager = PokemonManager(self.participante_manager)
+        self.tablas = {
+            "participantes": self.participante_manager,
+            "cuentas": self.cuenta_manager,
+            "pokemones": self.pokemon_manager,
+        }
+        self.cerrojo = CerrojoLectoresEscritor()
+        self.registrar_accesos = registrar_accesos
+        self._pool = ThreadPoolExecutor(hilos, thread_name_prefix="api")
+        self._cupos = threading.BoundedSemaphore(hilos)
+        super().__init__(direccion, ManejadorAPI)
+
+    def process_request(self, request, client_address) -> None:
+        """Espera un hilo libre del pool y le entrega la conexión."""
+        self._cupos.acquire()
+        try:
+            self._pool.submit(self._atender, request, client_address)
+        except RuntimeError:
+            self._cupos.release()
+            self.shutdown_request(request)
+
+    def _atender(self, request, client_address) -> None:
+        """Atiende una conexión completa en un hilo del pool."""
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self._cupos.release()
+
+    def server_close(self) -> None:
+        """Cierra el socket y espera a que terminen las conexiones en curso."""
+        super().server_close()
+        self._pool.shutdown(wait=True)
+
+    def nombre_tabla(self, manager) -> str:
+        """Devuelve el nombre con el que aparece `manager` en las URL."""
+        return next(nombre for nombre, otro in self.tablas.items() if otro is manager)
+
+
+class ManejadorAPI(BaseHTTPRequestHandler):
+    """Atiende las peticiones de una conexión HTTP/1.1 (con keep-alive)."""
+
+    protocol_version = "HTTP/1.1"
+    server_version = "SolrockAPI/1.0"
+    # Segundos que una conexión puede estar inactiva antes de cerrarse
+    timeout = 15
+    # Encabezados y cuerpo salen en escrituras separadas: sin TCP_NODELAY, con
+    # keep-alive cada respuesta esperaría el ACK retardado del cliente (~40 ms)
+    disable_nagle_algorithm = True
+
+    def do_GET(self) -> None:
+        self._despachar("GET")
+
+    def do_POST(self) -> None:
+        self._despachar("POST")
+
+    def do_PUT(self) -> None:
+        self._despachar("PUT")
+
+    def do_PATCH(self) -> None:
+        self._despachar("PATCH")
+
+    def do_DELETE(self) -> None:
+        self._despachar("DELETE")
+
+    def log_message(self, formato, *args) -> None:
+        if self.server.registrar_accesos:
+            super().log_message(formato, *args)
+
+    # ------------------------------------------------------------------ despacho
+
+    def _despachar(self, metodo: str) -> None:
+        """Lee el cuerpo, resuelve la ruta y convierte las excepciones en respuestas."""
+        self._transmitiendo = False
+        try:
+            self._cuerpo = self._leer_cuerpo()
+            url = urlsplit(self.path)
+            partes = [unquote(parte) for parte in url.path.split("/") if parte]
+            parametros = {clave: valores[-1] for clave, valores in parse_qs(url.query).items()}
+            self._rutear(metodo, partes, parametros)
+        except Exception as error:
+            if self._transmitiendo:
+                # La respuesta ya empezó: solo queda cortar la conexión
+                self.log_error("Error durante la transmisión: %r", error)
+                self.close_connection = True
+                return
+            estado = self._estado_de(error)
+            if estado == 500:
+                self.log_error("Error interno: %r", error)
+            self._responder(estado, {"error": str(error) if estado != 500 else "Error interno del servidor.",
+                                     "tipo": type(error).__name__})
+
+    @staticmethod
+    def _estado_de(error: Exception) -> int:
+        """Estado HTTP que corresponde a una excepción."""
+        if isinstance(error, ErrorHTTP):
+            return error.estado
+        if isinstance(error, RegistroNoEncontrado):
+            return 404
+        if isinstance(error, ErrorIntegridad):
+            return 409
+        if isinstance(error, (ErrorValidacion, CursorInvalido)):
+            return 400
+        return 500
+
+    def _rutear(self, metodo: str, partes: list, parametros: dict) -> None:
+        """Ejecuta la operación que corresponde a la ruta y al método."""
+        servidor = self.server
+        if partes == ["salud"]:
+            self._exigir_metodo(metodo, "GET")
+            return self._responder(200, {"estado": "ok"})
+        if partes == ["metricas"]:
+            self._exigir_metodo(metodo, "GET")
+            return self._responder(200, METRICAS.instantanea())
+        if partes == ["inscripciones"]:
+            self._exigir_metodo(metodo, "POST")
+            return self._inscribir(self._leer_json())
+        if not partes or partes[0] not in servidor.tablas:
+            raise ErrorHTTP(404, "Ruta no encontrada.")
+
+        manager = servidor.tablas[partes[0]]
+        if len(partes) == 1:
+            self._exigir_metodo(metodo, "GET", "POST")
+            if metodo == "GET":
+                return self._listar(manager, parametros)
+            datos = self._leer_json()
+            self._verificar_campos(manager, datos, completos=True)
+            with servidor.cerrojo.escribiendo():
+                registro = manager.crear(**datos)
+            return self._responder(201, self._como_dict(manager, registro))
+
+        if len(partes) == 2 and partes[1] == "buscar":
+            self._exigir_metodo(metodo, "GET")
+            return self._buscar(manager, parametros)
+
+        id_entidad = self._convertir_id(partes[1])
+        if len(partes) == 2:
+            self._exigir_metodo(metodo, "GET", "PUT", "PATCH", "DELETE")
+            if metodo == "GET":
+                with servidor.cerrojo.leyendo():
+                    registro = manager.obtener(id_entidad)
+                return self._responder(200, self._como_dict(manager, registro))
+            if metodo == "DELETE":
+                with servidor.cerrojo.escribiendo():
+                    afectados = manager.eliminar_en_cascada(id_entidad, simular=parametros.get("simular") == "1")
+                return self._responder(200, {"eliminados": afectados, "simulado": parametros.get("simular") == "1"})
+            cambios = self._leer_json()
+            self._verificar_campos(manager, cambios, completos=False)
+            with servidor.cerrojo.escribiendo():
+                registro = manager.actualizar(id_entidad, **cambios)
+            return self._responder(200, self._como_dict(manager, registro))
+
+        if len(partes) == 3:
+            self._exigir_metodo(metodo, "GET")
+            for dependiente, campo in manager.dependientes:
+                if servidor.nombre_tabla(dependiente) == partes[2]:
+                    with servidor.cerrojo.leyendo():
+                        if not manager.existe(id_entidad):
+                            raise RegistroNoEncontrado(f"No existe el registro con ID {id_entidad}.")
+                        registros = dependiente.buscar_por(campo, id_entidad)
+                    return self._transmitir(dependiente, [registros])
+        raise ErrorHTTP(404, "Ruta no encontrada.")
+
+    @staticmethod
+    def _exigir_metodo(metodo: str, *permitidos) -> None:
+        if metodo not in permitidos:
+            raise ErrorHTTP(405, f"Método no permitido; use {', '.join(permitidos)}.")
+
+    @staticmethod
+    def _convertir_id(texto: str) -> int:
+        try:
+            return int(texto)
+        except ValueError:
+            raise ErrorHTTP(404, "Ruta no encontrada.")
+
+    @staticmethod
+    def _verificar_campos(manager, datos: dict, completos: bool) -> None:
+        """Rechaza campos desconocidos y, en un alta, campos faltantes."""
+        desconocidos = set(datos) - set(manager.campos[1:])
+        if desconocidos:
+            raise ErrorValidacion(f"Campos desconocidos: {', '.join(sorted(desconocidos))}.")
+        faltantes = [campo for campo in manager.campos[1:] if campo not in datos]
+        if completos and faltantes:
+            raise ErrorValidacion(f"Faltan campos: {', '.join(faltantes)}.")
+
+    # --------------------------------------------------------------- consultas
+
+    def _listar(self, manager, parametros: dict) -> None:
+        """Lista una tabla: completa (transmitida), filtrada o por páginas."""
+        cerrojo = self.server.cerrojo
+        parametros = dict(parametros)
+        limite = parametros.pop("limite", None)
+        cursor = parametros.pop("cursor", None)
+
+        rangos = {}
+        for campo in manager.indices_rango:
+            desde, hasta = parametros.pop(f"{campo}_desde", None), parametros.pop(f"{campo}_hasta", None)
+            if desde is not None or hasta is not None:
+                rangos[campo] = (desde, hasta)
+        desconocidos = set(parametros) - set(manager.campos)
+        if desconocidos:
+            raise ErrorHTTP(400, f"Parámetros desconocidos: {', '.join(sorted(desconocidos))}.")
+        limites = {campo: self._convertir_limites(manager, campo, desde, hasta)
+                   for campo, (desde, hasta) in rangos.items()}
+
+        if limite is not None:
+            if parametros or rangos:
+                raise ErrorHTTP(400, "La paginación con `limite` no admite filtros.")
+            try:
+                limite = int(limite)
+            except ValueError:
+                raise ErrorHTTP(400, "El límite debe ser un número entero.")
+            if not 1 <= limite <= TAMANO_LOTE:
+                raise ErrorHTTP(400, f"El límite debe estar entre 1 y {TAMANO_LOTE}.")
+            with cerrojo.leyendo():
+                registros, siguiente = manager.pagina(cursor, limite)
+            return self._responder(200, {"registros": [self._como_dict(manager, r) for r in registros],
+                                         "cursor": siguiente})
+
+        if not parametros and not rangos:
+            return self._transmitir(manager, self._lotes(manager))
+
+        # Un filtro resuelve la consulta (por índice si lo hay) y el resto se aplica a sus resultados
+        with cerrojo.leyendo():
+            if rangos:
+                campo, (desde, hasta) = next(iter(rangos.items()))
+                del rangos[campo]
+                registros = manager.buscar_rango(campo, desde, hasta)
+            else:
+                campo = next((campo for campo in parametros if campo in manager.indices), next(iter(parametros)))
+                registros = manager.buscar_por(campo, parametros.pop(campo))
+        for campo, valor in parametros.items():
+            posicion = manager.campos.index(campo)
+            registros = [registro for registro in registros if str(registro[posicion]) == valor]
+        for campo in rangos:
+            desde, hasta = limites[campo]
+            convertir = manager.indices_rango[campo]
+            posicion = manager.campos.index(campo)
+            filtrados = []
+            for registro in registros:
+                try:
+                    clave = convertir(registro[posicion])
+                except (TypeError, ValueError):
+                    continue  # Una celda que no se puede convertir no está en ningún rango
+                if (desde is None or clave >= desde) and (hasta is None or clave <= hasta):
+                    filtrados.append(registro)
+            registros = filtrados
+        return self._transmitir(manager, [registros])
+
+    @staticmethod
+    def _convertir_limites(manager, campo: str, desde, hasta) -> tuple:
+        """
+        Convierte los límites de un rango con la conversión del campo.
+
+        Raises:
+            ErrorValidacion: Si algún límite no tiene el formato del campo
+        """
+        convertir = manager.indices_rango[campo]
+        try:
+            return (None if desde is None else convertir(desde),
+                    None if hasta is None else convertir(hasta))
+        except (TypeError, ValueError):
+            raise ErrorValidacion(f"Límites no válidos para {campo}: {desde!r}, {hasta!r}.")
+
+    def _buscar(self, manager, parametros: dict) -> None:
+        """Búsqueda de texto (prefijo y aproximada) en los campos con índice de texto."""
+        if not manager.indices_texto:
+            raise ErrorHTTP(404, "La tabla no admite búsqueda de texto.")
+        try:
+            limite = int(parametros.get("limite", 10))
+        except ValueError:
+            raise ErrorHTTP(400, "El límite debe ser un número entero.")
+        with self.server.cerrojo.leyendo():
+            registros = manager.buscar_texto(manager.indices_texto, parametros.get("q", ""),
+                                             max(1, min(limite, TAMANO_LOTE)))
+        return self._transmitir(manager, [registros])
+
+    def _lotes(self, manager):
+        """Genera la tabla en lotes, con el cerrojo compartido solo mientras se lee cada uno."""
+        registros = manager.iterar(tamano_bloque=TAMANO_LOTE)
+        while True:
+            with self.server.cerrojo.leyendo():
+                lote = list(islice(registros, TAMANO_LOTE))
+            if not lote:
+                return
+            yield lote
+
+    def _inscribir(self, datos: dict) -> None:
+        """Registra participante, cuenta y equipo en una sola unidad de trabajo."""
+        servidor = self.server
+        participante = datos.get("participante")
+        if not isinstance(participante, dict):
+            raise ErrorValidacion("Falta el objeto `participante`.")
+        cuenta = datos.get("cuenta")
+        if cuenta is not None and not isinstance(cuenta, dict):
+            raise ErrorValidacion("`cuenta` debe ser un objeto o null.")
+        equipo = datos.get("equipo")
+        if equipo is None:
+            equipo = []
+        if not isinstance(equipo, list) or not all(isinstance(pokemon, dict) for pokemon in equipo):
+            raise ErrorValidacion("`equipo` debe ser una lista de objetos.")
+        with servidor.cerrojo.escribiendo():
+            inscripcion = inscribir(servidor.participante_manager, servidor.cuenta_manager,
+                                    servidor.pokemon_manager, participante, cuenta, equipo)
+        return self._responder(201, {
+            "participante": self._como_dict(servidor.participante_manager, inscripcion["participante"]),
+            "cuenta": (self._como_dict(servidor.cuenta_manager, inscripcion["cuenta"])
+                       if inscripcion["cuenta"] is not None else None),
+            "pokemones": [self._como_dict(servidor.pokemon_manager, pokemon)
+                          for pokemon in inscripcion["pokemones"]],
+        })
+
+    # --------------------------------------------------------------- entrada/salida
+
+    def _leer_cuerpo(self) -> bytes:
+        """Lee el cuerpo completo (aunque la petición vaya a fallar, para no desincronizar la conexión)."""
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            self.close_connection = True
+            raise ErrorHTTP(411, "Se requiere Content-Length.")
+        try:
+            longitud = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            self.close_connection = True
+            raise ErrorHTTP(400, "Content-Length no válido.")
+        if longitud > MAXIMO_CUERPO:
+            self.close_connection = True
+            raise ErrorHTTP(413, f"El cuerpo supera {MAXIMO_CUERPO} bytes.")
+        return self.rfile.read(longitud) if longitud > 0 else b""
+
+    def _leer_json(self) -> dict:
+        """Interpreta el cuerpo como un objeto JSON."""
+        try:
+            datos = json.loads(self._cuerpo or b"{}")
+        except (UnicodeDecodeError, json.JSONDecodeError) as error:
+            raise ErrorHTTP(400, f"JSON inválido: {error}")
+        if not isinstance(datos, dict):
+            raise ErrorHTTP(400, "El cuerpo debe ser un objeto JSON.")
+        return datos
+
+    @staticmethod
+    def _como_dict(manager, registro) -> dict:
+        """Convierte un registro en diccionario, sin los campos ocultos."""
+        datos = registro.a_dict() if hasattr(registro, "a_dict") else dict(zip(manager.campos, registro))
+        for campo in CAMPOS_OCULTOS.intersection(datos):
+            del datos[campo]
+        return datos
+
+    def _responder(self, estado: int, datos) -> None:
+        """Envía una respuesta JSON completa, con Content-Length."""
+        cuerpo = json.dumps(datos, ensure_ascii=False).encode('utf-8')
+        self.send_response(estado)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(cuerpo)))
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def _transmitir(self, manager, lotes) -> None:
+        """
+        Envía un arreglo JSON con codificación por partes (chunked): cada lote de
+        registros se serializa y se envía en cuanto está listo, sin armar la
+        respuesta completa en memoria.
+        """
+        lotes = iter(lotes)
+        primero = next(lotes, [])  # Los errores del primer lote aún pueden responderse con su estado
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        self._transmitiendo = True
+
+        separador = "["
+        for lote in chain([primero], lotes):
+            if not lote:
+                continue
+            texto = separador + ",".join(json.dumps(self._como_dict(manager, registro), ensure_ascii=False)
+                                         for registro in lote)
+            self._enviar_parte(texto.encode('utf-8'))
+            separador = ","
+        self._enviar_parte(b"[]" if separador == "[" else b"]")
+        self.wfile.write(b"0\r\n\r\n")
+        self._transmitiendo = False
+
+    def _enviar_parte(self, datos: bytes) -> None:
+        """Escribe una parte de una respuesta chunked."""
+        self.wfile.write(f"{len(datos):X}\r\n".encode('ascii') + datos + b"\r\n")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=8080, help="0 elige un puerto libre")
+    parser.add_argument("--hilos", type=int, default=8, help="conexiones atendidas a la vez")
+    parser.add_argument("--directorio", default=".", help="directorio de los datos")
+    parser.add_argument("--registrar", action="store_true", help="escribe el registro de accesos en stderr")
+    args = parser.parse_args()
+
+    os.chdir(args.directorio)
+    servidor = ServidorAPI((args.host, args.puerto), args.hilos, args.registrar)
+    host, puerto = servidor.server_address[:2]
+    print(f"Escuchando en http://{host}:{puerto} con {args.hilos} hilos", flush=True)
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,399 @@
+"""
+Módulo UnidadDeTrabajo - Transacciones entre entidades del Sistema Solrock Battle Association.
+
+Una unidad de trabajo acumula altas, ediciones y bajas de varias entidades
+(por ejemplo, un participante con su cuenta y su equipo de pokémones) sin
+tocar los archivos. Al confirmarla se bloquean todas las tablas, se validan
+juntas las operaciones (formatos, claves foráneas, incluidas las que apuntan
+a registros creados en la misma unidad, y valores únicos) y cada tabla recibe
+una sola escritura, todas confirmadas con un único fsync. Si algo falla no
+queda nada escrito, tampoco si el proceso cae a mitad de la escritura: con el
+motor CSV, la bitácora marca las escrituras de la unidad como una sola
+transacción y la recuperación descarta las de una que no terminó.
+
+Ejemplo::
+
+    with UnidadDeTrabajo(participantes, cuentas, pokemones) as unidad:
+        ash = unidad.crear(participantes, nombre="Ash", edad=10, ciudad="Pueblo Paleta",
+                           telefono="5512345678")
+        unidad.crear(cuentas, id_participante=ash, usuario="ash", contrasena="pikachu1",
+                     fecha_creacion="2024-01-01")
+        unidad.crear(pokemones, id_entrenador=ash, nombre="Pikachu", tipo="Electrico",
+                     nivel=5, movimiento_principal="Impactrueno")
+    print(ash.id)
+"""
+
+from contextlib import ExitStack
+from Errores import ErrorIntegridad, ErrorValidacion, RegistroNoEncontrado
+from Metricas import METRICAS
+
+# Pokémones que se pueden inscribir junto con un participante
+MAXIMO_EQUIPO = 6
+
+
+class Referencia:
+    """
+    Registro creado dentro de una unidad de trabajo.
+
+    Antes de confirmar la unidad, sirve como valor de una clave foránea (o como
+    ID en `actualizar` y `borrar`) en otras operaciones de la misma unidad.
+    Después de confirmarla, `id` y `registro` tienen el ID asignado y el
+    registro guardado.
+
+    Attributes:
+        entidad (Entidad): Entidad donde se crea el registro
+        id (int): ID asignado (None hasta confirmar)
+        registro: Registro guardado (None hasta confirmar)
+    """
+
+    __slots__ = ("entidad", "id", "registro")
+
+    def __init__(self, entidad):
+        self.entidad = entidad
+        self.id = None
+        self.registro = None
+
+    def __repr__(self) -> str:
+        return f"Referencia({self.entidad.archivo}, id={self.id})"
+
+
+class UnidadDeTrabajo:
+    """
+    Agrupa operaciones sobre varias entidades para confirmarlas o descartarlas juntas.
+
+    Las operaciones se validan en dos momentos: al agregarlas, los campos que
+    no dependen de otros registros (para avisar del error en la llamada que lo
+    causa); al confirmar, con todas las tablas bloqueadas, las claves foráneas,
+    los valores únicos y la existencia de los registros que se editan o borran.
+    No se puede borrar un registro al que todavía apunten registros de sus
+    entidades dependientes.
+
+    Al confirmar, las tablas se escriben en orden de dependencia (padres antes
+    que dependientes) con una sola escritura cada una, dentro de un único grupo
+    de confirmación y de una transacción del almacén (`Almacen.transaccion`).
+    Si una escritura falla, las tablas ya escritas se devuelven a su estado
+    anterior (con el motor SQLite, además, la transacción completa se deshace);
+    si el proceso cae antes de terminar, la recuperación del motor CSV descarta
+    lo escrito por la unidad en todas sus tablas. La secuencia de IDs solo
+    avanza si se escribe: si la unidad falla al validar (o, con SQLite, si su
+    transacción se deshace), los IDs que se habían asignado a sus altas pueden
+    volver a asignarse, así que las `Referencia` de una unidad que falla
+    vuelven a quedar sin ID.
+
+    Usada con `with`, la unidad se confirma al salir del bloque y se descarta
+    si el bloque termina con una excepción.
+
+    Attributes:
+        entidades (list): Entidades que participan, con los padres antes que sus dependientes
+        terminada (bool): Si ya se confirmó o descartó
+    """
+
+    def __init__(self, *entidades):
+        """
+        Args:
+            *entidades (Entidad): Entidades que pueden modificarse en la unidad;
+                deben compartir directorio (y motor de almacenamiento)
+
+        Raises:
+            ValueError: Si no se indica ninguna entidad
+        """
+        if not entidades:
+            raise ValueError("La unidad de trabajo necesita al menos una entidad.")
+        self.entidades = self._ordenar(list(dict.fromkeys(entidades)))
+        # Claves foráneas entre las entidades de la unidad: entidad -> {campo: entidad padre}
+        self._claves = {entidad: {} for entidad in self.entidades}
+        for padre in self.entidades:
+            for dependiente, campo in padre.dependientes:
+                if dependiente in self._claves:
+                    self._claves[dependiente][campo] = padre
+        self._operaciones = []
+        self.terminada = False
+
+    def __enter__(self) -> "UnidadDeTrabajo":
+        return self
+
+    def __exit__(self, tipo, valor, traza) -> bool:
+        if tipo is None and not self.terminada:
+            self.confirmar()
+        else:
+            self.descartar()
+        return False
+
+    @staticmethod
+    def _ordenar(entidades: list) -> list:
+        """Ordena las entidades para que cada padre quede antes que sus dependientes."""
+        orden = []
+        pendientes = list(entidades)
+        while pendientes:
+            for entidad in pendientes:
+                if not any(entidad is dependiente for otra in pendientes if otra is not entidad
+                           for dependiente, _ in otra.dependientes):
+                    orden.append(entidad)
+                    pendientes.remove(entidad)
+                    break
+            else:
+                raise ValueError("Las entidades tienen referencias circulares.")
+        return orden
+
+    # --------------------------------------------------------------- operaciones
+
+    def crear(self, entidad, **datos) -> Referencia:
+        """
+        Agrega el alta de un registro.
+
+        Args:
+            entidad (Entidad): Entidad donde se crea
+            **datos: Valores de los campos (todos excepto el ID); una clave
+                foránea puede ser una `Referencia` de la misma unidad
+
+        Returns:
+            Referencia: Registro pendiente, con ID y contenido tras confirmar
+
+        Raises:
+            ErrorValidacion: Si algún campo no existe o no pasa las validaciones
+        """
+        self._verificar_operacion(entidad)
+        entidad._verificar_campos(datos)
+        datos = self._validar_campos(entidad, {campo: datos.get(campo) for campo in entidad.campos[1:]})
+        referencia = Referencia(entidad)
+        self._operaciones.append(("crear", entidad, referencia, datos))
+        return referencia
+
+    def actualizar(self, entidad, id_entidad, **cambios) -> None:
+        """
+        Agrega la edición de los campos indicados de un registro.
+
+        Args:
+            entidad (Entidad): Entidad del registro
+            id_entidad (int or Referencia): Registro a modificar
+            **cambios: Nuevos valores de los campos a modificar
+
+        Raises:
+            ErrorValidacion: Si algún campo no existe o no pasa las validaciones
+        """
+        self._verificar_operacion(entidad)
+        entidad._verificar_campos(cambios)
+        self._operaciones.append(("actualizar", entidad, self._convertir_id(entidad, id_entidad),
+                                  self._validar_campos(entidad, cambios)))
+
+    def borrar(self, entidad, id_entidad) -> None:
+        """
+        Agrega la baja de un registro.
+
+        Args:
+            entidad (Entidad): Entidad del registro
+            id_entidad (int or Referencia): Registro a eliminar
+        """
+        self._verificar_operacion(entidad)
+        self._operaciones.append(("borrar", entidad, self._convertir_id(entidad, id_entidad), None))
+
+    def descartar(self) -> None:
+        """Olvida las operaciones pendientes sin escribir nada."""
+        self._operaciones = []
+        self.terminada = True
+
+    def confirmar(self) -> dict:
+        """
+        Valida todas las operaciones y las escribe (una escritura por tabla y un solo fsync).
+
+        Returns:
+            dict: Número de registros escritos o eliminados por archivo
+
+        Raises:
+            ErrorValidacion: Si alguna operación no pasa las validaciones
+            ErrorIntegridad: Si una clave foránea apunta a un registro que no
+                existe o se elimina, o si se borra un registro aún referenciado
+            RegistroNoEncontrado: Si se edita o borra un registro que no existe
+        """
+        if self.terminada:
+            raise RuntimeError("La unidad de trabajo ya fue confirmada o descartada.")
+        self.terminada = True
+
+        with METRICAS.operacion("unidad_de_trabajo", "confirmar"):
+            try:
+                # Bloquear en orden fijo (por nombre de archivo), como `eliminar_en_cascada`
+                with self.entidades[0].grupo(), ExitStack() as pila:
+                    for entidad in sorted(self.entidades, key=lambda entidad: entidad.archivo):
+                        pila.enter_context(entidad.almacen.bloquear())
+                    cambios, originales = self._planificar()
+                    self._validar(cambios)
+                    almacenes = [entidad.almacen for entidad in self.entidades]
+                    with almacenes[0].transaccion(almacenes):
+                        self._escribir(cambios, originales)
+            except BaseException:
+                for tipo, _, referencia, _ in self._operaciones:
+                    if tipo == "crear":
+                        referencia.id = None
+                raise
+
+        for tipo, entidad, referencia, _ in self._operaciones:
+            if tipo == "crear" and cambios[entidad][referencia.id] is not None:
+                referencia.registro = entidad._como_registro(cambios[entidad][referencia.id])
+        self._operaciones = []
+        return {entidad.archivo: len(cambios[entidad]) for entidad in self.entidades if cambios[entidad]}
+
+    # ---------------------------------------------------------------- auxiliares
+
+    def _verificar_operacion(self, entidad) -> None:
+        """Comprueba que la unidad siga abierta y que la entidad participe en ella."""
+        if self.terminada:
+            raise RuntimeError("La unidad de trabajo ya fue confirmada o descartada.")
+        if entidad not in self._claves:
+            raise ValueError(f"La entidad de {entidad.archivo} no participa en esta unidad de trabajo.")
+
+    def _convertir_id(self, entidad, id_entidad):
+        """Valida el ID de una edición o baja; una `Referencia` debe ser de la misma entidad."""
+        if isinstance(id_entidad, Referencia):
+            if id_entidad.entidad is not entidad:
+                raise ErrorValidacion(f"La referencia no es un registro de {entidad.archivo}.")
+            return id_entidad
+        return entidad._convertir_id(id_entidad)
+
+    def _validar_campos(self, entidad, datos: dict) -> dict:
+        """Valida los campos que no son claves foráneas dentro de la unidad."""
+        claves = self._claves[entidad]
+        return {campo: valor if campo in claves else entidad.validar_campo(campo, valor)
+                for campo, valor in datos.items()}
+
+    def _planificar(self) -> tuple:
+        """
+        Asigna IDs a las altas y calcula el estado final de cada registro tocado.
+
+        Returns:
+            tuple: (cambios, originales); ambos son entidad -> {id: fila o None}.
+                En `cambios`, None es una baja; en `originales`, que el registro
+                no existía antes de la unidad
+        """
+        siguientes = {entidad: entidad.almacen.siguiente_id() for entidad in self.entidades}
+        for tipo, entidad, referencia, _ in self._operaciones:
+            if tipo == "crear":
+                referencia.id = siguientes[entidad]
+                siguientes[entidad] += 1
+
+        cambios = {entidad: {} for entidad in self.entidades}
+        originales = {entidad: {} for entidad in self.entidades}
+        for tipo, entidad, objetivo, datos in self._operaciones:
+            if tipo == "crear":
+                originales[entidad][objetivo.id] = None
+                cambios[entidad][objetivo.id] = [objetivo.id, *(datos[campo] for campo in entidad.campos[1:])]
+                continue
+
+            id_entidad = objetivo.id if isinstance(objetivo, Referencia) else objetivo
+            if id_entidad in cambios[entidad]:
+                fila = cambios[entidad][id_entidad]
+            else:
+                _, fila = entidad.almacen.buscar(id_entidad)
+                fila = None if fila is None else list(fila)
+                originales[entidad][id_entidad] = fila
+            if fila is None:
+                raise RegistroNoEncontrado(f"No existe el registro con ID {id_entidad}.")
+
+            if tipo == "borrar":
+                cambios[entidad][id_entidad] = None
+            else:
+                fila = list(fila)
+                for campo, valor in datos.items():
+                    fila[entidad.campos.index(campo)] = valor
+                cambios[entidad][id_entidad] = fila
+        return cambios, originales
+
+    def _validar(self, cambios: dict) -> None:
+        """Valida el estado final: claves foráneas, valores únicos y bajas sin referencias."""
+        for entidad in self.entidades:
+            pendientes = {}
+            tocados = set(cambios[entidad])
+            claves = self._claves[entidad]
+            for id_entidad, fila in cambios[entidad].items():
+                if fila is None:
+                    continue
+                for posicion, campo in enumerate(entidad.campos[1:], start=1):
+                    if campo in claves:
+                        fila[posicion] = self._validar_referencia(entidad, campo, claves[campo],
+                                                                  fila[posicion], cambios)
+                    else:
+                        fila[posicion] = entidad.validar_campo(campo, fila[posicion])
+                entidad._verificar_unicos(id_entidad, fila[1:], pendientes, ignorar=tocados)
+
+        for padre in self.entidades:
+            for id_padre, fila in cambios[padre].items():
+                if fila is not None:
+                    continue
+                for dependiente, campo in padre.dependientes:
+                    tocados = cambios.get(dependiente, {})
+                    if dependiente._ids_por(campo, id_padre) - set(tocados):
+                        raise ErrorIntegridad(f"No se puede eliminar el registro {id_padre} de {padre.archivo}: "
+                                              f"todavía lo referencian registros de {dependiente.archivo}.")
+
+    def _validar_referencia(self, entidad, campo: str, padre, valor, cambios: dict) -> int:
+        """Valida una clave foránea considerando las altas y bajas de la unidad."""
+        if isinstance(valor, Referencia):
+            if valor.entidad is not padre:
+                raise ErrorValidacion(f"El campo {campo} debe referenciar un registro de {padre.archivo}.")
+            return valor.id
+        entidad._verificar_tipo(campo, valor)
+        try:
+            id_padre = int(valor)
+        except (TypeError, ValueError):
+            return entidad.validar_campo(campo, valor)
+        if id_padre in cambios[padre]:
+            if cambios[padre][id_padre] is None:
+                raise ErrorIntegridad(f"El registro {id_padre} de {padre.archivo} se elimina en la misma "
+                                      f"unidad de trabajo.")
+            return id_padre
+        return entidad.validar_campo(campo, id_padre)
+
+    def _escribir(self, cambios: dict, originales: dict) -> None:
+        """Escribe cada tabla una vez; si una escritura falla, restaura las ya intentadas."""
+        intentadas = []
+        try:
+            for entidad in self.entidades:
+                if not cambios[entidad]:
+                    continue
+                intentadas.append(entidad)
+                entidad.almacen.escribir_lote(
+                    [fila for fila in cambios[entidad].values() if fila is not None],
+                    [id_entidad for id_entidad, fila in cambios[entidad].items() if fila is None])
+        except BaseException:
+            for entidad in intentadas:
+                entidad.almacen.escribir_lote(
+                    [fila for fila in originales[entidad].values() if fila is not None],
+                    [id_entidad for id_entidad, fila in originales[entidad].items() if fila is None])
+            raise
+
+
+def inscribir(participante_manager, cuenta_manager, pokemon_manager,
+              participante: dict, cuenta: dict = None, equipo=()) -> dict:
+    """
+    Registra un participante con su cuenta y su equipo en una sola unidad de trabajo.
+
+    Args:
+        participante_manager (ParticipanteManager): Gestor de participantes
+        cuenta_manager (CuentaManager): Gestor de cuentas
+        pokemon_manager (PokemonManager): Gestor de pokémones
+        participante (dict): Campos del participante (sin ID)
+        cuenta (dict): Campos de la cuenta, sin `id_participante` (None = sin cuenta)
+        equipo (iterable): Campos de cada pokémon, sin `id_entrenador`
+
+    Returns:
+        dict: {"participante": registro, "cuenta": registro o None, "pokemones": [registros]}
+
+    Raises:
+        ErrorValidacion: Si algún dato no es válido o el equipo tiene más de
+            `MAXIMO_EQUIPO` pokémones; en ese caso no se guarda nada
+    """
+    equipo = list(equipo)
+    if len(equipo) > MAXIMO_EQUIPO:
+        raise ErrorValidacion(f"El equipo no puede tener más de {MAXIMO_EQUIPO} pokémones.")
+
+    with UnidadDeTrabajo(participante_manager, cuenta_manager, pokemon_manager) as unidad:
+        entrenador = unidad.crear(participante_manager, **participante)
+        nueva_cuenta = None
+        if cuenta is not None:
+            nueva_cuenta = unidad.crear(cuenta_manager, **{**cuenta, "id_participante": entrenador})
+        pokemones = [unidad.crear(pokemon_manager, **{**pokemon, "id_entrenador": entrenador})
+                     for pokemon in equipo]
+    return {
+        "participante": entrenador.registro,
+        "cuenta": nueva_cuenta.registro if nueva_cuenta else None,
+        "pokemones": [pokemon.registro for pokemon in pokemones],
+    }
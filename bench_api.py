@@ -0,0 +1,177 @@
+"""
+Prueba de carga de la API HTTP (ServidorAPI.py) del Sistema Solrock Battle Association.
+
+Levanta el servidor en un subproceso, sobre un directorio temporal con un
+torneo sintético de N filas por tabla (`bench_suite.generar`), o apunta a una
+instancia ya en marcha con --url. Después abre C clientes, cada uno con una
+única conexión keep-alive, que durante D segundos envían una mezcla de
+peticiones:
+
+    obtener        GET /participantes/<id>              (70 %)
+    equipo         GET /participantes/<id>/pokemones    (15 %)
+    pagina         GET /pokemones?limite=20             (5 %)
+    editar         PATCH /participantes/<id>            (7 %)
+    inscribir      POST /participantes                  (3 %)
+
+Reporta peticiones por segundo totales y, por tipo de petición, cantidad,
+latencias p50/p99 y errores (respuestas 5xx o fallos de conexión).
+
+Uso:
+    python bench_api.py [--filas 100000] [--clientes 8] [--duracion 10]
+                        [--hilos 8] [--motor csv] [--url http://host:puerto]
+                        [--json bench_api.json]
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlsplit
+from bench_suite import generar, percentil
+
+# (nombre, peso) de cada tipo de petición
+MEZCLA = (("obtener", 70), ("equipo", 15), ("pagina", 5), ("editar", 7), ("inscribir", 3))
+
+
+def peticion(tipo: str, azar: random.Random, filas: int) -> tuple:
+    """Arma una petición del tipo indicado: (método, ruta, cuerpo o None)."""
+    id_participante = azar.randint(1, filas)
+    if tipo == "obtener":
+        return "GET", f"/participantes/{id_participante}", None
+    if tipo == "equipo":
+        return "GET", f"/participantes/{id_participante}/pokemones", None
+    if tipo == "pagina":
+        return "GET", "/pokemones?limite=20", None
+    if tipo == "editar":
+        return "PATCH", f"/participantes/{id_participante}", {"edad": azar.randint(10, 80)}
+    return "POST", "/participantes", {"nombre": f"Carga {azar.randint(1, 10 ** 6)}", "edad": 25,
+                                      "ciudad": "Pueblo Paleta", "telefono": f"55{azar.randint(0, 10 ** 8 - 1):08d}"}
+
+
+def cliente(host: str, puerto: int, filas: int, fin: float, semilla: int, resultados: dict) -> None:
+    """Envía peticiones por una conexión keep-alive hasta el instante `fin`."""
+    azar = random.Random(semilla)
+    tipos, pesos = zip(*MEZCLA)
+    latencias = {tipo: [] for tipo in tipos}
+    errores = {tipo: 0 for tipo in tipos}
+    conexion = http.client.HTTPConnection(host, puerto, timeout=30)
+    while time.perf_counter() < fin:
+        tipo = azar.choices(tipos, pesos)[0]
+        metodo, ruta, cuerpo = peticion(tipo, azar, filas)
+        datos = None if cuerpo is None else json.dumps(cuerpo).encode('utf-8')
+        antes = time.perf_counter_ns()
+        try:
+            conexion.request(metodo, ruta, datos, {"Content-Type": "application/json"} if datos else {})
+            respuesta = conexion.getresponse()
+            respuesta.read()
+            if respuesta.status >= 500:
+                errores[tipo] += 1
+        except (OSError, http.client.HTTPException):
+            errores[tipo] += 1
+            conexion.close()
+            conexion = http.client.HTTPConnection(host, puerto, timeout=30)
+            continue
+        latencias[tipo].append((time.perf_counter_ns() - antes) / 1000)
+    conexion.close()
+    resultados[semilla] = (latencias, errores)
+
+
+def iniciar_servidor(directorio: str, hilos: int, motor: str) -> tuple:
+    """
+    Arranca ServidorAPI.py en un puerto libre sobre `directorio`.
+
+    Returns:
+        tuple: (proceso, host, puerto)
+    """
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ServidorAPI.py")
+    proceso = subprocess.Popen([sys.executable, script, "--puerto", "0", "--hilos", str(hilos)],
+                               cwd=directorio, stdout=subprocess.PIPE, text=True,
+                               env={**os.environ, "SOLROCK_MOTOR": motor})
+    linea = proceso.stdout.readline()
+    if not linea.startswith("Escuchando en "):
+        proceso.kill()
+        raise RuntimeError(f"El servidor no arrancó: {linea!r}")
+    direccion = urlsplit(linea.split()[2])
+    return proceso, direccion.hostname, direccion.port
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--filas", type=int, default=100000, help="filas por tabla del torneo sintético")
+    parser.add_argument("--clientes", type=int, default=8, help="conexiones concurrentes")
+    parser.add_argument("--duracion", type=float, default=10.0, help="segundos de carga")
+    parser.add_argument("--hilos", type=int, default=8, help="hilos del servidor")
+    parser.add_argument("--motor", default="csv", choices=("csv", "sqlite"))
+    parser.add_argument("--url", help="instancia ya en marcha (sus datos deben tener al menos --filas participantes)")
+    parser.add_argument("--json", help="escribe también los resultados en este archivo")
+    args = parser.parse_args()
+
+    proceso = directorio = None
+    try:
+        if args.url:
+            direccion = urlsplit(args.url)
+            host, puerto = direccion.hostname, direccion.port or 80
+        else:
+            directorio = tempfile.mkdtemp(prefix="bench_api_")
+            print(f"Generando {args.filas} filas por tabla en {directorio}...")
+            generar(directorio, args.filas)
+            if args.motor == "sqlite":
+                subprocess.run([sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrar.py"),
+                                "--de", "csv", "--a", "sqlite"], capture_output=True, check=True, cwd=directorio)
+            proceso, host, puerto = iniciar_servidor(directorio, args.hilos, args.motor)
+
+        # Una pasada corta para construir índices y calentar la caché antes de medir
+        cliente(host, puerto, args.filas, time.perf_counter() + 1, -1, {})
+
+        print(f"{args.clientes} clientes contra http://{host}:{puerto} durante {args.duracion} s...")
+        resultados = {}
+        fin = time.perf_counter() + args.duracion
+        hilos = [threading.Thread(target=cliente, args=(host, puerto, args.filas, fin, semilla, resultados))
+                 for semilla in range(args.clientes)]
+        inicio = time.perf_counter()
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        segundos = time.perf_counter() - inicio
+    finally:
+        if proceso is not None:
+            proceso.terminate()
+            proceso.wait()
+        if directorio:
+            shutil.rmtree(directorio, ignore_errors=True)
+
+    tipos = [tipo for tipo, _ in MEZCLA]
+    reporte = {"filas": args.filas, "clientes": args.clientes, "hilos": args.hilos, "motor": args.motor,
+               "segundos": round(segundos, 2), "peticiones": []}
+    total = errores_totales = 0
+    for tipo in tipos:
+        latencias = sorted(valor for latencias, _ in resultados.values() for valor in latencias[tipo])
+        errores = sum(errores[tipo] for _, errores in resultados.values())
+        total += len(latencias)
+        errores_totales += errores
+        reporte["peticiones"].append({"tipo": tipo, "cantidad": len(latencias), "errores": errores,
+                                      "p50_us": round(percentil(latencias, 50), 1),
+                                      "p99_us": round(percentil(latencias, 99), 1)})
+    reporte["peticiones_s"] = round(total / segundos, 1)
+    reporte["errores"] = errores_totales
+
+    print(f"{'Petición':<12}{'Cantidad':>10}{'p50 (us)':>12}{'p99 (us)':>12}{'Errores':>10}")
+    for fila in reporte["peticiones"]:
+        print(f"{fila['tipo']:<12}{fila['cantidad']:>10}{fila['p50_us']:>12}{fila['p99_us']:>12}{fila['errores']:>10}")
+    print(f"Total: {total} peticiones en {reporte['segundos']} s = {reporte['peticiones_s']} peticiones/s"
+          f" ({errores_totales} errores)")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump(reporte, file, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark del simulador de combates (Batallas.py).
+
+Genera un torneo sintético con `bench_suite.generar` (N filas por tabla),
+carga los equipos con `cargar_equipos` y mide combates simulados por segundo:
+
+    carga          `cargar_equipos` de todos los entrenadores con pokémones
+    sin_lotes      `simular` con lotes de 1 combate (sin aprovechar la vectorización)
+    lotes          `simular` de pares al azar, en este proceso
+    procesos       lo mismo repartido en un pool de P procesos
+    temporada      `temporada` de todos contra todos entre los primeros E equipos
+
+Uso:
+    python bench_batallas.py [--filas 10000] [--combates 200000] [--procesos P]
+                             [--equipos-temporada 300] [--semilla 2026] [--json bench_batallas.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import tempfile
+import time
+import numpy as np
+from Batallas import cargar_equipos, simular, temporada
+from ParticipanteManager import ParticipanteManager
+from PokemonManager import PokemonManager
+from bench_suite import generar
+
+
+def medir(nombre: str, combates: int, funcion) -> dict:
+    """Ejecuta `funcion()` una vez y resume su duración y los combates por segundo."""
+    inicio = time.perf_counter()
+    funcion()
+    segundos = time.perf_counter() - inicio
+    return {"escenario": nombre, "combates": combates, "segundos": round(segundos, 4),
+            "combates_s": round(combates / segundos, 1) if combates and segundos else 0.0}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--filas", type=int, default=10000, help="filas por tabla del torneo sintético")
+    parser.add_argument("--combates", type=int, default=200000, help="combates al azar a simular")
+    parser.add_argument("--procesos", type=int, default=os.cpu_count(), help="procesos del escenario `procesos`")
+    parser.add_argument("--equipos-temporada", type=int, default=300, help="equipos de la temporada")
+    parser.add_argument("--semilla", type=int, default=2026)
+    parser.add_argument("--json", help="escribe también los resultados en este archivo")
+    args = parser.parse_args()
+
+    directorio = tempfile.mkdtemp(prefix="bench_batallas_")
+    anterior = os.getcwd()
+    try:
+        generar(directorio, args.filas)
+        os.chdir(directorio)
+        pokemon_manager = PokemonManager(ParticipanteManager())
+        inicio = time.perf_counter()
+        equipos = cargar_equipos(pokemon_manager)
+        resultados = [{"escenario": "carga", "combates": 0, "segundos": round(time.perf_counter() - inicio, 4),
+                       "combates_s": 0.0}]
+    finally:
+        os.chdir(anterior)
+        shutil.rmtree(directorio, ignore_errors=True)
+
+    pares = np.random.default_rng(args.semilla).integers(0, len(equipos), (args.combates, 2))
+    muestra = pares[:min(len(pares), 2000)]
+    resultados.append(medir("sin_lotes", len(muestra),
+                            lambda: simular(equipos, muestra, args.semilla, tamano_lote=1)))
+    resultados.append(medir("lotes", len(pares), lambda: simular(equipos, pares, args.semilla)))
+    resultados.append(medir(f"procesos_{args.procesos}", len(pares),
+                            lambda: simular(equipos, pares, args.semilla, procesos=args.procesos)))
+    temporada_equipos = equipos.subconjunto(slice(args.equipos_temporada))
+    total = len(temporada_equipos)
+    resultados.append(medir("temporada", total * (total - 1) // 2,
+                            lambda: temporada(temporada_equipos, semilla=args.semilla)))
+
+    _, turnos = simular(equipos, pares[:10000], args.semilla)
+    print(f"{len(equipos)} equipos, {turnos.mean():.1f} turnos por combate en promedio,"
+          f" {os.cpu_count()} CPU")
+    print(f"{'Escenario':<14}{'Combates':>10}{'Segundos':>10}{'Combates/s':>14}")
+    for fila in resultados:
+        print(f"{fila['escenario']:<14}{fila['combates']:>10}{fila['segundos']:>10}{fila['combates_s']:>14}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump({"python": platform.python_version(), "numpy": np.__version__, "cpu": os.cpu_count(),
+                       "equipos": len(equipos), "resultados": resultados}, file, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Benchmark de la instantánea columnar frente a `csv.reader`.
+
+Genera una tabla de pokémones con N filas (1.000.000 por defecto), escribe su
+instantánea y mide, cada caso en un proceso aparte para que la memoria no se
+mezcle, el tiempo de carga y el aumento de memoria residente (RSS):
+
+    csv        csv.reader -> lista de filas (lo que hace hoy cada arranque)
+    registros  csv.reader -> registros tipados `Pokemon`
+    mmap       apertura de la instantánea con `TablaColumnar`
+    mmap+suma  apertura y recorrido completo de la columna `nivel`
+
+Uso:
+    python bench_instantanea.py [--filas N] [--directorio DIR]
+"""
+
+import argparse
+import csv
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from InstantaneaColumnar import TablaColumnar, escribir_instantanea
+from Registros import Pokemon
+
+TIPOS = ["Fuego", "Agua", "Planta", "Electrico", "Normal", "Psiquico", "Roca", "Hielo"]
+MOVIMIENTOS = ["Placaje", "Ascuas", "Pistola Agua", "Latigo Cepa", "Impactrueno", "Confusion"]
+NOMBRES = ["Pikachu", "Charmander", "Squirtle", "Bulbasaur", "Eevee", "Onix", "Abra", "Lapras"]
+
+
+def generar(ruta: str, filas: int) -> None:
+    """Escribe un CSV de pokémones determinista (semilla fija)."""
+    azar = random.Random(2026)
+    with open(ruta, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(Pokemon.__slots__)
+        for id_pokemon in range(1, filas + 1):
+            writer.writerow([id_pokemon, azar.randint(1, filas // 10 + 1), azar.choice(NOMBRES),
+                             azar.choice(TIPOS), azar.randint(1, 100), azar.choice(MOVIMIENTOS)])
+
+
+def rss_kib() -> int:
+    """Memoria residente actual del proceso en KiB (máxima si no hay /proc)."""
+    try:
+        with open("/proc/self/status", encoding='utf-8') as file:
+            for linea in file:
+                if linea.startswith("VmRSS:"):
+                    return int(linea.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def medir(caso: str, ruta_csv: str, ruta_col: str) -> dict:
+    """Ejecuta un caso y devuelve su tiempo (s) y el aumento de RSS (MiB)."""
+    base = rss_kib()
+    inicio = time.perf_counter()
+    if caso == "csv":
+        with open(ruta_csv, newline='', encoding='utf-8') as file:
+            datos = list(csv.reader(file))
+    elif caso == "registros":
+        with open(ruta_csv, newline='', encoding='utf-8') as file:
+            lector = csv.reader(file)
+            next(lector)
+            datos = [Pokemon.desde_fila(fila) for fila in lector]
+    elif caso == "mmap":
+        datos = TablaColumnar(ruta_col, Pokemon.categoricos)
+    else:
+        datos = TablaColumnar(ruta_col, Pokemon.categoricos)
+        sum(datos.columna("nivel"))
+    segundos = time.perf_counter() - inicio
+    return {"caso": caso, "segundos": round(segundos, 4), "rss_mib": round((rss_kib() - base) / 1024, 1)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--filas", type=int, default=1_000_000)
+    parser.add_argument("--directorio")
+    parser.add_argument("--caso", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    directorio = args.directorio or tempfile.mkdtemp(prefix="bench_instantanea_")
+    os.makedirs(directorio, exist_ok=True)
+    ruta_csv = os.path.join(directorio, "pokemones.csv")
+    ruta_col = ruta_csv + ".col"
+
+    if args.caso:
+        print(json.dumps(medir(args.caso, ruta_csv, ruta_col)))
+        return
+
+    if not os.path.exists(ruta_csv):
+        print(f"Generando {args.filas} filas en {ruta_csv}...")
+        generar(ruta_csv, args.filas)
+    inicio = time.perf_counter()
+    with open(ruta_csv, newline='', encoding='utf-8') as file:
+        lector = csv.reader(file)
+        next(lector)
+        estado = os.stat(ruta_csv)
+        escribir_instantanea(ruta_col, list(Pokemon.__slots__), Pokemon.enteros,
+                             (Pokemon.desde_fila(fila) for fila in lector),
+                             (estado.st_size, estado.st_mtime_ns))
+    print(f"Instantánea escrita en {time.perf_counter() - inicio:.2f} s "
+          f"({os.path.getsize(ruta_csv) / 2**20:.1f} MiB CSV, {os.path.getsize(ruta_col) / 2**20:.1f} MiB .col)")
+
+    print(f"{'caso':<12}{'segundos':>10}{'RSS (MiB)':>12}")
+    for caso in ("csv", "registros", "mmap", "mmap+suma"):
+        salida = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--directorio", directorio, "--caso", caso],
+            capture_output=True, text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout
+        resultado = json.loads(salida)
+        print(f"{resultado['caso']:<12}{resultado['segundos']:>10}{resultado['rss_mib']:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+"""
+Benchmark de las operaciones de los managers sobre datos sintéticos de un torneo.
+
+Genera `participantes.csv`, `cuentas.csv` y `pokemones.csv` deterministas (semilla
+fija) con N filas por tabla y mide, a través de la API de los managers, cada
+escenario de trabajo:
+
+    apertura      construir los tres managers (carga o reconstrucción de índices)
+    insertar      `ParticipanteManager.crear`
+    consultar     `obtener` de IDs al azar (lectura puntual por índice)
+    ultimo_id     `obtener_ultimo_id`
+    editar        `actualizar` de participantes al azar
+    eliminar      `borrar` de pokémones al azar
+    listar        `pagina` de 20 registros, siguiendo el cursor
+    validar_fk    `validar_campo("id_entrenador", ...)` de pokémones
+    integridad    `validar_integridad()` completo (una sola operación)
+
+Cada escala corre en un proceso aparte (y en su propio directorio) para que la
+memoria no se mezcle, una vez por motor de almacenamiento (`--motores`); para
+SQLite, los CSV generados se copian antes a la base con `migrar.py`. De cada
+escenario se reporta operaciones por segundo, latencias p50/p99 y el pico de
+memoria residente del proceso hasta ese momento. Los resultados se escriben en
+`bench_output.txt` (con un resumen de cómo crecen `consultar` y `editar` con
+el tamaño de la tabla) y en JSON.
+
+Uso:
+    python bench_suite.py [--escalas 10000,100000,1000000] [--operaciones 2000]
+                          [--motores csv,sqlite] [--directorio DIR]
+                          [--salida bench_output.txt] [--json bench_output.json]
+                          [--sin-cache]
+"""
+
+import argparse
+import csv
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+SEMILLA = 2026
+NOMBRES = ["Ash", "Misty", "Brock", "Gary", "May", "Dawn", "Iris", "Serena", "Lillie", "Gloria",
+           "Leon", "Cynthia", "Steven", "Lance", "Erika", "Sabrina", "Koga", "Blaine", "Clair", "Wallace"]
+APELLIDOS = ["Ketchum", "Oak", "Birch", "Rowan", "Juniper", "Sycamore", "Kukui", "Magnolia",
+             "García", "López", "Martínez", "Hernández", "Pérez", "Sánchez", "Ramírez", "Torres"]
+CIUDADES = ["Pueblo Paleta", "Ciudad Verde", "Ciudad Plateada", "Ciudad Celeste", "Ciudad Carmín",
+            "Pueblo Lavanda", "Ciudad Azulona", "Ciudad Fucsia", "Ciudad Azafrán", "Isla Canela"]
+POKEMONES = [("Pikachu", "Electrico", "Impactrueno"), ("Charmander", "Fuego", "Ascuas"),
+             ("Squirtle", "Agua", "Pistola Agua"), ("Bulbasaur", "Planta", "Latigo Cepa"),
+             ("Eevee", "Normal", "Placaje"), ("Onix", "Roca", "Lanzarrocas"),
+             ("Abra", "Psiquico", "Teletransporte"), ("Lapras", "Hielo", "Rayo Hielo"),
+             ("Gastly", "Fantasma", "Lenguetazo"), ("Machop", "Lucha", "Golpe Karate")]
+# Escenarios cuya latencia no debería depender del tamaño de la tabla
+ESCENARIOS_PUNTUALES = ("consultar", "editar")
+ESCENARIOS = ("apertura", "insertar", "consultar", "ultimo_id", "editar", "eliminar",
+              "listar", "validar_fk", "integridad")
+
+
+def generar(directorio: str, filas: int) -> None:
+    """
+    Escribe las tres tablas del torneo con `filas` registros cada una.
+
+    Cada participante tiene una cuenta con usuario único; los pokémones se
+    reparten al azar entre los participantes, así que todas las claves foráneas
+    son válidas.
+    """
+    azar = random.Random(SEMILLA)
+    os.makedirs(directorio, exist_ok=True)
+    with open(os.path.join(directorio, "participantes.csv"), 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(["id_participante", "nombre", "edad", "ciudad", "telefono"])
+        for id_participante in range(1, filas + 1):
+            writer.writerow([id_participante, f"{azar.choice(NOMBRES)} {azar.choice(APELLIDOS)}",
+                             azar.randint(10, 60), azar.choice(CIUDADES), f"55{azar.randint(0, 99999999):08d}"])
+
+    with open(os.path.join(directorio, "cuentas.csv"), 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(["id_cuenta", "id_participante", "usuario", "contrasena", "fecha_creacion"])
+        for id_cuenta in range(1, filas + 1):
+            writer.writerow([id_cuenta, id_cuenta, f"entrenador{id_cuenta}", f"clave{azar.randint(0, 10**9)}",
+                             f"20{azar.randint(20, 25)}-{azar.randint(1, 12):02d}-{azar.randint(1, 28):02d}"])
+
+    with open(os.path.join(directorio, "pokemones.csv"), 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(["id_pokemon", "id_entrenador", "nombre", "tipo", "nivel", "movimiento_principal"])
+        for id_pokemon in range(1, filas + 1):
+            nombre, tipo, movimiento = azar.choice(POKEMONES)
+            writer.writerow([id_pokemon, azar.randint(1, filas), nombre, tipo, azar.randint(1, 100), movimiento])
+
+
+def rss_pico_mib() -> float:
+    """Pico de memoria residente del proceso en MiB."""
+    try:
+        with open("/proc/self/status", encoding='utf-8') as file:
+            for linea in file:
+                if linea.startswith("VmHWM:"):
+                    return round(int(linea.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def percentil(latencias: list, p: float) -> float:
+    """Percentil `p` (0-100) de una lista ya ordenada de latencias."""
+    if not latencias:
+        return 0.0
+    return latencias[min(len(latencias) - 1, round(p / 100 * (len(latencias) - 1)))]
+
+
+def medir(nombre: str, operaciones) -> dict:
+    """
+    Ejecuta cada operación (un callable sin argumentos) y resume sus latencias.
+
+    Returns:
+        dict: Nombre, número de operaciones, ops/s, p50 y p99 en microsegundos y
+            pico de RSS en MiB
+    """
+    latencias = []
+    inicio = time.perf_counter_ns()
+    for operacion in operaciones:
+        antes = time.perf_counter_ns()
+        operacion()
+        latencias.append((time.perf_counter_ns() - antes) / 1000)
+    total = (time.perf_counter_ns() - inicio) / 1e9
+    latencias.sort()
+    return {
+        "escenario": nombre,
+        "operaciones": len(latencias),
+        "segundos": round(total, 4),
+        "ops_s": round(len(latencias) / total, 1) if total else 0.0,
+        "p50_us": round(percentil(latencias, 50), 1),
+        "p99_us": round(percentil(latencias, 99), 1),
+        "rss_pico_mib": rss_pico_mib(),
+    }
+
+
+def ejecutar_escala(filas: int, operaciones: int, sin_cache: bool) -> list:
+    """Corre todos los escenarios en el directorio actual (ya generado) y devuelve sus resultados."""
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from Entidad import Entidad
+    from ParticipanteManager import ParticipanteManager
+    from CuentaManager import CuentaManager
+    from PokemonManager import PokemonManager
+
+    if sin_cache:
+        Entidad.capacidad_cache = 0
+    azar = random.Random(SEMILLA + 1)
+    resultados = []
+    managers = {}
+
+    def abrir():
+        managers["participantes"] = ParticipanteManager()
+        managers["cuentas"] = CuentaManager(managers["participantes"])
+        managers["pokemones"] = PokemonManager(managers["participantes"])
+
+    resultados.append(medir("apertura", [abrir]))
+    participantes, pokemones = managers["participantes"], managers["pokemones"]
+
+    def insertar():
+        participantes.crear(f"{azar.choice(NOMBRES)} {azar.choice(APELLIDOS)}", azar.randint(10, 60),
+                            azar.choice(CIUDADES), f"55{azar.randint(0, 99999999):08d}")
+
+    resultados.append(medir("insertar", [insertar] * operaciones))
+
+    ids = [azar.randint(1, filas) for _ in range(operaciones)]
+    resultados.append(medir("consultar", [lambda i=i: participantes.obtener(i) for i in ids]))
+    resultados.append(medir("ultimo_id", [participantes.obtener_ultimo_id] * operaciones))
+    resultados.append(medir("editar", [lambda i=i: participantes.actualizar(i, edad=azar.randint(10, 60))
+                                       for i in azar.sample(range(1, filas + 1), min(operaciones, filas))]))
+    resultados.append(medir("eliminar", [lambda i=i: pokemones.borrar(i)
+                                         for i in azar.sample(range(1, filas + 1), min(operaciones, filas))]))
+
+    cursor = [None]
+
+    def listar():
+        _, cursor[0] = participantes.pagina(cursor[0], 20)
+
+    resultados.append(medir("listar", [listar] * min(operaciones, filas // 20)))
+    resultados.append(medir("validar_fk", [lambda i=i: pokemones.validar_campo("id_entrenador", i)
+                                           for i in ids]))
+    resultados.append(medir("integridad", [participantes.validar_integridad]))
+    return resultados
+
+
+def escribir_reporte(ruta: str, reporte: dict) -> None:
+    """Escribe el reporte legible: una tabla por escala y motor, y el resumen de latencias puntuales."""
+    with open(ruta, 'w', encoding='utf-8') as file:
+        file.write(f"Benchmark Solrock Battle Association - {reporte['fecha']}\n")
+        file.write(f"Python {reporte['python']} en {reporte['plataforma']}; "
+                   f"{reporte['operaciones']} operaciones por escenario; "
+                   f"caché {'desactivada' if reporte['sin_cache'] else 'activada'}\n")
+        for escala in reporte["escalas"]:
+            preparacion = f"generación {escala['generacion_s']} s"
+            if escala.get("migracion_s") is not None:
+                preparacion += f", migración {escala['migracion_s']} s"
+            file.write(f"\n== {escala['filas']} filas por tabla, motor {escala['motor']} ({preparacion}) ==\n")
+            file.write(f"{'escenario':<12}{'ops':>8}{'ops/s':>12}{'p50 (us)':>12}{'p99 (us)':>12}{'RSS pico (MiB)':>16}\n")
+            for resultado in escala["escenarios"]:
+                file.write(f"{resultado['escenario']:<12}{resultado['operaciones']:>8}{resultado['ops_s']:>12}"
+                           f"{resultado['p50_us']:>12}{resultado['p99_us']:>12}{resultado['rss_pico_mib']:>16}\n")
+
+        filas = sorted({escala["filas"] for escala in reporte["escalas"]})
+        file.write("\n== Latencia p50 (us) de las operaciones puntuales según el tamaño ==\n")
+        file.write(f"{'motor':<8}{'escenario':<12}" + "".join(f"{cantidad:>12}" for cantidad in filas) + "\n")
+        for motor in reporte["motores"]:
+            por_filas = {escala["filas"]: {r["escenario"]: r for r in escala["escenarios"]}
+                         for escala in reporte["escalas"] if escala["motor"] == motor}
+            for escenario in ESCENARIOS_PUNTUALES:
+                file.write(f"{motor:<8}{escenario:<12}" + "".join(
+                    f"{por_filas[cantidad][escenario]['p50_us'] if cantidad in por_filas else '-':>12}"
+                    for cantidad in filas) + "\n")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--escalas", default="10000,100000,1000000",
+                        help="filas por tabla de cada escala, separadas por comas")
+    parser.add_argument("--operaciones", type=int, default=2000, help="operaciones por escenario")
+    parser.add_argument("--motores", default="csv",
+                        help="motores de almacenamiento a medir (csv, sqlite), separados por comas")
+    parser.add_argument("--directorio", help="directorio de trabajo (por defecto, uno temporal que se borra)")
+    parser.add_argument("--salida", default="bench_output.txt")
+    parser.add_argument("--json", default="bench_output.json")
+    parser.add_argument("--sin-cache", action="store_true", help="desactiva la caché de lecturas")
+    parser.add_argument("--escala", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.escala:
+        print(json.dumps(ejecutar_escala(args.escala, args.operaciones, args.sin_cache)))
+        return
+
+    base = args.directorio or tempfile.mkdtemp(prefix="bench_suite_")
+    reporte = {
+        "fecha": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "operaciones": args.operaciones,
+        "sin_cache": args.sin_cache,
+        "motores": args.motores.split(","),
+        "escalas": [],
+    }
+    try:
+        for filas in (int(valor) for valor in args.escalas.split(",")):
+            directorio = os.path.join(base, f"filas_{filas}")
+            shutil.rmtree(directorio, ignore_errors=True)
+            print(f"Generando {filas} filas por tabla en {directorio}...")
+            inicio = time.perf_counter()
+            generar(directorio, filas)
+            generacion = round(time.perf_counter() - inicio, 2)
+
+            # La base se llena antes de medir, mientras los CSV están intactos
+            migracion = None
+            if "sqlite" in reporte["motores"]:
+                inicio = time.perf_counter()
+                subprocess.run([sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrar.py"),
+                                "--de", "csv", "--a", "sqlite"],
+                               capture_output=True, check=True, cwd=directorio)
+                migracion = round(time.perf_counter() - inicio, 2)
+
+            for motor in reporte["motores"]:
+                print(f"  Motor {motor}:")
+                comando = [sys.executable, os.path.abspath(__file__), "--escala", str(filas),
+                           "--operaciones", str(args.operaciones)] + (["--sin-cache"] if args.sin_cache else [])
+                salida = subprocess.run(comando, capture_output=True, text=True, check=True, cwd=directorio,
+                                        env={**os.environ, "SOLROCK_MOTOR": motor}).stdout
+                escenarios = json.loads(salida.strip().splitlines()[-1])
+                reporte["escalas"].append({"filas": filas, "motor": motor, "generacion_s": generacion,
+                                           "migracion_s": migracion if motor == "sqlite" else None,
+                                           "escenarios": escenarios})
+                for resultado in escenarios:
+                    print(f"    {resultado['escenario']:<12}{resultado['ops_s']:>12} ops/s"
+                          f"  p50 {resultado['p50_us']} us  p99 {resultado['p99_us']} us")
+            shutil.rmtree(directorio, ignore_errors=True)
+    finally:
+        if not args.directorio:
+            shutil.rmtree(base, ignore_errors=True)
+
+    escribir_reporte(args.salida, reporte)
+    with open(args.json, 'w', encoding='utf-8') as file:
+        json.dump(reporte, file, indent=2, ensure_ascii=False)
+    print(f"Resultados en {args.salida} y {args.json}")
+
+
+if __name__ == "__main__":
+    main()
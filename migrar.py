@@ -0,0 +1,123 @@
+"""
+Migración de datos entre motores de almacenamiento del Sistema Solrock Battle Association.
+
+Copia participantes, cuentas y pokémones de un motor ("csv" o "sqlite") al
+otro, conservando los IDs y la secuencia de IDs (los IDs de registros
+eliminados tampoco se reutilizan en el destino). Las filas se leen por páginas
+y se escriben en lotes, así que la memoria no depende del tamaño de las
+tablas. Las tablas de destino deben estar vacías, salvo con --reemplazar.
+
+Uso:
+    python migrar.py --de csv --a sqlite [--directorio DIR] [--lote 5000] [--reemplazar]
+
+Después, la aplicación usa el motor nuevo con SOLROCK_MOTOR=sqlite.
+"""
+
+import argparse
+import os
+import time
+from Entidad import Entidad
+from ParticipanteManager import ParticipanteManager
+from CuentaManager import CuentaManager
+from PokemonManager import PokemonManager
+
+MOTORES = ("csv", "sqlite")
+
+
+def abrir(motor: str) -> list:
+    """
+    Construye los tres managers sobre el motor indicado, en el directorio actual.
+
+    Returns:
+        list: [participantes, cuentas, pokémones]
+    """
+    anterior = Entidad.motor
+    Entidad.motor = motor
+    try:
+        participantes = ParticipanteManager()
+        return [participantes, CuentaManager(participantes), PokemonManager(participantes)]
+    finally:
+        Entidad.motor = anterior
+
+
+def copiar(origen, destino, tamano_lote: int = 5000, reemplazar: bool = False) -> int:
+    """
+    Copia todos los registros del almacén `origen` al almacén `destino`.
+
+    Args:
+        origen (Almacen): Almacén que se lee por páginas
+        destino (Almacen): Almacén donde se escriben las filas con sus IDs
+        tamano_lote (int): Filas por página y por escritura
+        reemplazar (bool): Si es False, el destino debe estar vacío
+
+    Returns:
+        int: Número de registros copiados
+
+    Raises:
+        ValueError: Si el destino ya tiene registros y no se pidió reemplazar
+    """
+    if reemplazar:
+        destino.eliminar_lote(sorted(destino.ids()))
+    elif destino.ids():
+        raise ValueError(f"La tabla de destino {destino.tabla} no está vacía (use --reemplazar).")
+
+    copiados = 0
+    cursor = None
+    with origen.leyendo():
+        siguiente = origen.siguiente_id()
+    while True:
+        filas, cursor = origen.leer_pagina(cursor, tamano_lote)
+        if filas:
+            destino.escribir_lote(filas)
+            copiados += len(filas)
+        if cursor is None:
+            break
+    destino.avanzar_secuencia(max(siguiente, origen.siguiente_id()))
+    return copiados
+
+
+def migrar(de: str, a: str, tamano_lote: int = 5000, reemplazar: bool = False) -> dict:
+    """
+    Copia las tres tablas del directorio actual del motor `de` al motor `a`.
+
+    Returns:
+        dict: Tabla -> número de registros copiados
+
+    Raises:
+        ValueError: Si los motores son iguales o desconocidos, o si el destino no
+            está vacío y no se pidió reemplazar
+    """
+    if de not in MOTORES or a not in MOTORES or de == a:
+        raise ValueError(f"Los motores deben ser distintos y estar entre {', '.join(MOTORES)}.")
+
+    copiados = {}
+    for origen, destino in zip(abrir(de), abrir(a)):
+        copiados[origen.almacen.tabla] = copiar(origen.almacen, destino.almacen, tamano_lote, reemplazar)
+        if len(destino.almacen.ids()) != copiados[origen.almacen.tabla]:
+            raise RuntimeError(f"La tabla {destino.almacen.tabla} no quedó con los registros copiados.")
+    return copiados
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--de", required=True, choices=MOTORES, help="motor de origen")
+    parser.add_argument("--a", required=True, choices=MOTORES, help="motor de destino")
+    parser.add_argument("--directorio", default=".", help="directorio de los datos")
+    parser.add_argument("--lote", type=int, default=5000, help="filas por lote")
+    parser.add_argument("--reemplazar", action="store_true",
+                        help="vacía las tablas de destino antes de copiar")
+    args = parser.parse_args()
+
+    os.chdir(args.directorio)
+    inicio = time.perf_counter()
+    try:
+        copiados = migrar(args.de, args.a, args.lote, args.reemplazar)
+    except ValueError as ve:
+        parser.exit(1, f"Error: {ve}\n")
+    for tabla, cantidad in copiados.items():
+        print(f"{tabla}: {cantidad} registros")
+    print(f"Migración {args.de} -> {args.a} completada en {time.perf_counter() - inicio:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Pruebas de compactación, secuencia de IDs y paginación de `AlmacenCSV`."""
+
+import os
+import shutil
+import tempfile
+import unittest
+from AlmacenCSV import AlmacenCSV
+from Errores import CursorInvalido
+
+CAMPOS = ["id", "nombre"]
+
+
+class PruebaAlmacenCSV(unittest.TestCase):
+
+    def setUp(self):
+        self.anterior = os.getcwd()
+        self.directorio = tempfile.mkdtemp(prefix="prueba_almacen_")
+        os.chdir(self.directorio)
+        self.almacen = self.abrir()
+
+    def tearDown(self):
+        os.chdir(self.anterior)
+        shutil.rmtree(self.directorio, ignore_errors=True)
+
+    @staticmethod
+    def abrir():
+        return AlmacenCSV("tabla.csv", CAMPOS, compactar_en_segundo_plano=False)
+
+    def insertar(self, cantidad: int) -> list:
+        return self.almacen.insertar_lote([[f"fila {i}"] for i in range(cantidad)])
+
+    def test_compactar_conserva_la_secuencia_al_reabrir(self):
+        self.insertar(5)
+        self.almacen.eliminar_lote([4, 5])
+        self.almacen.compactar()
+        with open("tabla.csv", encoding="utf-8") as file:
+            self.assertNotIn("5", [linea.split(",")[0] for linea in file.read().splitlines()])
+
+        reabierto = self.abrir()
+        self.assertEqual(reabierto.siguiente_id(), 6)
+        self.assertEqual(reabierto.insertar_lote([["nueva"]]), [6])
+        self.assertEqual(sorted(reabierto.ids()), [1, 2, 3, 6])
+
+    def test_compactacion_automatica_nunca_reutiliza_ids(self):
+        self.almacen.umbral_compactacion = 0.3
+        usados = set()
+        for _ in range(5):
+            ids = self.insertar(4)
+            self.assertFalse(usados & set(ids))
+            usados.update(ids)
+            self.almacen.eliminar_lote(ids[1:])
+            self.almacen = self.abrir()
+        self.assertEqual(self.almacen.siguiente_id(), max(usados) + 1)
+
+    def test_pagina_recorre_todo_sin_repetir(self):
+        self.insertar(45)
+        vistos, cursor, paginas = [], None, 0
+        while True:
+            filas, cursor = self.almacen.leer_pagina(cursor, 20)
+            vistos.extend(int(fila[0]) for fila in filas)
+            paginas += 1
+            if cursor is None:
+                break
+        self.assertEqual(vistos, list(range(1, 46)))
+        self.assertEqual(paginas, 3)
+
+    def test_cursor_sigue_valido_tras_compactar(self):
+        self.insertar(30)
+        filas, cursor = self.almacen.leer_pagina(None, 10)
+        self.assertEqual([int(fila[0]) for fila in filas], list(range(1, 11)))
+        self.almacen.eliminar_lote(range(12, 30, 2))
+        self.almacen.compactar()
+
+        restantes = []
+        while cursor is not None:
+            filas, cursor = self.almacen.leer_pagina(cursor, 10)
+            restantes.extend(int(fila[0]) for fila in filas)
+        self.assertEqual(restantes, [11, *range(13, 30, 2), 30])
+
+    def test_cursor_mal_formado(self):
+        self.insertar(3)
+        with self.assertRaises(CursorInvalido):
+            self.almacen.leer_pagina("no es un cursor", 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
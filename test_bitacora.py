@@ -0,0 +1,88 @@
+"""Pruebas de la recuperación de los CSV a partir de `Bitacora` tras una caída."""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+import warnings
+from ParticipanteManager import ParticipanteManager
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+
+
+def ejecutar_y_caer(directorio: str, codigo: str) -> None:
+    """Ejecuta `codigo` en otro proceso dentro de `directorio` y lo termina sin punto de control."""
+    preludio = (f"import os, sys\nsys.path.insert(0, {RAIZ!r})\n"
+                "from ParticipanteManager import ParticipanteManager\n")
+    subprocess.run([sys.executable, "-c", preludio + codigo + "\nos._exit(1)\n"],
+                   cwd=directorio, check=False)
+
+
+class PruebaRecuperacion(unittest.TestCase):
+
+    def setUp(self):
+        self.anterior = os.getcwd()
+        self.directorio = tempfile.mkdtemp(prefix="prueba_bitacora_")
+        os.chdir(self.directorio)
+        ejecutar_y_caer(self.directorio, "\n".join([
+            "participantes = ParticipanteManager()",
+            "for nombre in ('Ana', 'Bruno', 'Carla'):",
+            "    participantes.crear(nombre, 20, 'Ciudad', '5512345678')",
+        ]))
+
+    def tearDown(self):
+        os.chdir(self.anterior)
+        shutil.rmtree(self.directorio, ignore_errors=True)
+
+    def abrir(self):
+        """Abre la tabla (lo que dispara la recuperación) y devuelve los nombres vigentes."""
+        with warnings.catch_warnings(record=True) as avisos:
+            warnings.simplefilter("always")
+            nombres = [registro.nombre for registro in ParticipanteManager().obtener_todos()]
+        return nombres, [str(aviso.message) for aviso in avisos if aviso.category is RuntimeWarning]
+
+    def test_reescribe_filas_que_no_llegaron_al_csv(self):
+        with open("participantes.csv", "rb+") as file:
+            contenido = file.read()
+            file.truncate(contenido.rindex(b"3,Carla"))
+        nombres, _ = self.abrir()
+        self.assertEqual(nombres, ["Ana", "Bruno", "Carla"])
+
+    def test_descarta_fila_incompleta(self):
+        with open("participantes.csv", "ab") as file:
+            file.write(b"4,Dan")
+        nombres, avisos = self.abrir()
+        self.assertEqual(nombres, ["Ana", "Bruno", "Carla"])
+        self.assertTrue(any("incompleta" in aviso for aviso in avisos))
+        with open("participantes.csv", "rb") as file:
+            self.assertTrue(file.read().endswith(b"\n"))
+
+    def test_conserva_filas_completas_fuera_de_la_bitacora(self):
+        with open("participantes.csv", "ab") as file:
+            file.write(b"4,Dan,30,Ciudad,5512345678\n")
+        nombres, avisos = self.abrir()
+        self.assertEqual(nombres, ["Ana", "Bruno", "Carla", "Dan"])
+        self.assertTrue(any("se conservan" in aviso for aviso in avisos))
+
+    def test_ignora_registro_truncado_de_la_bitacora(self):
+        with open("bitacora.wal", "rb+") as file:
+            file.truncate(os.path.getsize("bitacora.wal") - 5)
+        with open("participantes.csv", "rb+") as file:
+            contenido = file.read()
+            file.truncate(contenido.rindex(b"3,Carla") + 4)
+        nombres, _ = self.abrir()
+        self.assertEqual(nombres, ["Ana", "Bruno"])
+
+    def test_recuperar_dos_veces_no_cambia_nada(self):
+        self.assertEqual(self.abrir()[0], ["Ana", "Bruno", "Carla"])
+        with open("participantes.csv", "rb") as file:
+            contenido = file.read()
+        self.assertEqual(self.abrir(), (["Ana", "Bruno", "Carla"], []))
+        with open("participantes.csv", "rb") as file:
+            self.assertEqual(file.read(), contenido)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+"""Pruebas de `CerrojoArchivo` entre hilos y entre procesos."""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+from CerrojoArchivo import CerrojoArchivo, fcntl
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+
+
+class PruebaCerrojoArchivo(unittest.TestCase):
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp(prefix="prueba_cerrojo_")
+        self.cerrojo = CerrojoArchivo(os.path.join(self.directorio, "tabla.csv.lock"))
+
+    def tearDown(self):
+        shutil.rmtree(self.directorio, ignore_errors=True)
+
+    def en_otro_hilo(self, funcion):
+        resultado = []
+        hilo = threading.Thread(target=lambda: resultado.append(funcion()))
+        hilo.start()
+        hilo.join(10)
+        return resultado[0]
+
+    def intentar(self, exclusivo: bool) -> bool:
+        """Intenta tomar el cerrojo sin esperar y lo suelta si lo obtuvo."""
+        if not self.cerrojo.adquirir(exclusivo=exclusivo, bloquear=False):
+            return False
+        self.cerrojo.liberar()
+        return True
+
+    def test_lectores_no_se_bloquean_entre_si(self):
+        with self.cerrojo.compartido():
+            self.assertTrue(self.en_otro_hilo(lambda: self.intentar(exclusivo=False)))
+            self.assertFalse(self.en_otro_hilo(lambda: self.intentar(exclusivo=True)))
+
+    def test_exclusivo_bloquea_a_los_demas_hilos(self):
+        with self.cerrojo.exclusivo():
+            self.assertFalse(self.en_otro_hilo(lambda: self.intentar(exclusivo=False)))
+        self.assertTrue(self.en_otro_hilo(lambda: self.intentar(exclusivo=True)))
+
+    def test_reentrante_por_hilo(self):
+        with self.cerrojo.exclusivo(), self.cerrojo.compartido(), self.cerrojo.exclusivo():
+            pass
+        with self.cerrojo.compartido():
+            with self.assertRaises(RuntimeError):
+                self.cerrojo.adquirir(exclusivo=True)
+        self.assertTrue(self.en_otro_hilo(lambda: self.intentar(exclusivo=True)))
+
+    @unittest.skipIf(fcntl is None, "sin fcntl el cerrojo solo coordina hilos")
+    def test_exclusivo_entre_procesos(self):
+        codigo = "\n".join([
+            "import sys",
+            f"sys.path.insert(0, {RAIZ!r})",
+            "from CerrojoArchivo import CerrojoArchivo",
+            f"cerrojo = CerrojoArchivo({self.cerrojo.ruta!r})",
+            "with cerrojo.exclusivo():",
+            "    print('tomado', flush=True)",
+            "    sys.stdin.readline()",
+        ])
+        proceso = subprocess.Popen([sys.executable, "-c", codigo], stdin=subprocess.PIPE,
+                                   stdout=subprocess.PIPE, text=True)
+        try:
+            self.assertEqual(proceso.stdout.readline().strip(), "tomado")
+            self.assertFalse(self.intentar(exclusivo=False))
+        finally:
+            proceso.communicate("\n", timeout=10)
+        self.assertTrue(self.intentar(exclusivo=True))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+"""Pruebas de `Entidad` con los managers del torneo: cascada, validación y concurrencia."""
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from CuentaManager import CuentaManager
+from Errores import ErrorValidacion, RegistroNoEncontrado
+from ParticipanteManager import ParticipanteManager
+from PokemonManager import PokemonManager
+
+
+class PruebaEntidad(unittest.TestCase):
+
+    def setUp(self):
+        self.anterior = os.getcwd()
+        self.directorio = tempfile.mkdtemp(prefix="prueba_entidad_")
+        os.chdir(self.directorio)
+        self.participantes = ParticipanteManager()
+        self.cuentas = CuentaManager(self.participantes)
+        self.pokemones = PokemonManager(self.participantes)
+
+    def tearDown(self):
+        os.chdir(self.anterior)
+        shutil.rmtree(self.directorio, ignore_errors=True)
+
+    def inscribir(self, nombre: str, pokemones: int) -> int:
+        id_participante = self.participantes.crear(nombre, 20, "Ciudad", "5512345678")[0]
+        self.cuentas.crear(id_participante, nombre.lower(), "secreta", "2024-01-01")
+        for numero in range(pokemones):
+            self.pokemones.crear(id_participante, f"Pokemon {numero}", "Agua", 10, "Burbuja")
+        return id_participante
+
+    def test_eliminar_en_cascada(self):
+        ash = self.inscribir("Ash", 3)
+        misty = self.inscribir("Misty", 2)
+
+        simulado = self.participantes.eliminar_en_cascada(ash, simular=True)
+        self.assertEqual(simulado, {"participantes.csv": 1, "cuentas.csv": 1, "pokemones.csv": 3})
+        self.assertEqual(len(self.pokemones.obtener_todos()), 5)
+
+        self.assertEqual(self.participantes.eliminar_en_cascada(ash), simulado)
+        self.assertFalse(self.participantes.existe(ash))
+        self.assertEqual([cuenta.id_participante for cuenta in self.cuentas.obtener_todos()], [misty])
+        self.assertEqual({pokemon.id_entrenador for pokemon in self.pokemones.obtener_todos()}, {misty})
+        self.assertEqual(self.pokemones.buscar_por("id_entrenador", ash), [])
+        self.assertFalse(any(self.participantes.validar_integridad().values()))
+
+    def test_eliminar_en_cascada_inexistente(self):
+        with self.assertRaises(RegistroNoEncontrado):
+            self.participantes.eliminar_en_cascada(99)
+
+    def test_rechaza_tipos_que_no_corresponden(self):
+        for datos in ({"nombre": ["Ash"]}, {"ciudad": {"x": 1}}, {"edad": True}, {"edad": 15.9},
+                      {"telefono": 5512345678}):
+            with self.subTest(datos=datos), self.assertRaises(ErrorValidacion):
+                self.participantes.crear(**{"nombre": "Ash", "edad": 10, "ciudad": "Paleta",
+                                            "telefono": "55", **datos})
+        self.assertEqual(self.participantes.crear("Ash", "10", "Paleta", "55").edad, 10)
+
+    def test_rechaza_fechas_imposibles(self):
+        ash = self.inscribir("Ash", 0)
+        with self.assertRaises(ErrorValidacion):
+            self.cuentas.crear(ash, "otra", "secreta", "2024-02-30")
+        self.cuentas.crear(ash, "bisiesto", "secreta", "2024-02-29")
+        encontrados = self.cuentas.buscar_rango("fecha_creacion", "2024-01-01", "2024-12-31")
+        self.assertEqual(len(encontrados), 2)
+
+    def test_construir_indice_mientras_se_escribe(self):
+        for numero in range(300):
+            self.participantes.crear(f"Participante {numero}", 20, "Ciudad", f"55{numero:08d}")
+
+        def leer():
+            for _ in range(50):
+                self.participantes.al_recargar()
+                self.participantes.buscar_por("edad", 20)
+
+        def escribir():
+            for numero in range(100):
+                self.participantes.crear(f"Nuevo {numero}", 20, "Ciudad", f"66{numero:08d}")
+
+        hilos = [threading.Thread(target=leer, daemon=True), threading.Thread(target=escribir, daemon=True)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join(30)
+        self.assertFalse(any(hilo.is_alive() for hilo in hilos), "los hilos quedaron bloqueados")
+        self.assertEqual(len(self.participantes.buscar_por("edad", 20)), 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,31 @@
+"""Pruebas de la búsqueda aproximada de `Indices.IndiceTexto`."""
+
+import unittest
+from Indices import IndiceTexto, distancia_edicion
+
+
+class PruebaBusquedaAproximada(unittest.TestCase):
+
+    def setUp(self):
+        self.indice = IndiceTexto("nombre", 1)
+        self.indice.construir([[1, "Bob"], [2, "Ana"], [3, "Brock"], [4, "Misty"], [5, "Bea"]])
+
+    def test_transposicion_en_nombre_corto(self):
+        resultado = self.indice.buscar_aproximado("Bbo")
+        self.assertEqual(resultado[0][0], 1)
+        self.assertGreaterEqual(resultado[0][1], 0.6)
+
+    def test_transposicion_en_nombre_largo(self):
+        self.assertEqual(self.indice.buscar_aproximado("Msity")[0][0], 4)
+
+    def test_texto_sin_parecido(self):
+        self.assertEqual(self.indice.buscar_aproximado("Zzzzzz"), [])
+
+    def test_distancia_edicion(self):
+        self.assertEqual(distancia_edicion("bbo", "bob"), 1)
+        self.assertEqual(distancia_edicion("brock", "brok"), 1)
+        self.assertEqual(distancia_edicion("", "ana"), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+"""Pruebas de la API HTTP/JSON de `ServidorAPI` contra un servidor real en un puerto libre."""
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from http.client import HTTPConnection
+from ServidorAPI import ServidorAPI
+
+ASH = {"nombre": "Ash", "edad": 10, "ciudad": "Pueblo Paleta", "telefono": "5512345678"}
+CUENTA = {"usuario": "ash", "contrasena": "pikachu1", "fecha_creacion": "2024-01-01"}
+PIKACHU = {"nombre": "Pikachu", "tipo": "Electrico", "nivel": 5, "movimiento_principal": "Impactrueno"}
+
+
+class PruebaServidorAPI(unittest.TestCase):
+
+    def setUp(self):
+        self.anterior = os.getcwd()
+        self.directorio = tempfile.mkdtemp(prefix="prueba_api_")
+        os.chdir(self.directorio)
+        self.servidor = ServidorAPI(("127.0.0.1", 0), hilos=2)
+        self.hilo = threading.Thread(target=self.servidor.serve_forever, daemon=True)
+        self.hilo.start()
+        self.conexion = HTTPConnection(*self.servidor.server_address[:2], timeout=10)
+
+    def tearDown(self):
+        self.conexion.close()
+        self.servidor.shutdown()
+        self.servidor.server_close()
+        os.chdir(self.anterior)
+        shutil.rmtree(self.directorio, ignore_errors=True)
+
+    def pedir(self, metodo: str, ruta: str, cuerpo=None) -> tuple:
+        datos = None if cuerpo is None else json.dumps(cuerpo)
+        encabezados = {} if datos is None else {"Content-Type": "application/json"}
+        self.conexion.request(metodo, ruta, datos, encabezados)
+        respuesta = self.conexion.getresponse()
+        return respuesta.status, json.loads(respuesta.read() or b"null")
+
+    def test_alta_consulta_y_edicion(self):
+        estado, creado = self.pedir("POST", "/participantes", ASH)
+        self.assertEqual(estado, 201)
+        self.assertEqual(self.pedir("GET", f"/participantes/{creado['id_participante']}"), (200, creado))
+
+        estado, editado = self.pedir("PATCH", f"/participantes/{creado['id_participante']}", {"edad": 11})
+        self.assertEqual((estado, editado["edad"]), (200, 11))
+        self.assertEqual(self.pedir("GET", "/participantes/99")[0], 404)
+
+    def test_rechaza_valores_del_tipo_equivocado(self):
+        for cambio in ({"nombre": ["Ash"]}, {"ciudad": {"x": 1}}, {"edad": True}, {"edad": 15.9}):
+            with self.subTest(cambio=cambio):
+                self.assertEqual(self.pedir("POST", "/participantes", {**ASH, **cambio})[0], 400)
+        self.assertEqual(self.pedir("GET", "/participantes")[1], [])
+
+    def test_inscripcion_y_baja_en_cascada(self):
+        estado, inscripcion = self.pedir("POST", "/inscripciones",
+                                         {"participante": ASH, "cuenta": CUENTA, "equipo": [PIKACHU]})
+        self.assertEqual(estado, 201)
+        self.assertNotIn("contrasena", inscripcion["cuenta"])
+        id_ash = inscripcion["participante"]["id_participante"]
+        self.assertEqual(len(self.pedir("GET", f"/participantes/{id_ash}/pokemones")[1]), 1)
+
+        self.assertEqual(self.pedir("DELETE", f"/participantes/{id_ash}")[0], 200)
+        self.assertEqual(self.pedir("GET", "/pokemones")[1], [])
+        self.assertEqual(self.pedir("GET", "/cuentas")[1], [])
+
+    def test_inscripcion_invalida_no_escribe_nada(self):
+        for cuerpo in ({"participante": ASH, "cuenta": "ash"},
+                       {"participante": ASH, "equipo": ["Pikachu"]},
+                       {"participante": ASH, "equipo": [{**PIKACHU, "nivel": 500}]}):
+            with self.subTest(cuerpo=cuerpo):
+                self.assertEqual(self.pedir("POST", "/inscripciones", cuerpo)[0], 400)
+        self.assertEqual(self.pedir("GET", "/participantes")[1], [])
+
+    def test_paginas_y_rangos(self):
+        for edad in range(10, 35):
+            self.pedir("POST", "/participantes", {**ASH, "edad": edad})
+        vistos, cursor = [], None
+        while True:
+            estado, pagina = self.pedir("GET", "/participantes?limite=10" + (f"&cursor={cursor}" if cursor else ""))
+            self.assertEqual(estado, 200)
+            vistos.extend(registro["edad"] for registro in pagina["registros"])
+            cursor = pagina["cursor"]
+            if cursor is None:
+                break
+        self.assertEqual(vistos, list(range(10, 35)))
+
+        estado, rango = self.pedir("GET", "/participantes?edad_desde=20&edad_hasta=22")
+        self.assertEqual((estado, sorted(registro["edad"] for registro in rango)), (200, [20, 21, 22]))
+        self.assertEqual(self.pedir("GET", "/participantes?edad_desde=veinte")[0], 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
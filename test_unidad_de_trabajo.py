@@ -0,0 +1,132 @@
+"""Pruebas de `UnidadDeTrabajo`: confirmación, descarte y caídas a mitad de la escritura."""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+import warnings
+from unittest import mock
+from CuentaManager import CuentaManager
+from Errores import ErrorIntegridad, ErrorValidacion
+from ParticipanteManager import ParticipanteManager
+from PokemonManager import PokemonManager
+from UnidadDeTrabajo import UnidadDeTrabajo, inscribir
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+ASH = {"nombre": "Ash", "edad": 10, "ciudad": "Pueblo Paleta", "telefono": "5512345678"}
+CUENTA = {"usuario": "ash", "contrasena": "pikachu1", "fecha_creacion": "2024-01-01"}
+PIKACHU = {"nombre": "Pikachu", "tipo": "Electrico", "nivel": 5, "movimiento_principal": "Impactrueno"}
+
+
+class PruebaUnidadDeTrabajo(unittest.TestCase):
+
+    def setUp(self):
+        self.anterior = os.getcwd()
+        self.directorio = tempfile.mkdtemp(prefix="prueba_unidad_")
+        os.chdir(self.directorio)
+        self.abrir()
+
+    def tearDown(self):
+        os.chdir(self.anterior)
+        shutil.rmtree(self.directorio, ignore_errors=True)
+
+    def abrir(self):
+        self.participantes = ParticipanteManager()
+        self.cuentas = CuentaManager(self.participantes)
+        self.pokemones = PokemonManager(self.participantes)
+
+    def contar(self) -> tuple:
+        return (len(self.participantes.obtener_todos()), len(self.cuentas.obtener_todos()),
+                len(self.pokemones.obtener_todos()))
+
+    def test_inscribir_confirma_todo(self):
+        resultado = inscribir(self.participantes, self.cuentas, self.pokemones, ASH, CUENTA, [PIKACHU])
+        id_ash = resultado["participante"].id_participante
+        self.assertEqual(resultado["cuenta"].id_participante, id_ash)
+        self.assertEqual([pokemon.id_entrenador for pokemon in resultado["pokemones"]], [id_ash])
+        self.assertEqual(self.contar(), (1, 1, 1))
+
+    def test_error_de_validacion_no_escribe_nada(self):
+        with self.assertRaises(ErrorValidacion):
+            inscribir(self.participantes, self.cuentas, self.pokemones, ASH, CUENTA,
+                      [PIKACHU, {**PIKACHU, "nivel": 500}])
+        self.assertEqual(self.contar(), (0, 0, 0))
+
+    def test_descarte_deja_las_referencias_sin_id(self):
+        inscribir(self.participantes, self.cuentas, self.pokemones, ASH, CUENTA)
+        unidad = UnidadDeTrabajo(self.participantes, self.cuentas)
+        nuevo = unidad.crear(self.participantes, **{**ASH, "nombre": "Gary"})
+        unidad.crear(self.cuentas, **CUENTA, id_participante=nuevo)  # Usuario repetido
+        with self.assertRaises(ErrorValidacion):
+            unidad.confirmar()
+        self.assertIsNone(nuevo.id)
+        self.assertEqual(self.contar(), (1, 1, 0))
+
+    def test_no_borra_un_registro_referenciado(self):
+        ash = inscribir(self.participantes, self.cuentas, self.pokemones, ASH, CUENTA)["participante"]
+        with self.assertRaises(ErrorIntegridad):
+            with UnidadDeTrabajo(self.participantes, self.cuentas) as unidad:
+                unidad.borrar(self.participantes, ash.id_participante)
+        self.assertEqual(self.contar(), (1, 1, 0))
+
+    def test_falla_de_escritura_restaura_las_tablas_escritas(self):
+        motor = type(self.pokemones.almacen)
+        original = motor.escribir_lote
+
+        def fallar_en_pokemones(almacen, filas, eliminados=()):
+            if almacen is self.pokemones.almacen:
+                raise OSError("disco lleno")
+            return original(almacen, filas, eliminados)
+
+        with mock.patch.object(motor, "escribir_lote", fallar_en_pokemones):
+            with self.assertRaises(OSError):
+                inscribir(self.participantes, self.cuentas, self.pokemones, ASH, CUENTA, [PIKACHU])
+        self.assertEqual(self.contar(), (0, 0, 0))
+        self.abrir()
+        self.assertEqual(self.contar(), (0, 0, 0))
+
+    def test_caida_a_mitad_de_la_unidad_se_descarta_al_recuperar(self):
+        codigo = "\n".join([
+            "import os, sys",
+            f"sys.path.insert(0, {RAIZ!r})",
+            "from AlmacenCSV import AlmacenCSV",
+            "from CuentaManager import CuentaManager",
+            "from ParticipanteManager import ParticipanteManager",
+            "from PokemonManager import PokemonManager",
+            "from UnidadDeTrabajo import inscribir",
+            "participantes = ParticipanteManager()",
+            "cuentas, pokemones = CuentaManager(participantes), PokemonManager(participantes)",
+            f"inscribir(participantes, cuentas, pokemones, {ASH!r}, {CUENTA!r}, [{PIKACHU!r}])",
+            "original = AlmacenCSV.escribir_lote",
+            "def caer(almacen, filas, eliminados=()):",
+            "    if almacen.tabla == 'pokemones.csv':",
+            "        os._exit(1)",
+            "    return original(almacen, filas, eliminados)",
+            "AlmacenCSV.escribir_lote = caer",
+            f"inscribir(participantes, cuentas, pokemones, {{**{ASH!r}, 'nombre': 'Gary'}},",
+            f"          {{**{CUENTA!r}, 'usuario': 'gary'}}, [{PIKACHU!r}])",
+        ])
+        # Otro directorio: el de `setUp` ya tiene su bitácora abierta en este proceso
+        os.mkdir("caida")
+        os.chdir("caida")
+        subprocess.run([sys.executable, "-c", codigo], check=False)
+        with open("participantes.csv", encoding="utf-8") as file:
+            self.assertIn("Gary", file.read())
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            self.abrir()
+        self.assertEqual([registro.nombre for registro in self.participantes.obtener_todos()], ["Ash"])
+        self.assertEqual(self.contar(), (1, 1, 1))
+
+        # La transacción descartada no vuelve a deshacerse sobre escrituras posteriores
+        inscribir(self.participantes, self.cuentas, self.pokemones, {**ASH, "nombre": "Brock"},
+                  {**CUENTA, "usuario": "brock"})
+        self.abrir()
+        self.assertEqual(self.contar(), (2, 2, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()